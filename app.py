@@ -3,12 +3,11 @@
 import sys
 print("✅ 현재 실행 중인 Python:", sys.executable)
 
-from flask import Flask, request, jsonify, send_file, session, make_response
+from flask import Flask, request, jsonify, send_file, session, make_response, Response, stream_with_context
 from flask_cors import CORS
 from collections import OrderedDict
 from datetime import date, datetime, timedelta, timezone
 from collections import defaultdict
-from io import BytesIO
 import io
 import calendar
 import sqlite3
@@ -24,8 +23,26 @@ import base64
 import threading
 import time
 import json, uuid
+import functools
+import hashlib
+import multiprocessing
+import csv
+import gzip
+import itertools
+import struct
+import tempfile
+import stat
+import xlsxwriter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from flask import send_from_directory
 from werkzeug.utils import secure_filename
+import click
+
+try:
+    import fcntl
+except ImportError:   # Windows 로컬 개발 환경: 프로세스 간 잠금 없이 단독 실행으로 간주
+    fcntl = None
 
 # [데이터 해독 익스텐션] 특수 포맷 실적 자료 해독을 위한 코어 모듈 추가
 import zipfile
@@ -39,20 +56,82 @@ def now_kst_str():
     return datetime.now(KST).strftime("%Y-%m-%d %H:%M:%S")
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATABASE = os.path.join(BASE_DIR, "db.sqlite")
-DB_PATH = "db.sqlite"
-MENU_UPLOAD_DIR = os.path.join(BASE_DIR, "uploads", "menu")
+DATABASE = os.environ.get("MEAL_DB_PATH", os.path.join(BASE_DIR, "db.sqlite"))
+DB_PATH = DATABASE
+MENU_UPLOAD_DIR = os.environ.get("MENU_UPLOAD_DIR", os.path.join(BASE_DIR, "uploads", "menu"))
 MENU_MANIFEST_PATH = os.path.join(MENU_UPLOAD_DIR, "menu_board.json")
 MENU_ALLOWED_EXT = {".jpg", ".jpeg", ".png", ".webp"}
 MENU_MAX_MB = 20   
 os.makedirs(MENU_UPLOAD_DIR, exist_ok=True)
 
 # ===== GitHub 백업 설정 =====
-GITHUB_REPO   = "jwon2486/MealDB-Backup"    
-GITHUB_BRANCH = "main"                      
-GITHUB_PATH   = "db.sqlite"                 
-GITHUB_TOKEN  = os.environ.get("GITHUB_TOKEN")
-GITHUB_API    = "https://api.github.com"
+# GITHUB_API를 로컬 대역 서버 주소로 바꾸면 실제 저장소 없이 업로드 경로를 시험할 수 있습니다.
+GITHUB_REPO    = os.environ.get("GITHUB_REPO", "jwon2486/MealDB-Backup")
+GITHUB_BRANCH  = os.environ.get("GITHUB_BRANCH", "main")
+GITHUB_PATH    = os.environ.get("GITHUB_PATH", "db.sqlite.gz")
+GITHUB_TOKEN   = os.environ.get("GITHUB_TOKEN")
+GITHUB_API     = os.environ.get("GITHUB_API", "https://api.github.com")
+GITHUB_TIMEOUT = 60
+
+# ===== DB 스냅샷 설정 =====
+# 온라인 백업 API로 한 번에 SNAPSHOT_BACKUP_PAGES 페이지씩 복사하고, 단계 사이에 쉬면서 쓰기 요청에 양보합니다.
+SNAPSHOT_DIR          = os.environ.get("SNAPSHOT_DIR", os.path.join(BASE_DIR, "db_backups"))
+SNAPSHOT_BACKUP_PAGES = int(os.environ.get("SNAPSHOT_BACKUP_PAGES", 256))
+SNAPSHOT_BACKUP_SLEEP = float(os.environ.get("SNAPSHOT_BACKUP_SLEEP", 0.005))
+# 백업 실행 기록은 백업 대상 DB 밖에 둡니다 (기록 때문에 매 스냅샷 내용이 달라지지 않도록).
+BACKUP_LOG_PATH       = os.path.join(SNAPSHOT_DIR, "backup_runs.sqlite")
+
+# ===== 백업 스케줄러 설정 =====
+# 모든 예약 작업(스냅샷/업로드, 일일 백업, 증분, 정리)은 잠금을 잡은 리더 프로세스 하나에서만 실행됩니다.
+BACKUP_SCHEDULE_HOURS  = [2, 5, 8, 11, 14, 17, 20, 23]
+DAILY_BACKUP_DIR       = os.environ.get("DAILY_BACKUP_DIR", os.path.join(BASE_DIR, "backups"))
+SCHEDULER_LOCK_PATH    = os.path.join(SNAPSHOT_DIR, "scheduler.lock")
+SCHEDULER_STATE_PATH   = os.path.join(SNAPSHOT_DIR, "scheduler.json")
+SCHEDULER_POLL_SECONDS = 30
+
+# ===== 연속 증분 백업 설정 =====
+# CONTINUOUS_BACKUP_SECONDS 간격으로 바뀐 페이지만 체인에 덧붙입니다 (0이면 끔).
+CONTINUOUS_BACKUP_SECONDS = int(os.environ.get("CONTINUOUS_BACKUP_SECONDS", 120))
+BACKUP_CHAIN_DIR          = os.environ.get("BACKUP_CHAIN_DIR", os.path.join(SNAPSHOT_DIR, "chain"))
+BACKUP_CHAIN_MAX_HOURS    = int(os.environ.get("BACKUP_CHAIN_MAX_HOURS", 24))
+BACKUP_CHAIN_KEEP         = int(os.environ.get("BACKUP_CHAIN_KEEP", 7))
+
+# ===== 백업 보관 한도 =====
+# 단계별 보관 정책을 적용한 뒤에도 모든 백업 위치의 합계가 이 크기를 넘으면 오래된 것부터 지웁니다.
+BACKUP_BUDGET_MB = int(os.environ.get("BACKUP_BUDGET_MB", 2048))
+
+# ===== 공공 공휴일 API 설정 =====
+# PUBLIC_HOLIDAY_API_URL을 로컬 대역 서버로 바꾸면 외부망 없이 수집 로직을 시험할 수 있습니다.
+PUBLIC_HOLIDAY_API_URL       = os.environ.get("PUBLIC_HOLIDAY_API_URL", "https://apis.data.go.kr/B090041/openapi/service/SpcdeInfoService/getRestDeInfo")
+PUBLIC_HOLIDAY_REFRESH_DAYS  = 7
+PUBLIC_HOLIDAY_FETCH_WORKERS = int(os.environ.get("PUBLIC_HOLIDAY_FETCH_WORKERS", 4))
+PUBLIC_HOLIDAY_RETRIES       = 3
+PUBLIC_HOLIDAY_TIMEOUT       = 10
+PUBLIC_HOLIDAY_WAIT_SECONDS  = 15
+
+# 기간 조회 API의 최대 조회 일수 (응답 크기 제한)
+MAX_RANGE_DAYS = 62
+
+# ===== SQLite 커넥션 풀 설정 =====
+DB_BUSY_TIMEOUT_MS = int(os.environ.get("DB_BUSY_TIMEOUT_MS", 5000))
+DB_CACHE_SIZE_KB   = int(os.environ.get("DB_CACHE_SIZE_KB", 16384))
+DB_MMAP_SIZE       = int(os.environ.get("DB_MMAP_SIZE", 64 * 1024 * 1024))
+DB_POOL_SIZE       = int(os.environ.get("DB_POOL_SIZE", 4))
+
+# ===== 백그라운드 작업(Job) 설정 =====
+JOB_RESULT_DIR      = os.environ.get("JOB_RESULT_DIR", os.path.join(BASE_DIR, "job_results"))
+JOB_WORKERS         = int(os.environ.get("JOB_WORKERS", 2))
+JOB_RETENTION_HOURS = int(os.environ.get("JOB_RETENTION_HOURS", 24))
+JOB_STALE_MINUTES   = int(os.environ.get("JOB_STALE_MINUTES", 30))
+# 작업 상태/진행률은 본 DB 밖에 둡니다 (진행률 갱신마다 데이터 버전과 ETag, 백업 대상이 바뀌지 않도록).
+JOB_DB_PATH         = os.environ.get("JOB_DB_PATH", os.path.join(JOB_RESULT_DIR, "jobs.sqlite"))
+os.makedirs(JOB_RESULT_DIR, exist_ok=True)
+
+# ===== 식수 대조(compare-auto) 결과 보관소 =====
+COMPARE_ARTIFACT_DIR       = os.environ.get("COMPARE_ARTIFACT_DIR", os.path.join(BASE_DIR, "artifacts", "compare"))
+COMPARE_ARTIFACT_KEEP_DAYS = int(os.environ.get("COMPARE_ARTIFACT_KEEP_DAYS", 30))
+COMPARE_PAGE_MAX           = 500
+os.makedirs(COMPARE_ARTIFACT_DIR, exist_ok=True)
 
 # ============================================================================
 # 2. 깃허브 백업 및 스냅샷 코어 시스템
@@ -63,97 +142,650 @@ def get_week_range_kst():
     friday = monday + timedelta(days=4)
     return monday, friday
 
-def create_db_snapshot():
+def online_backup(src_path, dest_path, pages=None, sleep=None, verify=True):
+    # SQLite 온라인 백업 API: 페이지 단위로 나눠 복사하므로 복사 도중에도 다른 커넥션이 쓸 수 있습니다.
+    # 복사가 끝나면 사본에 quick_check를 돌려 결과 문자열("ok")과 진행 단계 수를 반환합니다 (verify=False면 None).
+    steps = [0]
+
+    def progress(status, remaining, total):
+        steps[0] += 1
+
+    source = sqlite3.connect(src_path, timeout=DB_BUSY_TIMEOUT_MS / 1000)
+    target = sqlite3.connect(dest_path)
+    try:
+        # WAL 모드에서는 읽기 트랜잭션을 열어 두면 모든 단계가 같은 시점의 스냅샷을 읽습니다.
+        # (열어 두지 않으면 단계 사이에 다른 커넥션이 쓸 때마다 백업이 처음부터 다시 시작됩니다.)
+        source.execute("BEGIN")
+        source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        source.backup(target, pages=pages or SNAPSHOT_BACKUP_PAGES, progress=progress,
+                      sleep=SNAPSHOT_BACKUP_SLEEP if sleep is None else sleep)
+        integrity = target.execute("PRAGMA quick_check").fetchone()[0] if verify else None
+    finally:
+        target.close()
+        source.close()
+    return integrity, steps[0]
+
+def gzip_file(src_path, dest_path):
+    # 헤더에 파일명/시각을 넣지 않아, 내용이 같은 DB는 항상 같은 .gz 바이트(같은 해시)가 됩니다.
+    with open(src_path, "rb") as src, open(dest_path, "wb") as raw, \
+            gzip.GzipFile(filename="", mode="wb", compresslevel=6, fileobj=raw, mtime=0) as dest:
+        shutil.copyfileobj(src, dest, 1 << 20)
+
+BACKUP_RUNS_DDL = """
+    CREATE TABLE IF NOT EXISTS backup_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        started_at TEXT,
+        duration_ms INTEGER,
+        steps INTEGER,
+        snapshot_bytes INTEGER,
+        compressed_bytes INTEGER,
+        integrity TEXT,
+        path TEXT,
+        error TEXT
+    )
+"""
+BACKUP_RUNS_INSERT = """
+    INSERT INTO backup_runs (kind, started_at, duration_ms, steps, snapshot_bytes, compressed_bytes, integrity, path, error)
+    VALUES (:kind, :started_at, :duration_ms, :steps, :snapshot_bytes, :compressed_bytes, :integrity, :path, :error)
+"""
+
+def open_backup_log():
+    os.makedirs(os.path.dirname(BACKUP_LOG_PATH), exist_ok=True)
+    conn = sqlite3.connect(BACKUP_LOG_PATH, timeout=DB_BUSY_TIMEOUT_MS / 1000)
+    conn.row_factory = sqlite3.Row
+    conn.execute(BACKUP_RUNS_DDL)
+    return conn
+
+def record_backup_run(run):
+    try:
+        conn = open_backup_log()
+        try:
+            conn.execute(BACKUP_RUNS_INSERT, run)
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print("⚠️ 백업 실행 기록 실패:", e)
+
+SNAPSHOT_TARGETS = {
+    "snapshot": (SNAPSHOT_DIR, "db_{ts}.sqlite.gz"),       # 3시간 주기, GitHub 업로드 대상
+    "daily":    (DAILY_BACKUP_DIR, "backup_{ts}.db.gz"),   # 매일 자정 (기존 backup_worker.py 백업)
+}
+
+def create_db_snapshot(kind="snapshot"):
+    # 일관된 스냅샷을 SNAPSHOT_TARGETS[kind] 위치에 gzip으로 남기고 경로를 반환합니다 (실패 시 None).
+    directory, name_format = SNAPSHOT_TARGETS[kind]
+    # 체인 디렉터리와 같이 모든 백업 이름은 KST 기준입니다 (보관 정책이 이름의 시각으로 구간을 나눔).
+    ts = datetime.now(KST).strftime("%Y%m%d_%H%M%S")
+    os.makedirs(directory, exist_ok=True)
+    snapshot_path = os.path.join(directory, name_format.format(ts=ts))
+    raw_path = snapshot_path[:-len(".gz")] + ".tmp"
+    run = {"kind": kind, "started_at": now_kst_str(), "duration_ms": None, "steps": None,
+           "snapshot_bytes": None, "compressed_bytes": None, "integrity": None, "path": None, "error": None}
+    started = time.perf_counter()
     try:
-        ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_dir = os.path.join(BASE_DIR, "db_backups")
-        os.makedirs(backup_dir, exist_ok=True)
-        snapshot_path = os.path.join(backup_dir, f"db_{ts}.sqlite")
-        shutil.copy2(DATABASE, snapshot_path)    
+        run["integrity"], run["steps"] = online_backup(DATABASE, raw_path)
+        if run["integrity"] != "ok":
+            raise RuntimeError(f"스냅샷 무결성 검사 실패: {run['integrity']}")
+        run["snapshot_bytes"] = os.path.getsize(raw_path)
+        gzip_file(raw_path, snapshot_path)
+        run["compressed_bytes"] = os.path.getsize(snapshot_path)
+        run["path"] = snapshot_path
+        print(f"📸 [스냅샷] {os.path.basename(snapshot_path)} ({run['snapshot_bytes']:,} → {run['compressed_bytes']:,} bytes)")
+        link_identical_backup(snapshot_path)
         return snapshot_path
     except Exception as e:
+        run["error"] = str(e)
         print("❌ DB 스냅샷 생성 실패:", e)
         return None
+    finally:
+        if os.path.exists(raw_path): os.remove(raw_path)
+        run["duration_ms"] = int((time.perf_counter() - started) * 1000)
+        record_backup_run(run)
+
+# ===== GitHub 업로드 =====
+# 업로드 대상은 결정적으로 압축된 스냅샷(.gz)이므로 git blob 해시가 같으면 원격 파일과 내용이 같습니다.
+# 마지막으로 올린 blob 해시와 그때의 전역 데이터 버전을 기억해 두고,
+# 데이터 버전이 그대로면 스냅샷조차 뜨지 않고, 해시가 같으면 요청 없이 건너뜁니다.
+GITHUB_UPLOAD_STATE = os.path.join(SNAPSHOT_DIR, "github_upload.json")
+_github_session = {"pid": None, "session": None}
+
+def get_github_session():
+    # 프로세스당 한 세션을 재사용해 TLS 연결과 인증 헤더를 매번 새로 만들지 않습니다.
+    if _github_session["pid"] != os.getpid():
+        session = requests.Session()
+        session.headers.update({
+            "Authorization": f"Bearer {GITHUB_TOKEN}",
+            "Accept": "application/vnd.github+json",
+        })
+        _github_session.update(pid=os.getpid(), session=session)
+    return _github_session["session"]
 
-def upload_file_to_github(file_path):
+def git_blob_sha(file_path, chunk_size=1 << 20):
+    # GitHub contents API가 돌려주는 "sha"와 같은 값 (sha1("blob <크기>\0" + 내용))
+    digest = hashlib.sha1(f"blob {os.path.getsize(file_path)}\0".encode())
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class GithubContentBody:
+    # contents API PUT 본문(JSON)을 파일에서 조금씩 base64로 인코딩하며 내보냅니다.
+    # 길이를 미리 계산해 두므로 requests가 Content-Length를 붙여 한 번에 전송합니다.
+    chunk_size = 3 << 18   # 3의 배수여야 조각마다 base64 패딩이 생기지 않습니다
+
+    def __init__(self, file_path, fields):
+        self.prefix = json.dumps(fields, ensure_ascii=False)[:-1].encode("utf-8") + b', "content": "'
+        self.suffix = b'"}'
+        self.length = len(self.prefix) + 4 * ((os.path.getsize(file_path) + 2) // 3) + len(self.suffix)
+        self.file_path = file_path
+        self.parts = self.iter_parts()
+        self.current, self.offset = memoryview(b""), 0
+
+    def __len__(self):
+        return self.length
+
+    def iter_parts(self):
+        yield self.prefix
+        with open(self.file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                yield base64.b64encode(chunk)
+        yield self.suffix
+
+    def read(self, size=-1):
+        # 현재 조각 안의 위치만 옮기며 필요한 만큼만 잘라 붙입니다 (남은 버퍼를 매번 다시 복사하지 않음).
+        pieces = []
+        while size != 0:
+            if self.offset == len(self.current):
+                self.current, self.offset = memoryview(next(self.parts, b"")), 0
+                if not self.current:
+                    break
+            end = len(self.current) if size < 0 else min(len(self.current), self.offset + size)
+            pieces.append(self.current[self.offset:end])
+            if size > 0:
+                size -= end - self.offset
+            self.offset = end
+        return b"".join(pieces)
+
+def load_github_upload_state():
+    try:
+        with open(GITHUB_UPLOAD_STATE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_github_upload_state(state):
+    os.makedirs(os.path.dirname(GITHUB_UPLOAD_STATE), exist_ok=True)
+    tmp = GITHUB_UPLOAD_STATE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp, GITHUB_UPLOAD_STATE)
+
+def fetch_github_sha(session, url):
+    resp = session.get(url, params={"ref": GITHUB_BRANCH}, timeout=GITHUB_TIMEOUT)
+    if resp.status_code == 200:
+        return resp.json().get("sha")
+    return None
+
+def upload_file_to_github(file_path, data_version=None):
+    # 결과: "uploaded" | "unchanged" | "failed" | "disabled"
     if not GITHUB_TOKEN:
         print("⚠️ GITHUB_TOKEN 환경변수가 설정되지 않았습니다. 백업 건너뜀.")
-        return
+        return "disabled"
 
-    with open(file_path, "rb") as f:
-        content_b64 = base64.b64encode(f.read()).decode("utf-8")
-
-    headers = {
-        "Authorization": f"Bearer {GITHUB_TOKEN}",
-        "Accept": "application/vnd.github+json",
-    }
     url = f"{GITHUB_API}/repos/{GITHUB_REPO}/contents/{GITHUB_PATH}"
+    target = f"{GITHUB_REPO}@{GITHUB_BRANCH}:{GITHUB_PATH}"
+    local_sha = git_blob_sha(file_path)
+    state = load_github_upload_state()
+    if state.get("target") == target and state.get("sha") == local_sha:
+        print(f"⏭ GitHub DB 백업 생략 (직전 업로드와 동일): {file_path}")
+        return "unchanged"
+
+    session = get_github_session()
+    # 기억해 둔 원격 sha가 없을 때만 조회합니다 (재시작 직후 등).
+    remote_sha = state.get("sha") if state.get("target") == target else fetch_github_sha(session, url)
+    if remote_sha == local_sha:
+        save_github_upload_state({"target": target, "sha": local_sha, "data_version": data_version,
+                                  "uploaded_at": state.get("uploaded_at")})
+        print(f"⏭ GitHub DB 백업 생략 (원격과 동일): {file_path}")
+        return "unchanged"
 
-    sha = None
-    get_resp = requests.get(url, headers=headers, params={"ref": GITHUB_BRANCH})
-    if get_resp.status_code == 200:
-        sha = get_resp.json().get("sha")
-
-    now_kst_iso = datetime.now(KST).isoformat()
     now_kst_string = datetime.now(KST).strftime('%Y-%m-%d %H:%M:%S')
-
-    payload = {
-        "message": f"Automated db backup - {now_kst_string} KST",
-        "content": content_b64,
-        "branch": GITHUB_BRANCH,
-        "committer": {
-            "name": "Backup Bot",
-            "email": "backup@example.com",
-            "date": datetime.now(KST).isoformat()
+    for attempt in range(2):
+        payload = {
+            "message": f"Automated db backup - {now_kst_string} KST",
+            "branch": GITHUB_BRANCH,
+            "committer": {
+                "name": "Backup Bot",
+                "email": "backup@example.com",
+                "date": datetime.now(KST).isoformat()
+            }
         }
-    }
-    if sha:
-        payload["sha"] = sha
-
-    put_resp = requests.put(url, headers=headers, json=payload)
-    if 200 <= put_resp.status_code < 300:
-        print(f"✅ GitHub DB 백업 성공: {file_path}")
-    else:
-        print("❌ GitHub DB 백업 실패:", put_resp.status_code, put_resp.text)
+        if remote_sha:
+            payload["sha"] = remote_sha
+        put_resp = session.put(url, data=GithubContentBody(file_path, payload),
+                               headers={"Content-Type": "application/json"}, timeout=GITHUB_TIMEOUT)
+        if 200 <= put_resp.status_code < 300:
+            uploaded_sha = put_resp.json().get("content", {}).get("sha", local_sha)
+            save_github_upload_state({"target": target, "sha": uploaded_sha, "data_version": data_version,
+                                      "uploaded_at": now_kst_str()})
+            print(f"✅ GitHub DB 백업 성공: {file_path} ({os.path.getsize(file_path):,} bytes)")
+            return "uploaded"
+        if put_resp.status_code in (409, 422) and attempt == 0:
+            # 기억한 sha가 원격과 어긋난 경우(다른 곳에서 갱신) 최신 sha를 다시 받아 한 번 더 시도
+            remote_sha = fetch_github_sha(session, url)
+            if remote_sha == local_sha:
+                save_github_upload_state({"target": target, "sha": local_sha, "data_version": data_version,
+                                          "uploaded_at": state.get("uploaded_at")})
+                return "unchanged"
+            continue
+        break
+    print("❌ GitHub DB 백업 실패:", put_resp.status_code, put_resp.text[:500])
+    return "failed"
 
 def backup_db_to_github():
+    data_version = get_cache_version("data")
+    state = load_github_upload_state()
+    if GITHUB_TOKEN and state.get("target") == f"{GITHUB_REPO}@{GITHUB_BRANCH}:{GITHUB_PATH}" \
+            and state.get("data_version") == data_version:
+        print(f"⏭ GitHub DB 백업 생략 (데이터 버전 {data_version} 이후 변경 없음)")
+        return "unchanged"
     snapshot = create_db_snapshot()
     if snapshot:
-        upload_file_to_github(snapshot)
+        return upload_file_to_github(snapshot, data_version)
+    return "failed"
+
+# ===== 연속 증분 백업 (페이지 체인) =====
+# 체인 = 기준 스냅샷(base.sqlite.gz) + 그 뒤로 바뀐 페이지만 담은 증분 파일(inc_*.pages.gz)의 나열.
+# WAL 프레임을 그대로 보관하려면 모든 프로세스의 체크포인트를 한 곳에서 통제해야 하므로,
+# 온라인 백업으로 얻은 일관된 사본을 직전 시점의 페이지 해시(pages.idx)와 비교해 바뀐 페이지만 남깁니다.
+CHAIN_PAGE_RECORD = struct.Struct(">I")   # 증분 레코드 = 페이지 번호(4바이트) + 페이지 내용
+CHAIN_DIGEST_SIZE = 16
+CHAIN_DIR_PATTERN = re.compile(r"^chain_\d{8}_\d{6}$")
+
+def sqlite_page_size(path):
+    with open(path, "rb") as f:
+        header = f.read(18)
+    size = int.from_bytes(header[16:18], "big")
+    return 65536 if size == 1 else size
+
+def iter_changed_pages(image_path, page_size, digests):
+    # digests(페이지별 해시, bytearray)와 다른 페이지만 (번호, 내용)으로 내보내며 digests를 새 시점으로 갱신합니다.
+    pgno = 0
+    with open(image_path, "rb") as f:
+        while True:
+            page = f.read(page_size)
+            if not page:
+                break
+            offset = pgno * CHAIN_DIGEST_SIZE
+            pgno += 1
+            digest = hashlib.blake2b(page, digest_size=CHAIN_DIGEST_SIZE).digest()
+            if digests[offset:offset + CHAIN_DIGEST_SIZE] != digest:
+                digests[offset:offset + CHAIN_DIGEST_SIZE] = digest
+                yield pgno, page
+    del digests[pgno * CHAIN_DIGEST_SIZE:]
+
+class BackupChain:
+    def __init__(self, path, manifest):
+        self.path = path
+        self.manifest = manifest
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, "chain.json"), encoding="utf-8") as f:
+            return cls(path, json.load(f))
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    def file(self, name):
+        return os.path.join(self.path, name)
+
+    def save_manifest(self):
+        tmp = self.file("chain.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False)
+        os.replace(tmp, self.file("chain.json"))
+
+    def load_digests(self):
+        with open(self.file("pages.idx"), "rb") as f:
+            return bytearray(f.read())
+
+    def save_digests(self, digests):
+        tmp = self.file("pages.idx.tmp")
+        with open(tmp, "wb") as f:
+            f.write(digests)
+        os.replace(tmp, self.file("pages.idx"))
+
+    def increment_bytes(self):
+        return sum(inc["bytes"] for inc in self.manifest["increments"])
+
+    def is_full(self):
+        # 기준 시점이 오래됐거나 증분 합계가 기준 스냅샷보다 커지면 복원 비용을 줄이기 위해 새 체인을 시작합니다.
+        started = datetime.strptime(self.manifest["base"]["at"], "%Y-%m-%d %H:%M:%S").replace(tzinfo=KST)
+        return (datetime.now(KST) - started > timedelta(hours=BACKUP_CHAIN_MAX_HOURS)
+                or self.increment_bytes() > self.manifest["base"]["bytes"])
+
+    def restore_points(self, at=None):
+        return [inc for inc in self.manifest["increments"] if at is None or inc["at"] <= at]
+
+    def append_increment(self):
+        # 현재 DB의 일관된 사본을 떠서 바뀐 페이지만 inc_<순번>.pages.gz로 남깁니다. 변경이 없으면 None.
+        started = time.perf_counter()
+        raw_path = self.file("capture.sqlite.tmp")
+        seq = len(self.manifest["increments"]) + 1
+        inc_name = f"inc_{seq:06d}.pages.gz"
+        inc_tmp = self.file(inc_name + ".tmp")
+        try:
+            at = now_kst_str()
+            online_backup(DATABASE, raw_path, verify=False)
+            if sqlite_page_size(raw_path) != self.manifest["page_size"]:
+                return None
+            page_size = self.manifest["page_size"]
+            digests = self.load_digests()
+            pages = 0
+            with gzip.open(inc_tmp, "wb", compresslevel=6) as out:
+                for pgno, page in iter_changed_pages(raw_path, page_size, digests):
+                    out.write(CHAIN_PAGE_RECORD.pack(pgno))
+                    out.write(page)
+                    pages += 1
+            page_count = len(digests) // CHAIN_DIGEST_SIZE
+            last_count = (self.manifest["increments"] or [self.manifest["base"]])[-1]["page_count"]
+            if pages == 0 and page_count == last_count:
+                return None  # 체크포인트 등으로 파일만 바뀐 경우
+            os.replace(inc_tmp, self.file(inc_name))
+            increment = {"seq": seq, "file": inc_name, "at": at, "pages": pages, "page_count": page_count,
+                         "bytes": os.path.getsize(self.file(inc_name)),
+                         "duration_ms": int((time.perf_counter() - started) * 1000)}
+            # 매니페스트를 먼저 저장: 해시 저장 전에 중단되면 다음 증분이 같은 페이지를 한 번 더 담을 뿐입니다.
+            self.manifest["increments"].append(increment)
+            self.save_manifest()
+            self.save_digests(digests)
+            return increment
+        finally:
+            for path in (raw_path, inc_tmp):
+                if os.path.exists(path): os.remove(path)
+
+def list_backup_chains():
+    if not os.path.isdir(BACKUP_CHAIN_DIR):
+        return []
+    chains = []
+    for name in sorted(os.listdir(BACKUP_CHAIN_DIR)):
+        path = os.path.join(BACKUP_CHAIN_DIR, name)
+        if CHAIN_DIR_PATTERN.match(name) and os.path.exists(os.path.join(path, "chain.json")):
+            chains.append(BackupChain.load(path))
+    return chains
+
+def start_backup_chain():
+    # 새 체인 디렉터리에 무결성 검사를 통과한 기준 스냅샷과 페이지 해시를 만듭니다.
+    started = time.perf_counter()
+    at = now_kst_str()
+    path = os.path.join(BACKUP_CHAIN_DIR, "chain_" + datetime.now(KST).strftime("%Y%m%d_%H%M%S"))
+    os.makedirs(path, exist_ok=True)
+    chain = BackupChain(path, None)
+    raw_path = chain.file("base.sqlite.tmp")
+    try:
+        integrity, _ = online_backup(DATABASE, raw_path)
+        if integrity != "ok":
+            raise RuntimeError(f"기준 스냅샷 무결성 검사 실패: {integrity}")
+        page_size = sqlite_page_size(raw_path)
+        digests = bytearray()
+        for _ in iter_changed_pages(raw_path, page_size, digests):
+            pass
+        gzip_file(raw_path, chain.file("base.sqlite.gz"))
+        chain.save_digests(digests)
+        chain.manifest = {
+            "page_size": page_size,
+            "base": {"file": "base.sqlite.gz", "at": at, "page_count": len(digests) // CHAIN_DIGEST_SIZE,
+                     "bytes": os.path.getsize(chain.file("base.sqlite.gz")),
+                     "duration_ms": int((time.perf_counter() - started) * 1000)},
+            "increments": [],
+        }
+        chain.save_manifest()
+    except Exception:
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+    finally:
+        if os.path.exists(raw_path): os.remove(raw_path)
+    print(f"🧱 [증분 백업] 새 체인 시작: {chain.name} ({chain.manifest['base']['bytes']:,} bytes)")
+    return chain
 
-def backup_worker_midnight():
-    while True:
-        now_kst = datetime.now(KST)
-        target_hours = [2, 5, 8, 11, 14, 17, 20, 23]
-        next_hour = next((h for h in target_hours if h > now_kst.hour), target_hours[0])
-        
-        if next_hour <= now_kst.hour:
-            next_run_kst = (now_kst + timedelta(days=1)).replace(
-                hour=next_hour, minute=0, second=0, microsecond=0
-            )
+_backup_chain_lock = threading.Lock()
+_backup_chain_state = {"stamp": None}
+
+def database_change_stamp():
+    # 커밋은 항상 DB 또는 -wal 파일을 건드리므로, 두 파일의 (mtime, 크기)가 같으면 사본을 뜨지 않습니다.
+    stamp = []
+    for suffix in ("", "-wal"):
+        try:
+            st = os.stat(DATABASE + suffix)
+            stamp.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            stamp.append(None)
+    return tuple(stamp)
+
+def capture_incremental_backup(force=False):
+    # DB 파일이 바뀌었으면 증분(필요하면 새 체인)을 남기고 {"chain", "increment"}를 반환합니다. 파일 변화가 없으면 None.
+    with _backup_chain_lock:
+        stamp = database_change_stamp()
+        if not force and stamp == _backup_chain_state["stamp"]:
+            return None
+        chains = list_backup_chains()
+        chain = chains[-1] if chains else None
+        increment = None
+        if chain is None or chain.is_full():
+            chain = start_backup_chain()
         else:
-            next_run_kst = now_kst.replace(
-                hour=next_hour, minute=0, second=0, microsecond=0
-            )
-            
-        wait_seconds = (next_run_kst - now_kst).total_seconds()
-        print(f"🕛 [백업] 다음 예약 실행(KST): {next_run_kst.strftime('%Y-%m-%d %H:%M:%S')} (대기 {int(wait_seconds)}초)")
-        
-        if wait_seconds > 0:
-            time.sleep(wait_seconds)
+            increment = chain.append_increment()
+            if increment is None and sqlite_page_size(DATABASE) != chain.manifest["page_size"]:
+                chain = start_backup_chain()  # VACUUM 등으로 페이지 크기가 바뀐 경우
+        _backup_chain_state["stamp"] = stamp
+        if increment:
+            print(f"🧩 [증분 백업] {chain.name}/{increment['file']}: {increment['pages']}페이지 ({increment['bytes']:,} bytes)")
+        return {"chain": chain.name, "increment": increment}
+
+def restore_backup_chain(output_path, at=None):
+    # at(KST 'YYYY-MM-DD HH:MM:SS') 이전의 마지막 복원 지점으로 DB를 output_path에 재구성합니다 (생략 시 최신).
+    chains = [c for c in list_backup_chains() if at is None or c.manifest["base"]["at"] <= at]
+    if not chains:
+        raise ValueError("해당 시점 이전의 백업 체인이 없습니다.")
+    chain = chains[-1]
+    increments = chain.restore_points(at)
+    page_size = chain.manifest["page_size"]
+    record_size = CHAIN_PAGE_RECORD.size + page_size
+    started = time.perf_counter()
+    tmp_path = output_path + ".tmp"
+    try:
+        with gzip.open(chain.file(chain.manifest["base"]["file"]), "rb") as src, open(tmp_path, "wb") as dest:
+            shutil.copyfileobj(src, dest, 1 << 20)
+        with open(tmp_path, "r+b") as db:
+            for inc in increments:
+                with gzip.open(chain.file(inc["file"]), "rb") as f:
+                    while True:
+                        record = f.read(record_size)
+                        if len(record) < record_size:
+                            break
+                        pgno, = CHAIN_PAGE_RECORD.unpack_from(record)
+                        db.seek((pgno - 1) * page_size)
+                        db.write(record[CHAIN_PAGE_RECORD.size:])
+                db.truncate(inc["page_count"] * page_size)
+        check = sqlite3.connect(tmp_path)
+        try:
+            integrity = check.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            check.close()
+        if integrity != "ok":
+            raise RuntimeError(f"복원본 무결성 검사 실패: {integrity}")
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path): os.remove(tmp_path)
+    return {
+        "chain": chain.name,
+        "restored_at": increments[-1]["at"] if increments else chain.manifest["base"]["at"],
+        "increments": len(increments),
+        "duration_ms": int((time.perf_counter() - started) * 1000),
+        "integrity": integrity,
+    }
 
+# ===== 백업 보관 정책 (단계별 보관 + 용량 한도) =====
+# 위치마다 시간/일/주 단위 구간별로 가장 최근 백업 하나씩만 남기고(restic/borg의 keep-hourly 방식),
+# 남은 백업의 전체 크기가 BACKUP_BUDGET_MB를 넘으면 위치별 최신본을 제외하고 오래된 것부터 지웁니다.
+# 내용이 같은 스냅샷은 생성 시 하드링크로 묶이므로 크기는 inode 기준으로 한 번만 셉니다.
+BACKUP_RETENTION = {
+    "snapshot": {"dir": SNAPSHOT_DIR, "match": lambda name: name.startswith("db_") and name.endswith(".sqlite.gz"),
+                 "tiers": {"hourly": 24, "daily": 7, "weekly": 4}},
+    "daily":    {"dir": DAILY_BACKUP_DIR, "match": lambda name: name.endswith((".db", ".db.gz")),
+                 "tiers": {"daily": 7, "weekly": 8}},
+    "chain":    {"dir": BACKUP_CHAIN_DIR, "match": lambda name: bool(CHAIN_DIR_PATTERN.match(name)),
+                 "tiers": {"count": BACKUP_CHAIN_KEEP}},
+}
+RETENTION_PERIODS = {
+    "hourly": lambda at: at.strftime("%Y%m%d%H"),
+    "daily":  lambda at: at.strftime("%Y%m%d"),
+    "weekly": lambda at: "%d-W%02d" % at.isocalendar()[:2],
+    "count":  lambda at: at,
+}
+BACKUP_NAME_TIMESTAMPS = [
+    (re.compile(r"(\d{8}_\d{6})"), "%Y%m%d_%H%M%S"),
+    (re.compile(r"(\d{4}-\d{2}-\d{2}_\d{2}-\d{2})"), "%Y-%m-%d_%H-%M"),   # 예전 backup_worker.py 이름
+]
+
+def backup_timestamp(name, mtime):
+    # 하드링크된 파일은 mtime을 공유하므로 파일명에 적힌 생성 시각을 우선합니다.
+    for pattern, fmt in BACKUP_NAME_TIMESTAMPS:
+        m = pattern.search(name)
+        if m:
+            return datetime.strptime(m.group(1), fmt)
+    return datetime.fromtimestamp(mtime, KST).replace(tzinfo=None)
+
+def list_backup_items(location):
+    # 최신순 목록. 체인은 디렉터리 하나를 한 항목으로 봅니다.
+    spec = BACKUP_RETENTION[location]
+    if not os.path.isdir(spec["dir"]):
+        return []
+    items = []
+    for name in os.listdir(spec["dir"]):
+        path = os.path.join(spec["dir"], name)
+        if not spec["match"](name):
+            continue
         try:
-            print(f"⏱ [백업] {next_run_kst.hour}시 정기 DB 백업 실행(KST) ...")
-            backup_db_to_github()
-        except Exception as e:
-            print(f"❌ [백업] {next_run_kst.hour}시 백업 중 오류:", e)
-        
-        time.sleep(1)
+            st = os.stat(path)
+            if stat.S_ISDIR(st.st_mode):
+                inodes = {}
+                for f in os.listdir(path):
+                    try:
+                        fst = os.stat(os.path.join(path, f))
+                    except FileNotFoundError:
+                        continue
+                    inodes[(fst.st_dev, fst.st_ino)] = fst.st_size
+            else:
+                inodes = {(st.st_dev, st.st_ino): st.st_size}
+        except FileNotFoundError:
+            # 나열과 stat 사이에 다른 정리 작업이 지운 항목은 건너뜁니다.
+            continue
+        items.append({"location": location, "name": name, "path": path,
+                      "at": backup_timestamp(name, st.st_mtime), "inodes": inodes})
+    items.sort(key=lambda item: item["at"], reverse=True)
+    return items
+
+def select_retained_backups(items, tiers):
+    # 각 단계마다 최근 N개 구간에서 구간별 가장 최신 백업을 남깁니다. 가장 최신 백업은 항상 남깁니다.
+    keep = {items[0]["path"]} if items else set()
+    for tier, count in tiers.items():
+        periods = set()
+        for item in items:
+            period = RETENTION_PERIODS[tier](item["at"])
+            if period in periods:
+                continue
+            if len(periods) >= count:
+                break
+            periods.add(period)
+            keep.add(item["path"])
+    return keep
+
+def inode_bytes(items):
+    inodes = {}
+    for item in items:
+        inodes.update(item["inodes"])
+    return sum(inodes.values())
+
+def apply_backup_retention(dry_run=False):
+    by_location = {location: list_backup_items(location) for location in BACKUP_RETENTION}
+    kept, removed = [], []
+    for location, items in by_location.items():
+        keep = select_retained_backups(items, BACKUP_RETENTION[location]["tiers"])
+        for item in items:
+            (kept if item["path"] in keep else removed).append(item)
+
+    budget = BACKUP_BUDGET_MB * 1024 * 1024
+    newest = {items[0]["path"] for items in by_location.values() if items}
+    for item in sorted(kept, key=lambda item: item["at"]):
+        if inode_bytes(kept) <= budget:
+            break
+        if item["path"] not in newest:
+            kept.remove(item)
+            removed.append(item)
+
+    for item in removed:
+        if dry_run:
+            continue
+        if os.path.isdir(item["path"]):
+            shutil.rmtree(item["path"], ignore_errors=True)
+        elif os.path.exists(item["path"]):
+            os.remove(item["path"])
+        print(f"🧹 [보관 정책] {item['location']} 백업 삭제: {item['name']}")
+
+    return {
+        "budget_bytes": budget,
+        "kept_bytes": inode_bytes(kept),
+        "freed_bytes": inode_bytes(kept + removed) - inode_bytes(kept),   # 남은 백업과 공유하는 하드링크는 제외
+        "locations": {
+            location: {"kept": [i["name"] for i in kept if i["location"] == location],
+                       "removed": [i["name"] for i in removed if i["location"] == location]}
+            for location in BACKUP_RETENTION
+        },
+    }
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def link_identical_backup(path):
+    # 위치별 최신 백업 중 내용이 같은 파일이 있으면 새 파일을 그 하드링크로 바꿔 디스크를 한 번만 씁니다.
+    size = os.path.getsize(path)
+    digest = None
+    for location in ("snapshot", "daily"):
+        for item in list_backup_items(location)[:2]:
+            existing = item["path"]
+            if existing == path or os.path.getsize(existing) != size or os.path.samefile(existing, path):
+                continue
+            digest = digest or file_sha256(path)
+            if file_sha256(existing) != digest:
+                continue
+            tmp = path + ".link"
+            try:
+                os.link(existing, tmp)
+            except OSError:
+                return False  # 다른 파일시스템 등 하드링크를 쓸 수 없는 경우 복사본 유지
+            os.replace(tmp, path)
+            print(f"🔗 [백업] {os.path.basename(path)} = {item['name']} (동일 내용, 하드링크)")
+            return True
+    return False
 
 # ============================================================================
 # 3. 식단표 매니페스트 관리 유틸
 # ============================================================================
-def load_menu_manifest():
+# 식단표 목록의 원본은 menu_board 테이블이며 position 오름차순이 화면 순서입니다.
+# 쓰기는 DB 쓰기 트랜잭션(프로세스 간 잠금) 안에서 하고, 기존 소비자를 위한 menu_board.json 사본도
+# 같은 트랜잭션 안에서 임시 파일 + rename으로 통째로 교체합니다.
+# 공개 목록 조회는 cache_versions의 "menu_board" 버전이 그대로면 메모리 캐시만 사용합니다.
+def read_menu_manifest_file():
+    # v6 마이그레이션에서 기존 JSON 목록을 테이블로 옮길 때 사용
     if not os.path.exists(MENU_MANIFEST_PATH):
         return []
     try:
@@ -165,14 +797,52 @@ def load_menu_manifest():
         return []
 
 def save_menu_manifest(items):
+    # 다 쓴 임시 파일을 rename하므로 읽는 쪽은 항상 온전한 이전본 또는 새 본만 봅니다.
+    tmp = f"{MENU_MANIFEST_PATH}.{os.getpid()}.{threading.get_ident()}.tmp"
     try:
-        with open(MENU_MANIFEST_PATH, "w", encoding="utf-8") as f:
+        with open(tmp, "w", encoding="utf-8") as f:
             json.dump(items, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, MENU_MANIFEST_PATH)
         return True
     except Exception as e:
         print("❌ menu manifest 저장 실패:", e)
+        if os.path.exists(tmp): os.remove(tmp)
         return False
 
+def fetch_menu_board(conn):
+    rows = conn.execute("SELECT id, title, filename FROM menu_board ORDER BY position").fetchall()
+    return [{"id": row["id"], "title": row["title"], "filename": row["filename"]} for row in rows]
+
+def commit_menu_board(conn):
+    # 호출 측 쓰기 트랜잭션 안에서 캐시 버전을 올리고 JSON 사본을 맞춘 뒤 커밋합니다.
+    # 사본 저장에 실패하면 커밋하지 않고 OSError를 올려, 호출 측이 롤백해 테이블과 사본이 어긋나지 않게 합니다.
+    bump_cache_version(conn, "menu_board")
+    if not save_menu_manifest(fetch_menu_board(conn)):
+        raise OSError("menu_board.json 사본 저장 실패")
+    conn.commit()
+
+def menu_item_payload(item):
+    return dict(item, image_url=f"/uploads/menu/{item['filename']}")
+
+_menu_board_cache = {"version": None, "items": None}
+_menu_board_cache_lock = threading.Lock()
+
+def get_menu_board_items():
+    version = get_cache_version("menu_board")
+    with _menu_board_cache_lock:
+        if _menu_board_cache["items"] is not None and _menu_board_cache["version"] == version:
+            return _menu_board_cache["items"]
+
+    conn = get_db_connection(readonly=True)
+    try:
+        items = [menu_item_payload(item) for item in fetch_menu_board(conn)]
+    finally:
+        conn.close()
+
+    with _menu_board_cache_lock:
+        _menu_board_cache.update(version=version, items=items)
+    return items
+
 def allowed_menu_file(filename):
     ext = os.path.splitext(filename)[1].lower()
     return ext in MENU_ALLOWED_EXT
@@ -184,10 +854,266 @@ app = Flask(__name__)
 app.secret_key = os.environ.get("SECRET_KEY", "snsys_meal_secret_fallback_key")
 CORS(app)
 
-def get_db_connection():
-     conn = sqlite3.connect("db.sqlite")
-     conn.row_factory = sqlite3.Row
-     return conn
+# ===== SQLite 커넥션 풀 =====
+# 스레드(워커)마다 유휴 커넥션을 보관해 두고 재사용합니다.
+# 기존 코드의 conn.close()는 실제로 닫지 않고 풀에 반납하는 동작으로 바뀝니다.
+class PooledConnection(sqlite3.Connection):
+    pool_key = None
+    in_pool = False
+    committed_changes = 0
+
+    def commit(self):
+        # 실제 변경이 있는 트랜잭션이면 같은 트랜잭션 안에서 전역 데이터 버전을 올립니다 (ETag 기준값).
+        if self.in_transaction and self.total_changes != self.committed_changes:
+            try:
+                self.execute("UPDATE cache_versions SET version = version + 1 WHERE name = 'data'")
+            except sqlite3.OperationalError:
+                pass  # 마이그레이션 초기 단계(cache_versions 생성 전)
+        super().commit()
+        self.committed_changes = self.total_changes
+
+    def rollback(self):
+        super().rollback()
+        self.committed_changes = self.total_changes
+
+    def close(self):
+        if self.in_pool:
+            return
+        if not release_db_connection(self):
+            super().close()
+
+_db_pool = threading.local()
+_db_wal_ready = set()
+_db_wal_lock = threading.Lock()
+
+def _db_pool_slots():
+    # fork 이후에는 부모 프로세스가 열어둔 커넥션을 물려받지 않도록 새 풀을 사용
+    pid = os.getpid()
+    if getattr(_db_pool, "pid", None) != pid:
+        _db_pool.pid = pid
+        _db_pool.slots = {}
+    return _db_pool.slots
+
+def _open_db_connection(path, readonly):
+    # 쓰기 커넥션은 첫 DML에서 BEGIN IMMEDIATE로 쓰기 락을 먼저 잡아 락 승격 충돌을 피합니다.
+    conn = sqlite3.connect(
+        path,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000,
+        factory=PooledConnection,
+        isolation_level="" if readonly else "IMMEDIATE",
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+    if path not in _db_wal_ready:
+        with _db_wal_lock:
+            try:
+                conn.execute("PRAGMA journal_mode = WAL")
+                _db_wal_ready.add(path)
+            except sqlite3.OperationalError as e:
+                print("⚠️ WAL 모드 전환 실패 (다음 연결에서 재시도):", e)
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA cache_size = -{DB_CACHE_SIZE_KB}")
+    conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    if readonly:
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+def get_db_connection(readonly=False):
+    key = (DATABASE, bool(readonly))
+    idle = _db_pool_slots().setdefault(key, [])
+    conn = idle.pop() if idle else _open_db_connection(DATABASE, readonly)
+    conn.pool_key = key
+    conn.in_pool = False
+    return conn
+
+def release_db_connection(conn):
+    key = conn.pool_key
+    if key is None or getattr(_db_pool, "pid", None) != os.getpid():
+        return False
+    try:
+        if conn.in_transaction:
+            conn.rollback()
+    except sqlite3.Error:
+        return False
+    idle = _db_pool_slots().setdefault(key, [])
+    if len(idle) >= DB_POOL_SIZE:
+        return False
+    conn.in_pool = True
+    idle.append(conn)
+    return True
+
+def checkpoint_db():
+    # WAL 내용을 본 파일에 반영 (파일 단위 복사/다운로드 직전에 호출)
+    conn = get_db_connection()
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    except sqlite3.Error as e:
+        print("⚠️ WAL 체크포인트 실패:", e)
+    finally:
+        conn.close()
+
+# ===== 프로세스 캐시 버전 감시 =====
+# 캐시 대상 데이터를 바꾸는 쓰기 경로는 같은 트랜잭션에서 bump_cache_version()을 호출합니다.
+# 각 워커는 전용 감시 커넥션의 PRAGMA data_version으로 다른 커넥션의 커밋 여부만 확인하고,
+# 커밋이 있었을 때만 cache_versions 테이블을 다시 읽습니다.
+CACHE_VERSIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS cache_versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )
+"""
+
+def bump_cache_version(conn, name):
+    conn.execute("""
+        INSERT INTO cache_versions (name, version) VALUES (?, 1)
+        ON CONFLICT(name) DO UPDATE SET version = version + 1
+    """, (name,))
+
+class DataVersionWatcher:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.conn = None
+        self.owner = None
+        self.data_version = None
+        self.versions = {}
+
+    def _connection(self):
+        owner = (os.getpid(), DATABASE)
+        if self.conn is None or self.owner != owner:
+            self.conn = sqlite3.connect(DATABASE, timeout=DB_BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+            self.conn.execute(CACHE_VERSIONS_DDL)
+            self.conn.commit()
+            self.owner = owner
+            self.data_version = None
+        return self.conn
+
+    def version(self, name):
+        with self.lock:
+            conn = self._connection()
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self.data_version:
+                self.versions = dict(conn.execute("SELECT name, version FROM cache_versions").fetchall())
+                self.data_version = data_version
+            return self.versions.get(name, 0)
+
+_data_watcher = DataVersionWatcher()
+
+def get_cache_version(name):
+    return _data_watcher.version(name)
+
+# ===== 조건부 GET (ETag) =====
+# 조회 API 응답에 (경로, 파라미터, 전역 데이터 버전) 기반의 강한 ETag를 붙이고,
+# 클라이언트가 같은 ETag로 다시 요청하면 조회 없이 304를 돌려줍니다.
+def make_data_etag(version):
+    params = "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+    raw = f"{request.path}?{params}#{version}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+def conditional_response(render):
+    # 라우트 안에서 직접 쓸 때: 앞쪽 처리(갱신 예약 등)는 항상 하고, 본문 조회만 ETag로 건너뜁니다.
+    etag = make_data_etag(get_cache_version("data"))
+    if request.if_none_match.contains(etag):
+        response = make_response("", 304)
+    else:
+        response = make_response(render())
+        if response.status_code != 200:
+            return response
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+def conditional_get(bypass=None):
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if bypass and bypass():
+                return view(*args, **kwargs)
+            return conditional_response(lambda: view(*args, **kwargs))
+        return wrapper
+    return decorator
+
+# ===== 스트리밍 내보내기 엔진 =====
+# 엑셀/CSV 다운로드는 커서에서 행을 조금씩 읽어 바로 기록합니다.
+# XLSX는 xlsxwriter constant_memory 모드로 임시 파일에 쓰고, CSV는 청크 단위로 바로 응답합니다.
+EXPORT_CHUNK_ROWS = 2000
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+def iter_query_rows(sql, params=()):
+    # 응답 스트리밍이 끝날 때까지 커넥션을 잡고 있다가 마지막에 반납합니다.
+    conn = get_db_connection(readonly=True)
+    try:
+        cursor = conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+            if not rows:
+                break
+            for row in rows:
+                yield tuple(row)
+    finally:
+        conn.close()
+
+def peek_rows(rows):
+    # 행이 하나도 없으면 None, 있으면 첫 행을 되돌려 붙인 이터레이터를 반환합니다.
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        return None
+    return itertools.chain([first], rows)
+
+def write_xlsx_export(target, sheets):
+    # sheets: [(시트 이름, 헤더 목록, 행 이터러블)] → 시트별 기록 행 수
+    workbook = xlsxwriter.Workbook(target, {"constant_memory": True, "tmpdir": JOB_RESULT_DIR})
+    counts = {}
+    try:
+        for sheet_name, headers, rows in sheets:
+            worksheet = workbook.add_worksheet(sheet_name)
+            worksheet.write_row(0, 0, headers)
+            count = 0
+            for count, row in enumerate(rows, start=1):
+                worksheet.write_row(count, 0, row)
+            counts[sheet_name] = count
+    finally:
+        workbook.close()
+    return counts
+
+def xlsx_export_response(sheets, download_name):
+    spool = tempfile.TemporaryFile(dir=JOB_RESULT_DIR)
+    try:
+        write_xlsx_export(spool, sheets)
+    except Exception:
+        spool.close()
+        raise
+    spool.seek(0)
+    return send_file(spool, as_attachment=True, download_name=download_name, mimetype=XLSX_MIMETYPE)
+
+def csv_export_response(sheets, download_name):
+    # 시트가 여러 개면 첫 열에 시트 이름을 붙여 하나의 CSV로 이어 씁니다.
+    multi = len(sheets) > 1
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        buffer.write("\ufeff")  # 엑셀에서 한글이 깨지지 않도록 BOM
+        for index, (sheet_name, headers, rows) in enumerate(sheets):
+            if index == 0:
+                writer.writerow((["시트"] if multi else []) + list(headers))
+            for count, row in enumerate(rows, start=1):
+                writer.writerow(((sheet_name,) if multi else ()) + tuple(row))
+                if count % EXPORT_CHUNK_ROWS == 0:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+        yield buffer.getvalue()
+
+    return Response(stream_with_context(generate()), mimetype="text/csv; charset=utf-8",
+                    headers={"Content-Disposition": f'attachment; filename="{download_name}"'})
+
+def export_response(sheets, download_name):
+    # ?format=csv 이면 CSV 스트리밍, 기본은 XLSX
+    if request.args.get("format") == "csv":
+        return csv_export_response(sheets, os.path.splitext(download_name)[0] + ".csv")
+    return xlsx_export_response(sheets, download_name)
 
 def init_db_deadline_extensions(cursor):
     cursor.execute("""
@@ -206,11 +1132,11 @@ def init_db_deadline_extensions(cursor):
     for key, val in default_settings:
         cursor.execute("INSERT OR IGNORE INTO deadline_settings (key, value) VALUES (?, ?)", (key, val))
 
-def init_db():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    conn.execute("""
+# ===== 스키마 마이그레이션 =====
+# (버전, 설명, 적용 함수) 순서대로 한 번씩만 적용하고 schema_version에 기록합니다.
+# 새 스키마 변경은 기존 단계를 고치지 말고 목록 끝에 새 단계를 추가합니다.
+def migrate_base_tables(cursor):
+    cursor.execute("""
         CREATE TABLE IF NOT EXISTS holidays (
             id INTEGER PRIMARY KEY AUTOINCREMENT,  
             date TEXT NOT NULL UNIQUE,             
@@ -218,7 +1144,7 @@ def init_db():
         )
     """)
 
-    conn.execute("""
+    cursor.execute("""
         CREATE TABLE IF NOT EXISTS meals (
             id INTEGER PRIMARY KEY AUTOINCREMENT,  
             user_id TEXT NOT NULL,                 
@@ -245,7 +1171,7 @@ def init_db():
         )
     """)
 
-    conn.execute("""
+    cursor.execute("""
         CREATE TABLE IF NOT EXISTS meal_logs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             emp_id TEXT NOT NULL,
@@ -303,8 +1229,156 @@ def init_db():
 
     init_db_deadline_extensions(cursor)
 
-    conn.commit()
-    conn.close()
+def migrate_aux_tables(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS public_holidays (
+            date TEXT PRIMARY KEY,
+            description TEXT,
+            source TEXT
+        )
+    """)
+    cursor.execute("CREATE TABLE IF NOT EXISTS public_holiday_meta (year INTEGER PRIMARY KEY, last_checked TEXT)")
+    cursor.execute(CACHE_VERSIONS_DDL)
+
+def migrate_hot_query_indexes(cursor):
+    # 기간(BETWEEN) 통계 조회와 관리자 화면 정렬에 쓰이는 보조 인덱스
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_meals_date ON meals(date, user_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_meal_logs_date ON meal_logs(date, emp_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_visitors_date ON visitors(date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_visitor_logs_date ON visitor_logs(date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_selfcheck_date ON selfcheck(date, user_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_employees_type_dept_name ON employees(type, dept, name)")
+
+# ===== 식수 집계(rollup) 테이블 =====
+# meals/visitors 변경 시 트리거가 일·주·월 단위 합계를 즉시 갱신합니다.
+# 주 단위 키는 해당 주 월요일, 월 단위 키는 'YYYY-MM' 입니다.
+MEAL_ROLLUP_TABLES = {
+    "meal_counts_daily": "{d}",
+    "meal_counts_weekly": "date({d}, '-6 days', 'weekday 1')",
+    "meal_counts_monthly": "substr({d}, 1, 7)",
+}
+MEAL_ROLLUP_SOURCES = ("meals", "visitors")
+
+def _rollup_add_sql(table, key_expr, ref, sign):
+    d = f"{ref}.date"
+    b, l, dn = (f"IFNULL({ref}.{m}, 0)" for m in MEAL_TYPES)
+    key = key_expr.format(d=d)
+    if sign > 0:
+        return f"""
+            INSERT INTO {table} (period, breakfast, lunch, dinner, row_count)
+            VALUES ({key}, {b}, {l}, {dn}, 1)
+            ON CONFLICT(period) DO UPDATE SET
+                breakfast = breakfast + excluded.breakfast,
+                lunch     = lunch + excluded.lunch,
+                dinner    = dinner + excluded.dinner,
+                row_count = row_count + 1;"""
+    return f"""
+            UPDATE {table} SET
+                breakfast = breakfast - {b},
+                lunch     = lunch - {l},
+                dinner    = dinner - {dn},
+                row_count = row_count - 1
+            WHERE period = {key};"""
+
+def migrate_meal_rollups(cursor):
+    for table in MEAL_ROLLUP_TABLES:
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                period TEXT PRIMARY KEY,
+                breakfast INTEGER NOT NULL DEFAULT 0,
+                lunch INTEGER NOT NULL DEFAULT 0,
+                dinner INTEGER NOT NULL DEFAULT 0,
+                row_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+    for source in MEAL_ROLLUP_SOURCES:
+        inserts = "".join(_rollup_add_sql(t, k, "NEW", 1) for t, k in MEAL_ROLLUP_TABLES.items())
+        deletes = "".join(_rollup_add_sql(t, k, "OLD", -1) for t, k in MEAL_ROLLUP_TABLES.items())
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{source}_rollup_insert AFTER INSERT ON {source} BEGIN {inserts} END")
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{source}_rollup_delete AFTER DELETE ON {source} BEGIN {deletes} END")
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{source}_rollup_update
+            AFTER UPDATE OF date, breakfast, lunch, dinner ON {source}
+            BEGIN {deletes} {inserts} END
+        """)
+    rebuild_meal_rollups(cursor)
+
+def rebuild_meal_rollups(cursor):
+    # 원본 테이블 전체를 다시 집계해 rollup 테이블을 채웁니다 (백필/정합성 복구용).
+    for table, key_expr in MEAL_ROLLUP_TABLES.items():
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.execute(f"""
+            INSERT INTO {table} (period, breakfast, lunch, dinner, row_count)
+            SELECT {key_expr.format(d="date")} AS period,
+                   SUM(IFNULL(breakfast, 0)), SUM(IFNULL(lunch, 0)), SUM(IFNULL(dinner, 0)), COUNT(*)
+            FROM (SELECT date, breakfast, lunch, dinner FROM meals
+                  UNION ALL SELECT date, breakfast, lunch, dinner FROM visitors)
+            GROUP BY period
+        """)
+
+def migrate_data_version(cursor):
+    cursor.execute("INSERT OR IGNORE INTO cache_versions (name, version) VALUES ('data', 0)")
+
+def migrate_menu_board_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS menu_board (
+            id TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            created_at TEXT
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_menu_board_position ON menu_board(position)")
+    # 기존 menu_board.json 목록을 같은 순서로 옮깁니다.
+    items = [item for item in read_menu_manifest_file() if item.get("id") and item.get("filename")]
+    cursor.executemany("INSERT OR IGNORE INTO menu_board (id, title, filename, position, created_at) VALUES (?, ?, ?, ?, ?)",
+                       [(item["id"], item.get("title", ""), item["filename"], position, now_kst_str())
+                        for position, item in enumerate(items)])
+
+SCHEMA_MIGRATIONS = [
+    (1, "기본 테이블 생성", migrate_base_tables),
+    (2, "공휴일/캐시 버전 테이블 생성", migrate_aux_tables),
+    (3, "조회용 보조 인덱스 추가", migrate_hot_query_indexes),
+    (4, "일/주/월 식수 집계 테이블 및 트리거", migrate_meal_rollups),
+    (5, "전역 데이터 버전 카운터", migrate_data_version),
+    (6, "식단표 목록 테이블", migrate_menu_board_table),
+]
+
+def run_migrations():
+    conn = get_db_connection()
+    try:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT,
+                applied_at TEXT
+            )
+        """)
+        applied = {row[0] for row in conn.execute("SELECT version FROM schema_version")}
+        for version, description, step in SCHEMA_MIGRATIONS:
+            if version in applied:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            # 여러 워커가 동시에 기동될 수 있으므로 쓰기 락을 잡은 뒤 다시 확인
+            if conn.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,)).fetchone():
+                conn.commit()
+                continue
+            step(conn.cursor())
+            conn.execute("INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                         (version, description, now_kst_str()))
+            conn.commit()
+            print(f"🛠 [마이그레이션] v{version} 적용 완료: {description}")
+        conn.execute("PRAGMA optimize")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def init_db():
+    run_migrations()
+
 
 # ============================================================================
 # 5. 실시간 보정용 서버 시각 엔드포인트 API
@@ -322,7 +1396,7 @@ def get_server_time():
 @app.route("/admin/api/deadlines", methods=["GET"])
 def get_deadlines():
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(readonly=True)
         cursor = conn.cursor()
         cursor.execute("SELECT key, value FROM deadline_settings")
         rows = cursor.fetchall()
@@ -340,12 +1414,10 @@ def save_deadlines():
         print("🚨 [보안 위반 감시] 사번 정보가 누락된 익명의 마감 변경 시도가 차단되었습니다.")
         return jsonify({"error": "인증 정보가 올바르지 않습니다."}), 401
 
+    user = get_employee_directory().get(requester_id)
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
-        cursor.execute("SELECT level, name, dept FROM employees WHERE id = ?", (requester_id,))
-        user = cursor.fetchone()
-        
         if not user or int(user["level"]) != 3:
             u_name = user["name"] if user else "알수없음"
             u_dept = user["dept"] if user else "알수없음"
@@ -358,7 +1430,9 @@ def save_deadlines():
                 INSERT INTO deadline_settings (key, value) VALUES (?, ?)
                 ON CONFLICT(key) DO UPDATE SET value = excluded.value
             """, (key, str(value)))
+        bump_cache_version(conn, "deadline_settings")
         conn.commit()
+        invalidate_deadline_rules()
         print(f"✅ [설정 변경 기록] 최고 관리자 {user['name']}({user['dept']})님이 마감 제어 규칙을 수정했습니다.")
         return jsonify({"message": "금주 및 차주 마감 제어 규칙이 시스템에 안전하게 반영되었습니다."}), 200
     except Exception as e:
@@ -366,38 +1440,80 @@ def save_deadlines():
     finally:
         conn.close()
 
-def is_meal_expired_db(meal_type, date_str):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT key, value FROM deadline_settings")
-    settings = {row["key"]: row["value"] for row in cursor.fetchall()}
-    conn.close()
-    
-    if not settings:
-        return True 
-        
-    m_type = meal_type.strip()
-    if m_type in ("조식", "breakfast"):
-        prefix = "breakfast"
-    elif m_type in ("중식", "lunch", "점심"):
-        prefix = "lunch"
-    elif m_type in ("석식", "dinner", "저녁"):
-        prefix = "dinner"
-    else:
-        return True
-
-    days_before = int(settings.get(f"{prefix}_days_before", 0))
-    time_str = settings.get(f"{prefix}_time", "00:00")
-    
-    try:
-        hour, minute = map(int, time_str.split(":"))
+# ===== 마감 규칙 캐시 =====
+# deadline_settings를 한 번 컴파일해 프로세스 메모리에 보관하고,
+# cache_versions의 "deadline_settings" 버전이 바뀐 경우에만 다시 읽습니다.
+MEAL_TYPE_PREFIX = {
+    "조식": "breakfast", "breakfast": "breakfast",
+    "중식": "lunch", "lunch": "lunch", "점심": "lunch",
+    "석식": "dinner", "dinner": "dinner", "저녁": "dinner",
+}
+
+class DeadlineRules:
+    def __init__(self, settings):
+        self.empty = not settings
+        self.rules = {}
+        for prefix in ("breakfast", "lunch", "dinner"):
+            try:
+                days_before = int(settings.get(f"{prefix}_days_before", 0))
+                hour, minute = map(int, settings.get(f"{prefix}_time", "00:00").split(":"))
+                self.rules[prefix] = (days_before, hour, minute)
+            except (TypeError, ValueError) as e:
+                print(f"❌ 마감 규칙 파싱 에러 ({prefix}):", e)
+
+    def deadline(self, meal_type, date_str):
+        prefix = MEAL_TYPE_PREFIX.get(meal_type.strip())
+        if self.empty or prefix not in self.rules:
+            return None
+        days_before, hour, minute = self.rules[prefix]
         meal_date = datetime.strptime(date_str, "%Y-%m-%d")
         deadline = meal_date - timedelta(days=days_before)
-        deadline = deadline.replace(hour=hour, minute=minute, second=0, microsecond=0, tzinfo=KST)
-        return datetime.now(KST) > deadline 
-    except Exception as e:
-        print(f"❌ 마감 계산 파싱 에러 ({meal_type}, {date_str}):", e)
-        return True    
+        return deadline.replace(hour=hour, minute=minute, second=0, microsecond=0, tzinfo=KST)
+
+    def is_expired(self, meal_type, date_str, now=None):
+        try:
+            deadline = self.deadline(meal_type, date_str)
+        except Exception as e:
+            print(f"❌ 마감 계산 파싱 에러 ({meal_type}, {date_str}):", e)
+            return True
+        if deadline is None:
+            return True
+        return (now or datetime.now(KST)) > deadline
+
+    def expired_map(self, pairs, now=None):
+        now = now or datetime.now(KST)
+        return {(meal_type, date_str): self.is_expired(meal_type, date_str, now) for meal_type, date_str in pairs}
+
+_deadline_cache = {"version": None, "rules": None}
+_deadline_cache_lock = threading.Lock()
+
+def get_deadline_rules():
+    version = get_cache_version("deadline_settings")
+    with _deadline_cache_lock:
+        if _deadline_cache["rules"] is not None and _deadline_cache["version"] == version:
+            return _deadline_cache["rules"]
+
+    conn = get_db_connection(readonly=True)
+    try:
+        rows = conn.execute("SELECT key, value FROM deadline_settings").fetchall()
+    finally:
+        conn.close()
+    rules = DeadlineRules({row["key"]: row["value"] for row in rows})
+
+    with _deadline_cache_lock:
+        _deadline_cache.update(version=version, rules=rules)
+    return rules
+
+def invalidate_deadline_rules():
+    with _deadline_cache_lock:
+        _deadline_cache.update(version=None, rules=None)
+
+def is_meal_expired_db(meal_type, date_str):
+    return get_deadline_rules().is_expired(meal_type, date_str)
+
+def is_meal_expired_bulk(pairs):
+    # [(meal_type, date_str), ...] → {(meal_type, date_str): bool}, DB 조회 없이 일괄 판정
+    return get_deadline_rules().expired_map(pairs)
 
 def is_expired(meal_type, date_str):
     return is_meal_expired_db(meal_type, date_str)
@@ -412,14 +1528,32 @@ def is_this_week(date_str):
     except:
         return False
 
+@app.route("/api/deadlines/expired", methods=["GET"])
+def get_expired_status():
+    start, end = request.args.get("start"), request.args.get("end")
+    if not start or not end:
+        return jsonify({"error": "start, end는 필수입니다."}), 400
+    try:
+        start_d = datetime.strptime(start, "%Y-%m-%d").date()
+        end_d = datetime.strptime(end, "%Y-%m-%d").date()
+    except ValueError:
+        return jsonify({"error": "날짜 형식이 올바르지 않습니다."}), 400
+    if (end_d - start_d).days > MAX_RANGE_DAYS:
+        return jsonify({"error": f"조회 기간은 최대 {MAX_RANGE_DAYS}일입니다."}), 400
+
+    dates = [(start_d + timedelta(days=i)).strftime("%Y-%m-%d") for i in range((end_d - start_d).days + 1)]
+    meal_types = ["breakfast", "lunch", "dinner"]
+    expired = is_meal_expired_bulk([(m, d) for d in dates for m in meal_types])
+    return jsonify({d: {m: expired[(m, d)] for m in meal_types} for d in dates}), 200
+
 # ============================================================================
 # 7. 식단표 게시판 & DB 백업 유틸 API 엔드포인트
 # ============================================================================
 @app.route('/admin/db/download', methods=['GET'])
 def download_database():
-    db_path = os.path.join(os.getcwd(), 'db.sqlite')
-    if os.path.exists(db_path):
-        return send_file(db_path, as_attachment=True)
+    if os.path.exists(DATABASE):
+        checkpoint_db()
+        return send_file(DATABASE, as_attachment=True)
     else:
         return "DB 파일이 존재하지 않습니다.", 404
 
@@ -428,17 +1562,9 @@ def serve_menu_upload(filename):
     return send_from_directory(MENU_UPLOAD_DIR, filename)
 
 @app.route("/api/menu-board", methods=["GET"])
+@conditional_get()
 def get_menu_board():
-    items = load_menu_manifest()
-    result = []
-    for item in items:
-        result.append({
-            "id": item.get("id"),
-            "title": item.get("title", ""),
-            "filename": item.get("filename", ""),
-            "image_url": f"/uploads/menu/{item.get('filename', '')}"
-        })
-    return jsonify(result), 200
+    return jsonify(get_menu_board_items()), 200
 
 @app.route("/api/menu-board/upload", methods=["POST"])
 def upload_menu_board():
@@ -466,18 +1592,27 @@ def upload_menu_board():
         save_path = os.path.join(MENU_UPLOAD_DIR, saved_name)
         file.save(save_path)
 
-        items = load_menu_manifest()
         new_item = {
             "id": item_id,
             "title": title if title else file.filename,
             "filename": saved_name
         }
-        items.insert(0, new_item)
-
-        if not save_menu_manifest(items):
+        # 새 항목은 맨 앞 (position을 현재 최솟값보다 하나 작게, 같은 문장 안에서 계산)
+        conn = get_db_connection()
+        try:
+            conn.execute("""
+                INSERT INTO menu_board (id, title, filename, position, created_at)
+                VALUES (?, ?, ?, (SELECT COALESCE(MIN(position), 0) - 1 FROM menu_board), ?)
+            """, (new_item["id"], new_item["title"], new_item["filename"], now_kst_str()))
+            commit_menu_board(conn)
+        except (sqlite3.Error, OSError) as e:
+            conn.rollback()
+            print("❌ 식단표 목록 저장 실패:", e)
             if os.path.exists(save_path):
                 os.remove(save_path)
             return jsonify({"error": "목록 저장 실패"}), 500
+        finally:
+            conn.close()
 
         return jsonify({
             "message": "업로드 완료",
@@ -500,27 +1635,29 @@ def delete_menu_board():
         if not isinstance(ids, list) or not ids:
             return jsonify({"error": "삭제할 항목이 없습니다."}), 400
 
-        items = load_menu_manifest()
-        remain = []
-        deleted_count = 0
-
-        for item in items:
-            if item.get("id") in ids:
-                filename = item.get("filename")
-                if filename:
-                    file_path = os.path.join(MENU_UPLOAD_DIR, filename)
-                    if os.path.exists(file_path):
-                        try:
-                            os.remove(file_path)
-                        except Exception as e:
-                            print("❌ 이미지 파일 삭제 실패:", e)
-                deleted_count += 1
-            else:
-                remain.append(item)
-
-        if not save_menu_manifest(remain):
+        placeholders = ",".join("?" * len(ids))
+        conn = get_db_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(f"SELECT filename FROM menu_board WHERE id IN ({placeholders})", ids).fetchall()
+            conn.execute(f"DELETE FROM menu_board WHERE id IN ({placeholders})", ids)
+            commit_menu_board(conn)
+        except (sqlite3.Error, OSError) as e:
+            conn.rollback()
+            print("❌ 식단표 목록 저장 실패:", e)
             return jsonify({"error": "삭제 후 목록 저장 실패"}), 500
-        return jsonify({"message": f"{deleted_count}건 삭제 완료"}), 200
+        finally:
+            conn.close()
+
+        # 목록에서 빠진 뒤에 이미지 파일을 지웁니다.
+        for row in rows:
+            file_path = os.path.join(MENU_UPLOAD_DIR, row["filename"])
+            if os.path.exists(file_path):
+                try:
+                    os.remove(file_path)
+                except Exception as e:
+                    print("❌ 이미지 파일 삭제 실패:", e)
+        return jsonify({"message": f"{len(rows)}건 삭제 완료"}), 200
     except Exception as e:
         print("❌ 식단표 삭제 실패:", e)
         return jsonify({"error": "삭제 실패"}), 500
@@ -535,110 +1672,220 @@ class SSLAdapter(HTTPAdapter):
         kwargs['ssl_context'] = ctx
         return super().init_poolmanager(*args, **kwargs)
 
+def public_holiday_service_key():
+    return os.environ.get(
+        "PUBLIC_HOLIDAY_SERVICE_KEY",
+        "f80f73afedb3a5bd607ad7cb5a9a65bfa7975f6fd3f47d3ac0a7cadfa9e80273"  
+    ).strip()
+
+def parse_public_holiday_items(response):
+    text = response.text.lstrip()
+    if text.startswith("{"):
+        data = response.json()
+    else:
+        data = xmltodict.parse(response.text)
+    items = (data.get("response") or {}).get("body", {}).get("items") or {}
+    items = items.get("item", []) if isinstance(items, dict) else []
+    if isinstance(items, dict):
+        items = [items]
+
+    holidays = []
+    for item in items:
+        locdate = item.get("locdate")
+        desc = item.get("dateName")
+        if locdate and desc:
+            locdate_str = str(locdate)  
+            holidays.append((f"{locdate_str[:4]}-{locdate_str[4:6]}-{locdate_str[6:8]}", desc))
+    return holidays
+
+def fetch_public_holiday_month(http, year, month):
+    params = {
+        "serviceKey": public_holiday_service_key(),
+        "solYear": str(year),
+        "solMonth": f"{month:02d}",
+        "numOfRows": "100",
+        "pageNo": "1",
+        "_type": "json",
+    }
+    for attempt in range(PUBLIC_HOLIDAY_RETRIES):
+        try:
+            response = http.get(PUBLIC_HOLIDAY_API_URL, params=params, timeout=PUBLIC_HOLIDAY_TIMEOUT)
+            # 4xx(429 제외)는 다시 요청해도 같은 결과이므로 바로 실패 처리합니다.
+            if 400 <= response.status_code < 500 and response.status_code != 429:
+                raise ValueError(f"HTTP {response.status_code}")
+            if response.status_code != 200:
+                # 서비스 키가 담긴 URL이 로그에 남지 않도록 상태 코드만 기록합니다.
+                raise requests.HTTPError(f"HTTP {response.status_code}")
+            return parse_public_holiday_items(response)
+        except ValueError:
+            raise
+        except Exception as e:
+            if attempt == PUBLIC_HOLIDAY_RETRIES - 1:
+                raise
+            print(f"⚠️ {year}년 {month}월 공휴일 호출 재시도 ({attempt + 1}): {e}")
+            time.sleep(0.5 * 2 ** attempt)
+
+def fetch_public_holiday_year(year):
+    # 12개월을 동시에 호출합니다. 반환: (공휴일 목록, 실패한 월 목록)
+    http = requests.Session()
+    http.mount("https://", SSLAdapter(pool_maxsize=PUBLIC_HOLIDAY_FETCH_WORKERS))
+    http.mount("http://", HTTPAdapter(pool_maxsize=PUBLIC_HOLIDAY_FETCH_WORKERS))
+    holidays, failed = [], []
+    try:
+        with ThreadPoolExecutor(max_workers=PUBLIC_HOLIDAY_FETCH_WORKERS) as pool:
+            futures = {month: pool.submit(fetch_public_holiday_month, http, year, month) for month in range(1, 13)}
+            for month, future in futures.items():
+                try:
+                    holidays.extend(future.result())
+                except Exception as e:
+                    failed.append(month)
+                    print(f"❌ {month}월 공공 공휴일 호출 실패: {e}")
+    finally:
+        http.close()
+    return holidays, failed
+
+def store_public_holidays(year, holidays, replace=False, complete=True):
+    # 공휴일 행과 확인 시각을 한 트랜잭션으로 기록합니다. 일부 월이 실패하면 다음 요청 때 다시 수집합니다.
+    conn = get_db_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        if replace and complete:
+            conn.execute("DELETE FROM public_holidays WHERE date BETWEEN ? AND ?", (f"{year}-01-01", f"{year}-12-31"))
+        conn.executemany("INSERT OR IGNORE INTO public_holidays (date, description, source) VALUES (?, ?, 'api')", holidays)
+        bump_cache_version(conn, "holidays")
+        if complete:
+            conn.execute("""
+                INSERT INTO public_holiday_meta (year, last_checked)
+                VALUES (?, ?)
+                ON CONFLICT(year) DO UPDATE SET last_checked = excluded.last_checked
+            """, (year, datetime.now().isoformat()))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+# ===== 공휴일 백그라운드 갱신 =====
+# 오래된 연도는 백그라운드 스레드가 다시 수집하고, 요청은 그동안 기존(stale) 데이터로 바로 응답합니다.
+# 같은 연도의 갱신은 프로세스 안에서 한 번만 실행되며, 확인 시각은 메모리에 보관해 매 요청마다 DB를 읽지 않습니다.
+class PublicHolidayRefresher:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = {}          # year -> 완료 Event
+        self.forced = set()        # 교체(replace) 모드로 돌고 있거나 돌 예정인 연도
+        self.pending_force = set() # 병합 갱신 도중 force 요청이 들어와 한 번 더 돌아야 하는 연도
+        self.last_checked = {}     # year -> datetime
+
+    def _load_last_checked(self, year):
+        conn = get_db_connection(readonly=True)
+        try:
+            row = conn.execute("SELECT last_checked FROM public_holiday_meta WHERE year = ?", (year,)).fetchone()
+        finally:
+            conn.close()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def is_stale(self, year):
+        checked = self.last_checked.get(year)
+        if checked is None or (datetime.now() - checked).days >= PUBLIC_HOLIDAY_REFRESH_DAYS:
+            # 다른 워커가 이미 갱신했을 수 있으므로 오래된 경우에만 DB를 확인합니다.
+            checked = self._load_last_checked(year)
+            if checked is not None:
+                self.last_checked[year] = checked
+        return checked is None or (datetime.now() - checked).days >= PUBLIC_HOLIDAY_REFRESH_DAYS
+
+    def is_running(self, year):
+        with self.lock:
+            return year in self.running
+
+    def refresh(self, year, force=False):
+        with self.lock:
+            done = self.running.get(year)
+            if done is None:
+                done = self.running[year] = threading.Event()
+                if force:
+                    self.forced.add(year)
+                threading.Thread(target=self._run, args=(year, done), daemon=True).start()
+            elif force and year not in self.forced:
+                # 진행 중인 병합 갱신이 끝나면 같은 스레드가 교체 모드로 한 번 더 돌고, 그때 done이 set됩니다.
+                self.forced.add(year)
+                self.pending_force.add(year)
+            return done
+
+    def _run(self, year, done):
+        try:
+            while True:
+                with self.lock:
+                    self.pending_force.discard(year)
+                    force = year in self.forced
+                try:
+                    started = time.perf_counter()
+                    holidays, failed = fetch_public_holiday_year(year)
+                    store_public_holidays(year, holidays, replace=force, complete=not failed)
+                    if not failed:
+                        self.last_checked[year] = datetime.now()
+                    print(f"📅 [공휴일] {year}년 {len(holidays)}건 갱신 ({time.perf_counter() - started:.1f}초, 실패 월: {failed or '없음'})")
+                except Exception as e:
+                    print(f"❌ [공휴일] {year}년 갱신 실패: {e}")
+                with self.lock:
+                    if year in self.pending_force:
+                        continue
+                    self.running.pop(year, None)
+                    self.forced.discard(year)
+                    break
+        finally:
+            done.set()
+
+public_holiday_refresher = PublicHolidayRefresher()
+
 def should_refresh_public_holidays(year):
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("CREATE TABLE IF NOT EXISTS public_holiday_meta (year INTEGER PRIMARY KEY, last_checked TEXT)")
-    cur.execute("SELECT last_checked FROM public_holiday_meta WHERE year = ?", (year,))
-    row = cur.fetchone()
-    conn.close()
-    if not row:
-        return True
-    last_checked = datetime.fromisoformat(row[0])
-    return (datetime.now() - last_checked).days >= 7
-
-def update_last_checked(year):
-    now_str = datetime.now().isoformat()
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
-        INSERT INTO public_holiday_meta (year, last_checked)
-        VALUES (?, ?)
-        ON CONFLICT(year) DO UPDATE SET last_checked = excluded.last_checked
-    """, (year, now_str))
-    conn.commit()
-    conn.close()
+    return public_holiday_refresher.is_stale(year)
+
+def has_public_holidays(year):
+    conn = get_db_connection(readonly=True)
+    try:
+        return conn.execute("SELECT 1 FROM public_holidays WHERE date BETWEEN ? AND ? LIMIT 1", (f"{year}-01-01", f"{year}-12-31")).fetchone() is not None
+    finally:
+        conn.close()
+
+def public_holidays_response(year):
+    conn = get_db_connection(readonly=True)
+    try:
+        rows = conn.execute("SELECT date, description, source FROM public_holidays WHERE date >= ? AND date < ?", year_bounds(year)).fetchall()
+    finally:
+        conn.close()
+    return jsonify([{"date": row[0], "description": row[1], "source": row[2]} for row in rows])
 
 @app.route("/api/public-holidays")
 def get_public_holidays():
     year = request.args.get("year", default=datetime.now().year, type=int)
     force = request.args.get("force", "0") == "1"
 
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS public_holidays (
-            date TEXT PRIMARY KEY,
-            description TEXT,
-            source TEXT
-        )
-    """)
-    conn.commit()
-
     if force or should_refresh_public_holidays(year):
-        if force:
-            cur.execute("DELETE FROM public_holidays WHERE substr(date, 1, 4) = ?", (str(year),))
-            cur.execute("DELETE FROM public_holiday_meta WHERE year = ?", (year,))
-            conn.commit()
-
-        session = requests.Session()
-        session.mount("https://", SSLAdapter())
-
-        for month in range(1, 13):
-            url = "https://apis.data.go.kr/B090041/openapi/service/SpcdeInfoService/getRestDeInfo"
-            service_key = os.environ.get(
-                "PUBLIC_HOLIDAY_SERVICE_KEY",
-                "f80f73afedb3a5bd607ad7cb5a9a65bfa7975f6fd3f47d3ac0a7cadfa9e80273"  
-            ).strip()
-
-            params = {
-                "serviceKey": service_key,
-                "solYear": str(year),
-                "solMonth": f"{month:02d}",
-                "numOfRows": "100",
-                "pageNo": "1",
-                "_type": "json",
-            }
-            try:
-                response = session.get(url, params=params, timeout=10)
-                if response.status_code != 200:
-                    continue
-                text = response.text.lstrip()
-                if text.startswith("{"):
-                    data = response.json()
-                    items = data.get("response", {}).get("body", {}).get("items", {}).get("item", [])
-                else:
-                    data = xmltodict.parse(response.text)
-                    items = data.get("response", {}).get("body", {}).get("items", {}).get("item", [])
-
-                if isinstance(items, dict):
-                    items = [items]
-
-                for item in items:
-                    locdate = item.get("locdate")
-                    desc = item.get("dateName")
-                    if locdate and desc:
-                        locdate_str = str(locdate)  
-                        formatted = f"{locdate_str[:4]}-{locdate_str[4:6]}-{locdate_str[6:8]}"
-                        cur.execute(
-                            "INSERT OR IGNORE INTO public_holidays (date, description, source) VALUES (?, ?, ?)",
-                            (formatted, desc, "api")
-                        )
-            except Exception as e:
-                print(f"❌ {month}월 공공 공휴일 호출 실패: {e}")
-        conn.commit()
-        update_last_checked(year)
-
-    cur.execute("SELECT date, description, source FROM public_holidays WHERE substr(date, 1, 4) = ?", (str(year),))
-    holidays = [{"date": row[0], "description": row[1], "source": row[2]} for row in cur.fetchall()]
-    conn.close()
-    return jsonify(holidays)
+        done = public_holiday_refresher.refresh(year, force=force)
+        # 강제 갱신이거나 해당 연도 데이터가 아예 없을 때만 잠시 기다리고, 그 외에는 기존 데이터로 바로 응답합니다.
+        if force or (public_holiday_refresher.last_checked.get(year) is None and not has_public_holidays(year)):
+            done.wait(PUBLIC_HOLIDAY_WAIT_SECONDS)
+
+    # 12월에는 다음 해 공휴일을 미리 수집해 둡니다.
+    today = datetime.now()
+    if today.month == 12 and year == today.year and should_refresh_public_holidays(year + 1):
+        public_holiday_refresher.refresh(year + 1)
+
+    # 304여도 위의 갱신 예약은 이미 끝난 상태라 오래된 연도 확인이 빠지지 않습니다.
+    response = conditional_response(lambda: public_holidays_response(year))
+    if public_holiday_refresher.is_running(year):
+        response.headers["X-Holidays-Refreshing"] = "1"
+    return response
 
 @app.route("/holidays", methods=["GET"])
+@conditional_get()
 def get_holidays():
-    year = request.args.get("year")  
-    conn = get_db_connection()
-    cursor = conn.execute("SELECT * FROM holidays WHERE strftime('%Y', date) = ?", (year,))
+    year = request.args.get("year", type=int)
+    if year is None:
+        return jsonify([])
+    conn = get_db_connection(readonly=True)
+    cursor = conn.execute("SELECT * FROM holidays WHERE date >= ? AND date < ?", year_bounds(year))
     holidays = cursor.fetchall()
     conn.close()
     return jsonify([dict(h) for h in holidays])
@@ -655,7 +1902,9 @@ def add_holiday():
     conn = get_db_connection()
     try:
         conn.execute("INSERT INTO holidays (date, description) VALUES (?, ?)", (date, desc))
+        bump_cache_version(conn, "holidays")
         conn.commit()
+        invalidate_holiday_calendar()
     except sqlite3.IntegrityError:
         return jsonify({"error": "이미 등록된 날짜입니다."}), 409
     finally:
@@ -670,13 +1919,138 @@ def delete_holiday():
 
     conn = get_db_connection()
     conn.execute("DELETE FROM holidays WHERE date = ?", (date,))
+    bump_cache_version(conn, "holidays")
     conn.commit()
     conn.close()
+    invalidate_holiday_calendar()
     return jsonify({"message": "삭제되었습니다."}), 200
 
+# ===== 통합 휴일 달력 =====
+# 회사 휴일(holidays)과 공공 공휴일(public_holidays), 주말을 연도별 비근무일 집합으로 미리 계산해 둡니다.
+# 휴일이 바뀌면 cache_versions의 "holidays" 버전이 올라가 모든 워커가 다음 조회 때 다시 계산합니다.
+CALENDAR_MAX_RANGE_DAYS = 366
+
+def year_bounds(year):
+    # date 인덱스를 그대로 쓰는 연도 범위 조건: date >= 시작 AND date < 다음 해 시작
+    return f"{year:04d}-01-01", f"{year + 1:04d}-01-01"
+
+class HolidayCalendar:
+    def __init__(self, year, public_rows, company_rows):
+        self.year = year
+        self.holidays = {}  # 날짜 -> [{"date", "description", "source"}]
+        for source, rows in (("public", public_rows), ("company", company_rows)):
+            for day, description in rows:
+                day = str(day)[:10]
+                self.holidays.setdefault(day, []).append({"date": day, "description": description, "source": source})
+        first = date(year, 1, 1)
+        weekends = {
+            str(first + timedelta(days=offset))
+            for offset in range((date(year + 1, 1, 1) - first).days)
+            if (first + timedelta(days=offset)).weekday() >= 5
+        }
+        self.non_working = frozenset(weekends | self.holidays.keys())
+
+    def is_workday(self, day):
+        return day not in self.non_working
+
+_holiday_calendars = {"version": None, "years": {}}
+_holiday_calendar_lock = threading.Lock()
+
+def get_holiday_calendar(year):
+    version = get_cache_version("holidays")
+    with _holiday_calendar_lock:
+        if _holiday_calendars["version"] != version:
+            _holiday_calendars.update(version=version, years={})
+        cached = _holiday_calendars["years"].get(year)
+    if cached is not None:
+        return cached
+
+    conn = get_db_connection(readonly=True)
+    try:
+        bounds = year_bounds(year)
+        public_rows = conn.execute("SELECT date, description FROM public_holidays WHERE date >= ? AND date < ?", bounds).fetchall()
+        company_rows = conn.execute("SELECT date, description FROM holidays WHERE date >= ? AND date < ?", bounds).fetchall()
+    finally:
+        conn.close()
+    holiday_calendar = HolidayCalendar(year, public_rows, company_rows)
+
+    with _holiday_calendar_lock:
+        if _holiday_calendars["version"] == version:
+            _holiday_calendars["years"][year] = holiday_calendar
+    return holiday_calendar
+
+def invalidate_holiday_calendar():
+    with _holiday_calendar_lock:
+        _holiday_calendars.update(version=None, years={})
+
+def is_workday(day):
+    # day: "YYYY-MM-DD" 문자열 또는 date — 주말/회사 휴일/공공 공휴일이 아니면 True
+    day = str(day)[:10]
+    return get_holiday_calendar(int(day[:4])).is_workday(day)
+
+def holiday_name(day):
+    entries = get_holiday_calendar(int(str(day)[:4])).holidays.get(str(day)[:10])
+    return ", ".join(entry["description"] for entry in entries) if entries else None
+
+def count_workdays(start, end):
+    # start~end(양끝 포함) 사이 근무일 수
+    start_d, end_d = datetime.strptime(start, "%Y-%m-%d").date(), datetime.strptime(end, "%Y-%m-%d").date()
+    total = 0
+    for year in range(start_d.year, end_d.year + 1):
+        lo, hi = max(start_d, date(year, 1, 1)), min(end_d, date(year, 12, 31))
+        lo_s, hi_s = str(lo), str(hi)
+        off = sum(1 for day in get_holiday_calendar(year).non_working if lo_s <= day <= hi_s)
+        total += (hi - lo).days + 1 - off
+    return total
+
+@app.route("/api/calendar", methods=["GET"])
+@conditional_get()
+def get_calendar():
+    # 기간 내 휴일(회사/공공 통합)·비근무일·근무일 수를 한 번에 돌려줍니다.
+    start, end = request.args.get("start"), request.args.get("end")
+    try:
+        start_d, end_d = datetime.strptime(start, "%Y-%m-%d").date(), datetime.strptime(end, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return jsonify({"error": "start, end 날짜 형식이 올바르지 않습니다."}), 400
+    if not 0 <= (end_d - start_d).days <= CALENDAR_MAX_RANGE_DAYS:
+        return jsonify({"error": f"조회 기간은 최대 {CALENDAR_MAX_RANGE_DAYS}일입니다."}), 400
+
+    holidays, non_working = [], []
+    for year in range(start_d.year, end_d.year + 1):
+        holiday_calendar = get_holiday_calendar(year)
+        non_working.extend(day for day in holiday_calendar.non_working if start <= day <= end)
+        for day, entries in holiday_calendar.holidays.items():
+            if start <= day <= end:
+                holidays.extend(entries)
+    holidays.sort(key=lambda entry: (entry["date"], entry["source"]))
+    return jsonify({
+        "start": start, "end": end,
+        "workdays": count_workdays(start, end),
+        "holidays": holidays,
+        "non_working_days": sorted(non_working),
+    })
+
 # ============================================================================
 # 9. 식수 신청 및 데이터 처리 API 
 # ============================================================================
+MEAL_TYPES = ("breakfast", "lunch", "dinner")
+
+def fetch_existing_meals(cursor, keys, chunk_size=400):
+    # (user_id, date) 쌍 목록의 기존 신청 상태를 한 번에 조회 → {(user_id, date): (b, l, d)}
+    existing = {}
+    keys = list(dict.fromkeys(keys))
+    for i in range(0, len(keys), chunk_size):
+        chunk = keys[i:i + chunk_size]
+        placeholders = ",".join(["(?, ?)"] * len(chunk))
+        cursor.execute(f"""
+            SELECT m.user_id, m.date, m.breakfast, m.lunch, m.dinner
+            FROM (VALUES {placeholders}) AS k
+            JOIN meals m ON m.user_id = k.column1 AND m.date = k.column2
+        """, [v for key in chunk for v in key])
+        for row in cursor.fetchall():
+            existing[(row["user_id"], row["date"])] = (row["breakfast"], row["lunch"], row["dinner"])
+    return existing
+
 @app.route("/meals", methods=["POST"])
 def save_meals():
     try:
@@ -685,55 +2059,53 @@ def save_meals():
         if not meals:
             return jsonify({"error": "신청 데이터 없음"}), 400
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
+        rows = []
         for meal in meals:
-            user_id = meal["user_id"]
-            date = meal["date"]
-            breakfast = int(meal.get("breakfast", 0))
-            lunch = int(meal.get("lunch", 0))
-            dinner = int(meal.get("dinner", 0))
-            created_at_in = meal.get("created_at")
-
-            cursor.execute("""
-                SELECT breakfast, lunch, dinner
-                FROM meals
-                WHERE user_id = ? AND date = ?
-            """, (user_id, date))
-            existing = cursor.fetchone()
-            old_b, old_l, old_d = (0, 0, 0) if not existing else existing
+            rows.append((
+                meal["user_id"], meal["date"],
+                int(meal.get("breakfast", 0)), int(meal.get("lunch", 0)), int(meal.get("dinner", 0)),
+                meal.get("created_at"),
+            ))
 
-            cursor.execute("""
-                INSERT INTO meals (user_id, date, breakfast, lunch, dinner, created_at)
-                VALUES (?, ?, ?, ?, ?, COALESCE(?, datetime('now','localtime')))
-                ON CONFLICT(user_id, date) DO UPDATE SET
-                    breakfast = excluded.breakfast,
-                    lunch     = excluded.lunch,
-                    dinner    = excluded.dinner,
-                    created_at = COALESCE(meals.created_at, excluded.created_at)
-            """, (user_id, date, breakfast, lunch, dinner, created_at_in))
+        monday, friday = get_week_range_kst()
 
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        # 기존 상태를 읽기 전에 쓰기 락부터 잡아, 읽은 값과 저장 사이에 다른 저장이 끼어들지 않게 합니다.
+        conn.execute("BEGIN IMMEDIATE")
+        state = fetch_existing_meals(cursor, [(r[0], r[1]) for r in rows])
+
+        logs = []
+        in_week = {}
+        for user_id, date, breakfast, lunch, dinner, _ in rows:
+            old_values = state.get((user_id, date), (0, 0, 0))
+            new_values = (breakfast, lunch, dinner)
+            state[(user_id, date)] = new_values
             try:
-                today = datetime.now(KST).date()
-                mon = today - timedelta(days=today.weekday())
-                fri = mon + timedelta(days=4)
-                this_day = datetime.strptime(date, "%Y-%m-%d").date()
-
-                if mon <= this_day <= fri:
-                    meal_types = ['breakfast', 'lunch', 'dinner']
-                    old_values = [old_b, old_l, old_d]
-                    new_values = [breakfast, lunch, dinner]
-
-                    for i in range(3):
-                        if old_values[i] != new_values[i]:
-                            cursor.execute("""
-                                INSERT INTO meal_logs (emp_id, date, meal_type, before_status, after_status)
-                                VALUES (?, ?, ?, ?, ?)
-                            """, (user_id, date, meal_types[i], old_values[i], new_values[i]))
+                if date not in in_week:
+                    in_week[date] = monday <= datetime.strptime(date, "%Y-%m-%d").date() <= friday
+                if in_week[date]:
+                    for meal_type, old, new in zip(MEAL_TYPES, old_values, new_values):
+                        if old != new:
+                            logs.append((user_id, date, meal_type, old, new))
             except Exception as e:
                 print(f"❌ 로그 기록 실패 (date={date}, user={user_id}):", e)
 
+        cursor.executemany("""
+            INSERT INTO meals (user_id, date, breakfast, lunch, dinner, created_at)
+            VALUES (?, ?, ?, ?, ?, COALESCE(?, datetime('now','localtime')))
+            ON CONFLICT(user_id, date) DO UPDATE SET
+                breakfast = excluded.breakfast,
+                lunch     = excluded.lunch,
+                dinner    = excluded.dinner,
+                created_at = COALESCE(meals.created_at, excluded.created_at)
+        """, rows)
+        if logs:
+            cursor.executemany("""
+                INSERT INTO meal_logs (emp_id, date, meal_type, before_status, after_status)
+                VALUES (?, ?, ?, ?, ?)
+            """, logs)
+
         conn.commit()
         conn.close()
         return jsonify({"message": "식수 저장 완료"}), 201
@@ -741,6 +2113,14 @@ def save_meals():
         print("❌ 식수 저장 실패:", e)
         return jsonify({"error": str(e)}), 500
     
+# 기간 조회 쿼리는 tests/test_query_plans.py에서 같은 문장으로 인덱스 사용을 확인합니다.
+SELFCHECK_SUMMARY_SQL = """
+    SELECT user_id, MAX(checked) AS checked
+    FROM selfcheck
+    WHERE date BETWEEN ? AND ?
+    GROUP BY user_id
+"""
+
 @app.route('/admin/selfcheck', methods=['GET'])
 def get_admin_selfchecks():
     start_date = request.args.get('start')
@@ -748,15 +2128,9 @@ def get_admin_selfchecks():
     if not start_date or not end_date:
         return jsonify({ "error": "start 와 end 파라미터가 필요합니다." }), 400
 
-    conn = get_db_connection()
+    conn = get_db_connection(readonly=True)
     cursor = conn.cursor()
-    query = """
-    SELECT user_id, MAX(checked) AS checked
-    FROM selfcheck
-    WHERE date BETWEEN ? AND ?
-    GROUP BY user_id
-    """
-    cursor.execute(query, (start_date, end_date))
+    cursor.execute(SELFCHECK_SUMMARY_SQL, (start_date, end_date))
     rows = cursor.fetchall()
     conn.close()
 
@@ -770,7 +2144,7 @@ def get_selfcheck():
     if not user_id or not date:
         return jsonify({'error': 'Missing session or date'}), 400
 
-    conn = get_db_connection()
+    conn = get_db_connection(readonly=True)
     row = conn.execute(
         'SELECT checked, created_at FROM selfcheck WHERE user_id = ? AND date = ?',
         (user_id, date)
@@ -858,7 +2232,7 @@ def get_user_meals():
     if not user_id or not start_date or not end_date:
         return jsonify({"error": "user_id, start, end는 필수입니다."}), 400
 
-    conn = get_db_connection()
+    conn = get_db_connection(readonly=True)
     cursor = conn.execute("""
         SELECT m.date, m.breakfast, m.lunch, m.dinner, m.created_at,   
                e.name, e.dept, e.rank
@@ -885,7 +2259,27 @@ def get_user_meals():
 # ============================================================================
 # 10. 관리자 권한 전용 어드민 API 포트
 # ============================================================================
+# mode=apply는 신청 행만, mode=all은 직영 직원 전체(미신청 포함). 부서·이름 순서는 employees 인덱스가 보장합니다.
+ADMIN_MEALS_SQL = {
+    "apply": """
+        SELECT m.user_id, e.name, e.dept, e.region, m.date, m.breakfast, m.lunch, m.dinner
+        FROM meals m
+        JOIN employees e ON m.user_id = e.id
+        WHERE m.date BETWEEN ? AND ? AND e.type = '직영'
+        ORDER BY e.dept ASC, e.name ASC, m.date ASC
+    """,
+    "all": """
+        SELECT e.id AS user_id, e.name, e.dept, e.region, m.date,
+            IFNULL(m.breakfast, 0) AS breakfast, IFNULL(m.lunch, 0) AS lunch, IFNULL(m.dinner, 0) AS dinner
+        FROM employees e
+        LEFT JOIN meals m ON e.id = m.user_id AND m.date BETWEEN ? AND ?
+        WHERE e.type = '직영'
+        ORDER BY e.dept ASC, e.name ASC, m.date ASC
+    """,
+}
+
 @app.route("/admin/meals", methods=["GET"])
+@conditional_get()
 def admin_get_meals():
     start = request.args.get("start")
     end = request.args.get("end")
@@ -894,26 +2288,10 @@ def admin_get_meals():
     if not start or not end:
         return jsonify({"error": "start, end는 필수입니다."}), 400
 
-    conn = get_db_connection()
+    conn = get_db_connection(readonly=True)
     cursor = conn.cursor()
     try:
-        if mode == "all":
-            cursor.execute("""
-                SELECT e.id AS user_id, e.name, e.dept, e.region, m.date,
-                    IFNULL(m.breakfast, 0) AS breakfast, IFNULL(m.lunch, 0) AS lunch, IFNULL(m.dinner, 0) AS dinner
-                FROM employees e
-                LEFT JOIN meals m ON e.id = m.user_id AND m.date BETWEEN ? AND ?
-                WHERE e.type = '직영'
-                ORDER BY e.dept ASC, e.name ASC, m.date ASC
-            """, (start, end))
-        else:
-            cursor.execute("""
-                SELECT m.user_id, e.name, e.dept, e.region, m.date, m.breakfast, m.lunch, m.dinner
-                FROM meals m
-                JOIN employees e ON m.user_id = e.id
-                WHERE m.date BETWEEN ? AND ? AND e.type = '직영'
-                ORDER BY e.dept ASC, e.name ASC, m.date ASC
-            """, (start, end))
+        cursor.execute(ADMIN_MEALS_SQL["all" if mode == "all" else "apply"], (start, end))
 
         rows = cursor.fetchall()
         conn.close()
@@ -933,52 +2311,138 @@ def admin_edit_meals():
     if not meals:
         return jsonify({"error": "meals 데이터가 필요합니다."}), 400
 
-    today = datetime.now(KST).date()  
-    monday = today - timedelta(days=today.weekday())
-    friday = monday + timedelta(days=4)
+    monday, friday = get_week_range_kst()
+
+    rows = [(meal.get("user_id"), meal.get("date"),
+             safe_int(meal.get("breakfast")), safe_int(meal.get("lunch")), safe_int(meal.get("dinner")))
+            for meal in meals]
 
     conn = get_db_connection()
     cursor = conn.cursor()
-    for meal in meals:
-        user_id = meal.get("user_id")
-        date_str = meal.get("date")
-        breakfast = safe_int(meal.get("breakfast"))
-        lunch = safe_int(meal.get("lunch"))
-        dinner = safe_int(meal.get("dinner"))
-
-        cursor.execute("SELECT breakfast, lunch, dinner FROM meals WHERE user_id = ? AND date = ?", (user_id, date_str))
-        original = cursor.fetchone()
-        date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-
-        if original and monday <= date_obj <= friday:
-            before = dict(original)
-            after = {"breakfast": breakfast, "lunch": lunch, "dinner": dinner}
-            for meal_type in ["breakfast", "lunch", "dinner"]:
-                if before[meal_type] != after[meal_type]:
-                    cursor.execute("""
-                        INSERT INTO meal_logs (emp_id, date, meal_type, before_status, after_status)
-                        VALUES (?, ?, ?, ?, ?)
-                    """, (user_id, date_str, meal_type, before[meal_type], after[meal_type]))
-
-        cursor.execute("DELETE FROM meals WHERE user_id = ? AND date = ?", (user_id, date_str))
-        cursor.execute("INSERT INTO meals (user_id, date, breakfast, lunch, dinner) VALUES (?, ?, ?, ?, ?)",
-                       (user_id, date_str, breakfast, lunch, dinner))
+    # 그리드 전체의 현재 상태를 한 번에 읽고, 셀 단위 변경분만 계산합니다.
+    # 읽기 전에 쓰기 락을 잡아 다른 저장이 읽기와 쓰기 사이에 끼어들지 못하게 합니다.
+    conn.execute("BEGIN IMMEDIATE")
+    state = fetch_existing_meals(cursor, [(r[0], r[1]) for r in rows])
+    existing_keys = set(state)
+
+    changed = {}
+    logs = []
+    in_week = {}
+    for user_id, date_str, breakfast, lunch, dinner in rows:
+        before = state.get((user_id, date_str))
+        after = (breakfast, lunch, dinner)
+        if before == after:
+            continue
+        if date_str not in in_week:
+            in_week[date_str] = monday <= datetime.strptime(date_str, "%Y-%m-%d").date() <= friday
+        if before is not None and in_week[date_str]:
+            for meal_type, old, new in zip(MEAL_TYPES, before, after):
+                if old != new:
+                    logs.append((user_id, date_str, meal_type, old, new))
+        state[(user_id, date_str)] = after
+        changed[(user_id, date_str)] = after
+
+    # 기존 행은 UPDATE로 제자리 수정(id, created_at 유지), 새 행만 INSERT
+    updates = [values + key for key, values in changed.items() if key in existing_keys]
+    inserts = [key + values for key, values in changed.items() if key not in existing_keys]
+    if updates:
+        cursor.executemany("""
+            UPDATE meals SET breakfast = ?, lunch = ?, dinner = ?
+            WHERE user_id = ? AND date = ?
+        """, updates)
+    if inserts:
+        cursor.executemany("""
+            INSERT INTO meals (user_id, date, breakfast, lunch, dinner)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(user_id, date) DO UPDATE SET
+                breakfast = excluded.breakfast,
+                lunch     = excluded.lunch,
+                dinner    = excluded.dinner
+        """, inserts)
+    if logs:
+        cursor.executemany("""
+            INSERT INTO meal_logs (emp_id, date, meal_type, before_status, after_status)
+            VALUES (?, ?, ?, ?, ?)
+        """, logs)
 
     conn.commit()
     conn.close()
-    return jsonify({"message": f"{len(meals)}건이 수정되었습니다."}), 201
+    return jsonify({"message": f"{len(meals)}건이 수정되었습니다.", "changed": len(changed)}), 201
+
+# ===== 직원 명부 캐시 =====
+# employees 테이블을 한 번 읽어 사번/이름/부서/유형·지역 색인을 프로세스 메모리에 보관합니다.
+# 직원 쓰기 경로가 cache_versions의 "employees" 버전을 올리므로 다른 워커도 다음 조회 때 다시 읽습니다.
+class EmployeeDirectory:
+    def __init__(self, rows):
+        self.by_id = {}
+        self.by_name = defaultdict(list)
+        self.by_dept = defaultdict(list)
+        self.by_type_region = defaultdict(list)
+        for row in rows:
+            record = dict(row)
+            self.by_id[record["id"]] = record
+            self.by_name[record["name"]].append(record)
+            self.by_dept[record["dept"]].append(record)
+            self.by_type_region[(record["type"], record["region"])].append(record)
+        self._weekly_roster = None
+
+    @staticmethod
+    def normalize_id(emp_id):
+        # JSON 본문에서 숫자로 들어온 사번(1001)이나 앞뒤 공백이 붙은 사번도 DB의 문자열 사번과 맞춥니다.
+        return None if emp_id is None else str(emp_id).strip()
+
+    def get(self, emp_id):
+        return self.by_id.get(self.normalize_id(emp_id))
+
+    def authenticate(self, emp_id, name):
+        record = self.get(emp_id)
+        return record if record is not None and record["name"] == name else None
+
+    def records(self, name=None):
+        return self.by_name.get(name, []) if name else list(self.by_id.values())
+
+    def weekly_roster(self):
+        # depts: 화면 기본 부서 목록 {dept: (type, total)}, members: {사번: (이름, 부서, 유형, 지역)}
+        if self._weekly_roster is None:
+            members, group_sizes = {}, {}
+            for emp_id, e in self.by_id.items():
+                members[emp_id] = (e["name"], e["dept"], e["type"], e["region"])
+                key = (e["dept"], e["type"], e["region"])
+                group_sizes[key] = group_sizes.get(key, 0) + 1
+            depts = {}
+            for (dept, type_, region), total in group_sizes.items():
+                if type_ == "직영" and region != "에코센터": continue
+                depts[dept] = (type_, total)
+            self._weekly_roster = (depts, members)
+        return self._weekly_roster
+
+_employee_directory = {"version": None, "directory": None}
+_employee_directory_lock = threading.Lock()
+
+def get_employee_directory():
+    version = get_cache_version("employees")
+    with _employee_directory_lock:
+        if _employee_directory["directory"] is not None and _employee_directory["version"] == version:
+            return _employee_directory["directory"]
+
+    conn = get_db_connection(readonly=True)
+    try:
+        directory = EmployeeDirectory(conn.execute("SELECT * FROM employees").fetchall())
+    finally:
+        conn.close()
+
+    with _employee_directory_lock:
+        _employee_directory.update(version=version, directory=directory)
+    return directory
+
+def invalidate_employee_directory():
+    with _employee_directory_lock:
+        _employee_directory.update(version=None, directory=None)
 
 @app.route("/admin/employees", methods=["GET"])
 def get_employees():
     name = request.args.get("name", "").strip()
-    conn = get_db_connection()
-    if name:
-        cursor = conn.execute("SELECT * FROM employees WHERE name = ?", (name,))
-    else:
-        cursor = conn.execute("SELECT * FROM employees")
-    employees = cursor.fetchall()
-    conn.close()
-    return jsonify([dict(emp) for emp in employees])
+    return jsonify(get_employee_directory().records(name))
 
 @app.route("/admin/employees", methods=["POST"])
 def add_employee():
@@ -999,7 +2463,9 @@ def add_employee():
     try:
         conn.execute("INSERT INTO employees (id, name, dept, rank, type, region, level) VALUES (?, ?, ?, ?, ?, ?, ?)",
                      (emp_id, name, dept, rank, emp_type, emp_region, level))
+        bump_cache_version(conn, "employees")
         conn.commit()
+        invalidate_employee_directory()
         return jsonify({"success": True}), 201
     except sqlite3.IntegrityError:
         return jsonify({"error": "⚠️ 이미 등록된 사번입니다."}), 409
@@ -1023,20 +2489,120 @@ def update_employee(emp_id):
     conn = get_db_connection()
     conn.execute("UPDATE employees SET name = ?, dept = ?, rank = ?, type = ?, region = ?, level = ? WHERE id = ?",
             (name, dept, rank, emp_type, emp_region, level, emp_id))
+    bump_cache_version(conn, "employees")
     conn.commit()
     conn.close()
+    invalidate_employee_directory()
     return jsonify({"success": True}), 200
 
 @app.route("/admin/employees/<emp_id>", methods=["DELETE"])
 def delete_employee(emp_id):
     conn = get_db_connection()
     conn.execute("DELETE FROM employees WHERE id = ?", (emp_id,))
+    bump_cache_version(conn, "employees")
     conn.commit()
     conn.close()
+    invalidate_employee_directory()
     return jsonify({"success": True})
 
+# ===== 직원 일괄 등록 =====
+# 파일을 청크 단위로 읽어 검증/정규화한 뒤, 기존 명단과 비교해 바뀐 행만 한 트랜잭션으로 반영합니다.
+EMPLOYEE_IMPORT_COLUMNS = ["id", "name", "dept", "rank", "type", "region"]
+EMPLOYEE_IMPORT_REQUIRED = ["id", "name", "dept", "type", "region"]
+# 양식 파일(/admin/employees/template)의 한글 머리글도 그대로 받습니다.
+EMPLOYEE_IMPORT_ALIASES = {"사번": "id", "이름": "name", "부서": "dept", "직영/협력사/방문자": "type",
+                           "에코센터/테크센터/기타": "region", "직급(옵션)": "rank", "직급": "rank"}
+EMPLOYEE_TYPES = ("직영", "협력사", "방문자")
+EMPLOYEE_IMPORT_CHUNK_ROWS = 5000
+EMPLOYEE_IMPORT_REPORT_LIMIT = 500
+
+def iter_employee_upload_chunks(file):
+    if file.filename.endswith(".csv"):
+        # 대용량 CSV는 전체를 올리지 않고 청크 단위로 읽습니다.
+        yield from pd.read_csv(file.stream, dtype=str, keep_default_na=False, encoding="utf-8-sig",
+                               chunksize=EMPLOYEE_IMPORT_CHUNK_ROWS)
+    else:
+        yield pd.read_excel(file, dtype=str, keep_default_na=False)
+
+def validate_employee_chunk(df):
+    # 반환: (정상 행, 거부 행) — 둘 다 "row"(엑셀 기준 행 번호) 열을 가집니다.
+    df = df.rename(columns=lambda c: EMPLOYEE_IMPORT_ALIASES.get(str(c).strip(), str(c).strip()))
+    if "rank" not in df.columns:
+        df["rank"] = ""
+    df = df[EMPLOYEE_IMPORT_COLUMNS].fillna("").astype(str).apply(lambda col: col.str.strip())
+    df.insert(0, "row", df.index + 2)
+
+    missing = pd.Series("", index=df.index)
+    for column in EMPLOYEE_IMPORT_REQUIRED:
+        missing = missing.where(df[column] != "", missing + column + ",")
+    reason = ("필수값 누락(" + missing.str.rstrip(",") + ")").where(missing != "", "")
+    bad_type = (reason == "") & ~df["type"].isin(EMPLOYEE_TYPES)
+    reason = reason.mask(bad_type, "유형 오류(" + df["type"] + ")")
+
+    rejected = df.loc[reason != "", ["row", "id"]].assign(reason=reason[reason != ""])
+    return df[reason == ""], rejected
+
+def import_employees(chunks, dry_run=False):
+    valid_parts, rejected_parts = [], []
+    for chunk in chunks:
+        missing = set(EMPLOYEE_IMPORT_REQUIRED) - {EMPLOYEE_IMPORT_ALIASES.get(str(c).strip(), str(c).strip()) for c in chunk.columns}
+        if missing:
+            raise ValueError(f"파일 필수 필드 유실: {', '.join(sorted(missing))}")
+        valid, rejected = validate_employee_chunk(chunk)
+        valid_parts.append(valid)
+        rejected_parts.append(rejected)
+
+    valid = pd.concat(valid_parts, ignore_index=True) if valid_parts else pd.DataFrame(columns=["row"] + EMPLOYEE_IMPORT_COLUMNS)
+    rejected = pd.concat(rejected_parts, ignore_index=True) if rejected_parts else pd.DataFrame(columns=["row", "id", "reason"])
+
+    # 같은 사번이 여러 번 나오면 기존 순차 UPSERT처럼 마지막 행을 적용합니다.
+    duplicated = valid.duplicated("id", keep="last")
+    rejected = pd.concat([rejected, valid.loc[duplicated, ["row", "id"]].assign(reason="파일 내 중복 사번(뒤 행 적용)")], ignore_index=True)
+    valid = valid[~duplicated]
+
+    conn = get_db_connection()
+    try:
+        if not dry_run:
+            # 비교 기준이 되는 현재 명부를 읽기 전에 쓰기 락을 잡아, 비교와 반영 사이에 다른 수정이 끼어들지 않게 합니다.
+            conn.execute("BEGIN IMMEDIATE")
+        existing = pd.read_sql_query("SELECT id, name, dept, IFNULL(rank, '') AS rank, type, region FROM employees", conn, dtype=str).fillna("")
+        diff = valid.merge(existing, on="id", how="left", suffixes=("", "_db"), indicator=True)
+        is_new = diff["_merge"] == "left_only"
+        same = pd.Series(True, index=diff.index)
+        for column in EMPLOYEE_IMPORT_COLUMNS[1:]:
+            same &= diff[column] == diff[f"{column}_db"]
+        inserted, updated, unchanged = diff[is_new], diff[~is_new & ~same], diff[~is_new & same]
+
+        changed = pd.concat([inserted, updated])
+        if not dry_run and not changed.empty:
+            conn.executemany("""
+                INSERT INTO employees (id, name, dept, rank, type, region) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(id) DO UPDATE SET name=excluded.name, dept=excluded.dept, type=excluded.type, region=excluded.region, rank=excluded.rank
+            """, changed[EMPLOYEE_IMPORT_COLUMNS].itertuples(index=False, name=None))
+            bump_cache_version(conn, "employees")
+            conn.commit()
+            invalidate_employee_directory()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    limit = EMPLOYEE_IMPORT_REPORT_LIMIT
+    rejected = rejected.sort_values("row", kind="stable")
+    return {
+        "success": True,
+        "dry_run": dry_run,
+        "total": len(valid) + len(rejected),
+        "inserted": {"count": len(inserted), "rows": inserted["row"].head(limit).tolist()},
+        "updated": {"count": len(updated), "rows": updated["row"].head(limit).tolist()},
+        "unchanged": {"count": len(unchanged), "rows": unchanged["row"].head(limit).tolist()},
+        "rejected": {"count": len(rejected), "rows": rejected.head(limit).to_dict(orient="records")},
+    }
+
 @app.route("/admin/employees/upload", methods=["POST"])
 def upload_employees():
+    # ?dry_run=1 이면 반영하지 않고 변경 예정 내역만 돌려줍니다.
     if "file" not in request.files:
         return jsonify({"error": "파일이 없습니다."}), 400
     file = request.files["file"]
@@ -1044,22 +2610,12 @@ def upload_employees():
         return jsonify({"error": "지원되지 않는 파일 형식입니다."}), 400
 
     try:
-        df = pd.read_csv(file) if file.filename.endswith(".csv") else pd.read_excel(file)
-        if not {"id", "name", "dept", "type", "region"}.issubset(set(df.columns)):
-            return jsonify({"error": "파일 필수 필드 유실"}), 400
-
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        for _, row in df.iterrows():
-            cursor.execute("""
-                INSERT INTO employees (id, name, dept, rank, type, region) VALUES (?, ?, ?, ?, ?, ?)
-                ON CONFLICT(id) DO UPDATE SET name=excluded.name, dept=excluded.dept, type=excluded.type, region=excluded.region, rank=excluded.rank
-            """, (row["id"], row["name"], row["dept"], row["rank"] if "rank" in row else "", row["type"], row["region"]))
-        conn.commit()
-        cursor = conn.execute("SELECT * FROM employees")
-        employees = [dict(emp) for emp in cursor.fetchall()]
-        conn.close()
-        return jsonify(employees), 200
+        report = import_employees(iter_employee_upload_chunks(file), dry_run=request.args.get("dry_run") == "1")
+        print(f"👥 [직원 등록] 신규 {report['inserted']['count']} / 변경 {report['updated']['count']} / "
+              f"동일 {report['unchanged']['count']} / 거부 {report['rejected']['count']}")
+        return jsonify(report), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
@@ -1079,16 +2635,18 @@ def login_check():
     if not emp_id or not name:
         return jsonify({"error": "사번과 이름을 모두 입력하세요"}), 400
 
-    conn = get_db_connection()
-    cursor = conn.execute("SELECT id, name, dept, rank, type, level, region FROM employees WHERE id = ? AND name = ?", (emp_id, name))
-    user = cursor.fetchone()
-    conn.close()
-
+    user = get_employee_directory().authenticate(emp_id, name)
     if user:
         return jsonify({"valid": True, "id": user["id"], "name": user["name"], "dept": user["dept"], "rank": user["rank"], "type": user["type"], "level": user["level"], "region": user["region"]})
     else:
         return jsonify({"valid": False}), 401
 
+MEAL_LOGS_SQL = """
+    SELECT l.date, e.dept, e.name, l.meal_type, l.before_status, l.after_status, l.changed_at
+    FROM meal_logs l JOIN employees e ON l.emp_id = e.id
+    WHERE l.date BETWEEN ? AND ? AND e.name LIKE ? AND e.dept LIKE ?
+"""
+
 @app.route("/admin/logs", methods=["GET"])
 def get_change_logs():
     start = request.args.get("start")
@@ -1096,12 +2654,9 @@ def get_change_logs():
     name = request.args.get("name", "")
     dept = request.args.get("dept", "")
 
-    conn = get_db_connection()
+    conn = get_db_connection(readonly=True)
     try:
-        cursor = conn.execute("""
-            SELECT l.date, e.dept, e.name, l.meal_type, l.before_status, l.after_status, l.changed_at
-            FROM meal_logs l JOIN employees e ON l.emp_id = e.id
-            WHERE l.date BETWEEN ? AND ? AND e.name LIKE ? AND e.dept LIKE ?
+        cursor = conn.execute(MEAL_LOGS_SQL + """
             ORDER BY l.date ASC, CASE l.meal_type WHEN 'breakfast' THEN 1 WHEN 'lunch' THEN 2 WHEN 'dinner' THEN 3 ELSE 4 END, e.dept ASC, e.name ASC, l.changed_at DESC
         """, (start, end, f"%{name}%", f"%{dept}%"))
         return jsonify([dict(row) for row in cursor.fetchall()]), 200
@@ -1110,38 +2665,46 @@ def get_change_logs():
     finally:
         conn.close()
 
+MEAL_LOG_HEADERS = ["식수일", "식사유형", "부서", "이름", "변경전", "변경후", "변경시간"]
+MEAL_LOG_TYPE_LABELS = {"breakfast": "아침", "lunch": "점심", "dinner": "저녁"}
+MEAL_LOG_STATUS_LABELS = {0: "미신청", 1: "신청"}
+
+def iter_meal_log_rows(params):
+    rows = iter_query_rows(MEAL_LOGS_SQL, (params["start"], params["end"], f"%{params['name']}%", f"%{params['dept']}%"))
+    for day, dept, name, meal_type, before, after, changed_at in rows:
+        yield (str(day)[:10], MEAL_LOG_TYPE_LABELS.get(meal_type), dept, name,
+               MEAL_LOG_STATUS_LABELS.get(before), MEAL_LOG_STATUS_LABELS.get(after), changed_at)
+
+def build_meal_logs_excel(job, params):
+    rows = peek_rows(iter_meal_log_rows(params))
+    if rows is None: raise JobError("데이터 없음")
+    job.progress(20, "로그 기록 중")
+    counts = write_xlsx_export(job.result_path, [("Sheet1", MEAL_LOG_HEADERS, rows)])
+    return {"name": "meal_log_export.xlsx", "meta": {"rows": counts["Sheet1"]}}
+
 @app.route("/admin/logs/download", methods=["GET"])
 def download_logs_excel():
-    start = request.args.get("start")
-    end = request.args.get("end")
-    name = request.args.get("name", "")
-    dept = request.args.get("dept", "")
-
-    conn = get_db_connection()
+    params = {
+        "start": request.args.get("start"),
+        "end": request.args.get("end"),
+        "name": request.args.get("name", ""),
+        "dept": request.args.get("dept", ""),
+    }
     try:
-        cursor = conn.execute("""
-            SELECT l.date, e.dept, e.name, l.meal_type, l.before_status, l.after_status, l.changed_at
-            FROM meal_logs l JOIN employees e ON l.emp_id = e.id
-            WHERE l.date BETWEEN ? AND ? AND e.name LIKE ? AND e.dept LIKE ?
-        """, (start, end, f"%{name}%", f"%{dept}%"))
-        
-        logs = [dict(row) for row in cursor.fetchall()]
-        if not logs: return "데이터 없음", 404
-        df = pd.DataFrame(logs)
-        df["식수일"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
-        df["식사유형"] = df["meal_type"].map({"breakfast": "아침", "lunch": "점심", "dinner": "저녁"})
-        df["변경전"] = df["before_status"].map({0: "미신청", 1: "신청"})
-        df["변경후"] = df["after_status"].map({0: "미신청", 1: "신청"})
-        
-        final_df = df[["식수일", "식사유형", "dept", "name", "변경전", "변경후", "changed_at"]].rename(columns={"dept":"부서","name":"이름","changed_at":"변경시간"})
-        output = BytesIO()
-        final_df.to_excel(output, index=False)
-        output.seek(0)
-        return send_file(output, as_attachment=True, download_name="meal_log_export.xlsx", mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        if request.args.get("format") == "csv":
+            # CSV는 작업 큐를 거치지 않고 바로 스트리밍합니다.
+            rows = peek_rows(iter_meal_log_rows(params))
+            if rows is None: return "데이터 없음", 404
+            return csv_export_response([("Sheet1", MEAL_LOG_HEADERS, rows)], "meal_log_export.csv")
+        return job_accepted_response(submit_job("meal_logs", params))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        conn.close()
+
+VISITOR_LOGS_SELECT = """
+    SELECT l.date, e.dept, l.applicant_name, l.before_breakfast, l.before_lunch, l.before_dinner, l.breakfast, l.lunch, l.dinner, l.updated_at
+    FROM visitor_logs l LEFT JOIN employees e ON l.applicant_id = e.id
+"""
+VISITOR_LOGS_IN_RANGE_SQL = VISITOR_LOGS_SELECT + " WHERE l.date BETWEEN ? AND ?"
 
 @app.route("/admin/visitor_logs", methods=["GET"])
 def get_visitor_logs():
@@ -1152,11 +2715,8 @@ def get_visitor_logs():
     vtype = request.args.get("type", "").strip()
 
     try:
-        conn = get_db_connection()
-        query = """
-            SELECT l.date, e.dept, l.applicant_name, l.before_breakfast, l.before_lunch, l.before_dinner, l.breakfast, l.lunch, l.dinner, l.updated_at
-            FROM visitor_logs l LEFT JOIN employees e ON l.applicant_id = e.id WHERE 1 = 1
-        """
+        conn = get_db_connection(readonly=True)
+        query = VISITOR_LOGS_SELECT + " WHERE 1 = 1"
         params = []
         if start and end: query += " AND l.date BETWEEN ? AND ?"; params.extend([start, end])
         if name: query += " AND l.applicant_name LIKE ?"; params.append(f"%{name}%")
@@ -1171,295 +2731,648 @@ def get_visitor_logs():
     finally:
         conn.close()
 
+VISITOR_LOG_HEADERS = ["date", "dept", "applicant_name", "before_breakfast", "before_lunch", "before_dinner", "breakfast", "lunch", "dinner", "updated_at"]
+
+def iter_visitor_log_rows(params):
+    return iter_query_rows(VISITOR_LOGS_IN_RANGE_SQL, (params["start"], params["end"]))
+
+def build_visitor_logs_excel(job, params):
+    rows = peek_rows(iter_visitor_log_rows(params))
+    if rows is None: raise JobError("데이터 분량 부족")
+    job.progress(20, "로그 기록 중")
+    counts = write_xlsx_export(job.result_path, [("Sheet1", VISITOR_LOG_HEADERS, rows)])
+    return {"name": "visitor_logs.xlsx", "meta": {"rows": counts["Sheet1"]}}
+
 @app.route("/admin/visitor_logs/download", methods=["GET"])
 def download_visitor_logs_excel():
-    start, end = request.args.get("start"), request.args.get("end")
-    name, dept, vtype = request.args.get("name", ""), request.args.get("dept", ""), request.args.get("type", "")
-
-    conn = get_db_connection()
+    # name/dept/type 인자는 기존 다운로드와 마찬가지로 기간만 적용합니다.
+    params = {"start": request.args.get("start"), "end": request.args.get("end")}
     try:
-        query = """
-            SELECT l.date, e.dept, l.applicant_name, l.before_breakfast, l.before_lunch, l.before_dinner, l.breakfast, l.lunch, l.dinner, l.updated_at
-            FROM visitor_logs l LEFT JOIN employees e ON l.applicant_id = e.id WHERE l.date BETWEEN ? AND ?
-        """
-        params = [start, end]
-        cursor = conn.execute(query, params)
-        df = pd.DataFrame([dict(row) for row in cursor.fetchall()])
-        if df.empty: return "데이터 분량 부족", 404
-
-        output = BytesIO()
-        df.to_excel(output, index=False)
-        output.seek(0)
-        return send_file(output, as_attachment=True, download_name="visitor_logs.xlsx")
+        if request.args.get("format") == "csv":
+            rows = peek_rows(iter_visitor_log_rows(params))
+            if rows is None: return "데이터 분량 부족", 404
+            return csv_export_response([("Sheet1", VISITOR_LOG_HEADERS, rows)], "visitor_logs.csv")
+        return job_accepted_response(submit_job("visitor_logs", params))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        conn.close()
 
 # ============================================================================
 # 11. 식수 분석 실적 대조 및 통계 분석 대시보드 API
 # ============================================================================
 @app.route("/admin/stats/period", methods=["GET"])
+@conditional_get()
 def get_stats_period():
     start, end = request.args.get("start"), request.args.get("end")
     if not start or not end: return jsonify({"error": "기간 조건 부족"}), 400
 
-    conn = get_db_connection()
+    conn = get_db_connection(readonly=True)
     cursor = conn.execute("""
-        SELECT date, SUM(breakfast) as breakfast, SUM(lunch) as lunch, SUM(dinner) as dinner
-        FROM (SELECT date, breakfast, lunch, dinner FROM meals UNION ALL SELECT date, breakfast, lunch, dinner FROM visitors)
-        WHERE date BETWEEN ? AND ? GROUP BY date ORDER BY date
+        SELECT period AS date, breakfast, lunch, dinner
+        FROM meal_counts_daily
+        WHERE period BETWEEN ? AND ? AND row_count > 0 ORDER BY period
     """, (start, end))
     
     result = []
     for row in cursor.fetchall():
         wk = datetime.strptime(row["date"], "%Y-%m-%d").weekday()
-        result.append({"date": row["date"], "day": ["월","화","수","목","금","토","일"][wk], "breakfast": row["breakfast"], "lunch": row["lunch"], "dinner": row["dinner"]})
+        result.append({"date": row["date"], "day": ["월","화","수","목","금","토","일"][wk], "breakfast": row["breakfast"], "lunch": row["lunch"], "dinner": row["dinner"],
+                       "workday": is_workday(row["date"]), "holiday": holiday_name(row["date"])})
     conn.close()
     return jsonify(result), 200
 
+# ===== 실적 자료 XLSX 스트리밍 파서 =====
+# 시트 XML을 iterparse로 한 행씩 읽어 바로 열 배열에 쌓고, 처리한 행은 즉시 버립니다.
+# 공유 문자열(sharedStrings.xml), 인라인 문자열, 수식 문자열, 숫자 셀을 모두 텍스트로 해석합니다.
+XLSX_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+XLSX_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+def _xlsx_col_name(index):
+    name = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        name = chr(65 + rem) + name
+    return name
+
+def _xlsx_string_item(node):
+    # <si>/<is>: 단일 <t> 또는 서식 런(<r><t>)의 연결, 윗주(<rPh>)는 제외
+    t = node.find(f"{XLSX_NS}t")
+    if t is not None:
+        return t.text or ""
+    return "".join(r.text or "" for r in node.findall(f"{XLSX_NS}r/{XLSX_NS}t"))
+
+def read_xlsx_shared_strings(z):
+    if "xl/sharedStrings.xml" not in z.namelist():
+        return []
+    strings = []
+    with z.open("xl/sharedStrings.xml") as f:
+        for _, elem in ET.iterparse(f, events=("end",)):
+            if elem.tag == f"{XLSX_NS}si":
+                strings.append(_xlsx_string_item(elem))
+                elem.clear()
+    return strings
+
+def find_first_xlsx_sheet(z):
+    names = z.namelist()
+    try:
+        workbook = ET.fromstring(z.read("xl/workbook.xml"))
+        rels = ET.fromstring(z.read("xl/_rels/workbook.xml.rels"))
+        first = workbook.find(f"{XLSX_NS}sheets/{XLSX_NS}sheet")
+        rel_id = first.get(f"{XLSX_REL_NS}id")
+        for rel in rels:
+            if rel.get("Id") == rel_id:
+                target = rel.get("Target").lstrip("/")
+                target = target if target.startswith("xl/") else f"xl/{target}"
+                if target in names:
+                    return target
+    except (KeyError, AttributeError, ET.ParseError):
+        pass
+    if "xl/worksheets/sheet1.xml" in names:
+        return "xl/worksheets/sheet1.xml"
+    sheets = sorted(n for n in names if n.startswith("xl/worksheets/") and n.endswith(".xml"))
+    return sheets[0] if sheets else None
+
+def iter_xlsx_rows(z, sheet_name, shared_strings, chunk_size=1 << 16):
+    # 한 행씩 {열 문자: 값} 형태로 반환. 처리한 행은 <sheetData>에서 바로 떼어 내 메모리를 일정하게 유지합니다.
+    # (elem.clear()만 하면 빈 row 요소가 sheetData 자식으로 행 수만큼 쌓입니다.)
+    row_tag, c_tag, v_tag, is_tag = f"{XLSX_NS}row", f"{XLSX_NS}c", f"{XLSX_NS}v", f"{XLSX_NS}is"
+    sheet_data_tag = f"{XLSX_NS}sheetData"
+    sheet_data = None
+    parser = ET.XMLPullParser(events=("start", "end"))
+    with z.open(sheet_name) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            for event, elem in parser.read_events():
+                if event == "start":
+                    if elem.tag == sheet_data_tag:
+                        sheet_data = elem
+                    continue
+                if elem.tag != row_tag:
+                    continue
+                cells = {}
+                for position, c in enumerate(elem.iter(c_tag)):
+                    ref = c.get("r")
+                    col = ref.rstrip("0123456789") if ref else _xlsx_col_name(position)
+                    cell_type = c.get("t")
+                    if cell_type == "inlineStr":
+                        is_node = c.find(is_tag)
+                        value = _xlsx_string_item(is_node) if is_node is not None else None
+                    else:
+                        v = c.find(v_tag)
+                        value = v.text if v is not None else None
+                        if value is not None and cell_type == "s":
+                            value = shared_strings[int(value)]
+                    if value:
+                        value = value.strip()
+                        if value:
+                            cells[col] = value
+                if sheet_data is not None:
+                    sheet_data.clear()
+                else:
+                    elem.clear()
+                yield cells
+    parser.close()
+
+def read_xlsx_columns(fileobj, column_names, skip_header=None):
+    # column_names: {"A": "식사일자", ...} / skip_header: (열 문자, 제목 값) 인 행은 건너뜀
+    with zipfile.ZipFile(fileobj) as z:
+        sheet_name = find_first_xlsx_sheet(z)
+        if sheet_name is None:
+            return None
+        shared_strings = read_xlsx_shared_strings(z)
+        columns = {name: [] for name in column_names.values()}
+        for cells in iter_xlsx_rows(z, sheet_name, shared_strings):
+            if not cells:
+                continue
+            if skip_header and cells.get(skip_header[0]) == skip_header[1]:
+                continue
+            for letter, name in column_names.items():
+                columns[name].append(cells.get(letter))
+    return pd.DataFrame(columns)
+
+def parse_meal_dates(values):
+    # 문자열 날짜와 엑셀 날짜 일련번호(예: 45678)를 함께 처리
+    serial = pd.to_numeric(values, errors="coerce")
+    is_serial = serial.between(1, 100000)
+    parsed = pd.to_datetime(values.where(~is_serial))
+    if is_serial.any():
+        parsed = parsed.where(~is_serial, pd.to_datetime(serial.where(is_serial), unit="D", origin="1899-12-30"))
+    return parsed.dt.strftime('%Y-%m-%d')
+
+# ===== 실적 대조 연산 (벡터화) =====
+COMPARE_COLUMNS = ['식사일자', '이름', '부서', '식사구분']
+COMPARE_KEYS = ['식사일자', '이름', '식사구분']
+PARTNER_DEPTS = ['DEX', 'FBF-ENG', '하이테크주택', '신명전력', '주노텍']
+MEAL_LABELS = {'breakfast': '조식', 'lunch': '중식', 'dinner': '석식'}
+
+def normalize_names(values):
+    # 이름 끝의 영문/숫자 구분자(예: 홍길동A) 제거 후 공백 제거
+    names = values.fillna("").astype(str).str.strip()
+    names = names.str.replace(r'([가-힣]{2,4})[a-zA-Z0-9]$', r'\1', regex=True)
+    return names.str.replace(r'\s+', '', regex=True)
+
+def normalize_depts(values):
+    # 괄호 안 부가 정보(예: 생산팀(본사)) 제거
+    depts = values.fillna("").astype(str).str.strip()
+    return depts.str.replace(r'\(.*?\)', '', regex=True).str.strip()
+
+def expand_applied_meals(df_db):
+    # 신청 행의 조/중/석 플래그를 식사 1건당 1행으로 펼칩니다 (원래 행 순서, 조→중→석 순 유지).
+    melted = df_db.melt(id_vars=['식사일자', '이름', '부서'], value_vars=list(MEAL_LABELS),
+                        var_name='식사구분', value_name='신청', ignore_index=False)
+    melted = melted[melted['신청'] == 1].sort_index(kind='stable')
+    melted['식사구분'] = melted['식사구분'].map(MEAL_LABELS)
+    return melted[COMPARE_COLUMNS].reset_index(drop=True)
+
+def reconcile_meals(df_applied, df_actual):
+    # 한 번의 outer 병합으로 노쇼(신청O/실적X)와 미신청(신청X/실적O)을 함께 구합니다.
+    merged = pd.merge(
+        df_applied[COMPARE_COLUMNS].assign(_applied_pos=range(len(df_applied))),
+        df_actual[COMPARE_COLUMNS].assign(_actual_pos=range(len(df_actual))),
+        on=COMPARE_KEYS, how='outer', indicator=True, suffixes=('_applied', '_actual'),
+    )
+    no_show = (merged[merged['_merge'] == 'left_only']
+               .sort_values('_applied_pos', kind='stable')
+               .rename(columns={'부서_applied': '부서'})[COMPARE_COLUMNS]
+               .reset_index(drop=True))
+    unreg = merged[merged['_merge'] == 'right_only'].rename(columns={'부서_actual': '부서'})
+    unreg = (unreg[~unreg['부서'].isin(PARTNER_DEPTS)]
+             .sort_values('_actual_pos', kind='stable')[COMPARE_COLUMNS]
+             .reset_index(drop=True))
+    partner_summary = (df_actual[df_actual['부서'].isin(PARTNER_DEPTS)]
+                       .groupby(['식사일자', '부서', '식사구분']).size().reset_index(name='인원수'))
+    return no_show, unreg, partner_summary
+
 # [API 개편] 특수 서식 포맷 자료와 정식 XLSX를 통합 판별하는 정산 엔진
+# ===== 대조 결과 보관소 =====
+# 업로드 파일의 SHA-256을 id로 <id>.xlsx(결과 통합문서)와 <id>.json(요약/목록)을 저장합니다.
+# 같은 파일이 다시 올라오면 신청 데이터 지문이 같을 때 작업 없이 저장된 결과를 돌려줍니다.
+COMPARE_ARTIFACT_ID = re.compile(r"^[0-9a-f]{64}$")
+COMPARE_LISTS = {"no_show": "no_show_list", "unreg": "unreg_list", "partner": "partner_list"}
+_compare_summary_cache = OrderedDict()
+_compare_summary_lock = threading.Lock()
+
+def compare_artifact_paths(artifact_id):
+    base = os.path.join(COMPARE_ARTIFACT_DIR, artifact_id)
+    return base + ".xlsx", base + ".json"
+
+def save_upload_with_hash(file_storage, chunk_size=1 << 20):
+    # 업로드를 디스크로 흘려 쓰면서 동시에 해시를 계산합니다.
+    digest = hashlib.sha256()
+    upload_path = os.path.join(JOB_RESULT_DIR, f"upload_{uuid.uuid4().hex}.bin")
+    with open(upload_path, "wb") as out:
+        while True:
+            chunk = file_storage.stream.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+    return upload_path, digest.hexdigest()
+
+def compare_data_fingerprint(conn, start, end):
+    # 대조 기간의 신청 내역(이름/부서 포함)을 날짜·직원 순으로 훑어 만든 SHA-256 요약입니다.
+    # 한 칸이라도 바뀌면 값이 달라지므로, 같은 값이면 저장된 대조 결과를 그대로 재사용해도 됩니다.
+    digest = hashlib.sha256()
+    employees = conn.execute("SELECT version FROM cache_versions WHERE name = 'employees'").fetchone()
+    digest.update(f"employees:{employees[0] if employees else 0}\n".encode())
+    rows = conn.execute("""
+        SELECT m.date, m.user_id, e.name, e.dept, m.breakfast, m.lunch, m.dinner
+        FROM meals m LEFT JOIN employees e ON m.user_id = e.id
+        WHERE m.date BETWEEN ? AND ?
+        ORDER BY m.date, m.user_id
+    """, (start, end))
+    while True:
+        chunk = rows.fetchmany(5000)
+        if not chunk:
+            break
+        for row in chunk:
+            digest.update("\x1f".join("" if value is None else str(value) for value in row).encode("utf-8"))
+            digest.update(b"\n")
+    return digest.hexdigest()
+
+def load_compare_summary(artifact_id):
+    if not COMPARE_ARTIFACT_ID.match(artifact_id or ""):
+        return None
+    _, json_path = compare_artifact_paths(artifact_id)
+    try:
+        mtime = os.path.getmtime(json_path)
+    except OSError:
+        return None
+    with _compare_summary_lock:
+        cached = _compare_summary_cache.get(artifact_id)
+        if cached and cached[0] == mtime:
+            _compare_summary_cache.move_to_end(artifact_id)
+            return cached[1]
+    with open(json_path, encoding="utf-8") as f:
+        summary = json.load(f)
+    with _compare_summary_lock:
+        _compare_summary_cache[artifact_id] = (mtime, summary)
+        while len(_compare_summary_cache) > 8:
+            _compare_summary_cache.popitem(last=False)
+    return summary
+
+def find_fresh_compare_artifact(artifact_id):
+    summary = load_compare_summary(artifact_id)
+    if summary is None or not os.path.exists(compare_artifact_paths(artifact_id)[0]):
+        return None
+    conn = get_db_connection(readonly=True)
+    try:
+        fingerprint = compare_data_fingerprint(conn, summary["start_date"], summary["end_date"])
+    finally:
+        conn.close()
+    return summary if fingerprint == summary.get("fingerprint") else None
+
+def compare_artifact_overview(artifact_id, summary):
+    return {
+        "artifact_id": artifact_id,
+        "no_show_count": summary["no_show_count"],
+        "unreg_count": summary["unreg_count"],
+        "partner_count": summary["partner_count"],
+        "start_date": summary["start_date"],
+        "end_date": summary["end_date"],
+        "file_name": summary["file_name"],
+        "created_at": summary.get("created_at"),
+        "summary_url": f"/admin/stats/compare-auto/{artifact_id}",
+        "download_url": f"/admin/stats/compare-auto/{artifact_id}/download",
+    }
+
+def cleanup_compare_artifacts():
+    cutoff = time.time() - COMPARE_ARTIFACT_KEEP_DAYS * 86400
+    for name in os.listdir(COMPARE_ARTIFACT_DIR):
+        path = os.path.join(COMPARE_ARTIFACT_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except FileNotFoundError:
+            # 다른 워커가 먼저 지운 파일은 건너뜁니다.
+            continue
+
+def build_compare_report(job, params):
+    upload_path, artifact_id = params["upload_path"], params["artifact_id"]
+    try:
+        job.progress(5, "실적 파일 분석 중")
+        with open(upload_path, "rb") as upload_stream:
+            if zipfile.is_zipfile(upload_stream):
+                print("📊 [데이터 라이브러리] 특수 포맷 실적 자료 데이터 분석을 가동합니다.")
+                upload_stream.seek(0)
+                df_actual = read_xlsx_columns(
+                    upload_stream,
+                    {'A': '식사일자', 'B': '이름', 'C': '부서', 'D': '식사구분'},
+                    skip_header=('A', "식사일자"),
+                )
+                if df_actual is None:
+                    raise JobError("실적 데이터 파일 내부에 유효한 데이터 구조가 없습니다.")
+            else:
+                print("📊 [표준 로드 라이브러리] 표준형 엑셀(XLSX) 포맷으로 실적 데이터를 변환합니다.")
+                upload_stream.seek(0)
+                df_actual = pd.read_excel(upload_stream, engine='openpyxl')
+                df_actual.columns = df_actual.columns.str.strip()
+                if '조직' in df_actual.columns: df_actual.rename(columns={'조직': '부서'}, inplace=True)
+    finally:
+        if os.path.exists(upload_path): os.remove(upload_path)
+
+    job.progress(35, f"실적 {len(df_actual)}건 정규화 중")
+    # 💡 "식사일자" 글자가 필터링되므로, 아래 날짜 변환이 에러 없이 깨끗하게 통과합니다.
+    df_actual['부서'] = normalize_depts(df_actual['부서'])
+    df_actual['이름'] = normalize_names(df_actual['이름'])
+    df_actual['식사일자'] = parse_meal_dates(df_actual['식사일자'])
+
+    start_date, end_date = df_actual['식사일자'].min(), df_actual['식사일자'].max()
+
+    conn = get_db_connection(readonly=True)
+    try:
+        df_db = pd.read_sql_query("SELECT m.date as 식사일자, e.name as 이름, e.dept as 부서, m.breakfast, m.lunch, m.dinner FROM meals m JOIN employees e ON m.user_id = e.id WHERE m.date BETWEEN ? AND ?", conn, params=(start_date, end_date))
+        fingerprint = compare_data_fingerprint(conn, start_date, end_date)
+    finally:
+        conn.close()
+
+    job.progress(55, "신청 내역과 대조 중")
+    df_db['부서'] = normalize_depts(df_db['부서'])
+    df_db['이름'] = normalize_names(df_db['이름'])
+    df_applied = expand_applied_meals(df_db)
+    no_show, unreg, partner_summary = reconcile_meals(df_applied, df_actual)
+
+    job.progress(80, "결과 엑셀 작성 중")
+    xlsx_path, json_path = compare_artifact_paths(artifact_id)
+    # 임시 파일에 쓴 뒤 rename 하여, 동시에 읽는 요청이 반쯤 쓰인 파일을 보지 않게 합니다.
+    with pd.ExcelWriter(job.result_path, engine='openpyxl') as writer:
+        no_show.to_excel(writer, sheet_name='노쇼 명단', index=False)
+        unreg.to_excel(writer, sheet_name='미신청 식사', index=False)
+        partner_summary.to_excel(writer, sheet_name='협력사 식사 현황', index=False)
+    os.replace(job.result_path, xlsx_path)
+
+    summary = {
+        "no_show_count": len(no_show), "unreg_count": len(unreg),
+        "partner_count": int(partner_summary['인원수'].sum()) if not partner_summary.empty else 0,
+        "start_date": start_date, "end_date": end_date,
+        "file_name": f"식수비교_{start_date}_{end_date}.xlsx",
+        "fingerprint": fingerprint, "created_at": now_kst_str(),
+        "no_show_list": no_show.to_dict(orient='records'),
+        "unreg_list": unreg.to_dict(orient='records'),
+        "partner_list": partner_summary.to_dict(orient='records'),
+    }
+    tmp_json = f"{json_path}.{job.job_id}.tmp"
+    with open(tmp_json, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, default=str)
+    os.replace(tmp_json, json_path)
+    return {"name": summary["file_name"], "path": xlsx_path, "meta": compare_artifact_overview(artifact_id, summary)}
+
 @app.route('/admin/stats/compare-auto', methods=['POST'])
 def compare_auto():
     if 'actual' not in request.files: 
         return jsonify({"error": "실적자료 누락"}), 400
     file_actual = request.files['actual']
-    partner_depts = ['DEX', 'FBF-ENG', '하이테크주택', '신명전력', '주노텍']
-
-    clean_name = lambda n: re.sub(r'\s+', '', re.sub(r'([가-힣]{2,4})[a-zA-Z0-9]$', r'\1', str(n).strip())) if n else ""
-    clean_dept = lambda d: re.sub(r'\(.*?\)', '', str(d).strip()).strip() if d else ""
 
     try:
-        file_bytes = file_actual.read()
-        in_memory_file = io.BytesIO(file_bytes)
-        
-        if zipfile.is_zipfile(in_memory_file):
-            print("📊 [데이터 라이브러리] 특수 포맷 실적 자료 데이터 분석을 가동합니다.")
-            in_memory_file.seek(0)
-            
-            with zipfile.ZipFile(in_memory_file, 'r') as z:
-                if "xl/worksheets/sheet1.xml" in z.namelist():
-                    xml_data = z.read("xl/worksheets/sheet1.xml")
-                    root_xml = ET.fromstring(xml_data)
-                    ns = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
-                    
-                    rows_list = []
-                    for row_node in root_xml.findall(f".//{{{ns}}}row"):
-                        row_cells = {}
-                        for c_node in row_node.findall(f".//{{{ns}}}c"):
-                            cell_ref = c_node.get("r")
-                            c_char = "".join([ch for ch in cell_ref if ch.isalpha()])
-                            
-                            t_node = c_node.find(f".//{{{ns}}}t")
-                            if t_node is not None and t_node.text:
-                                row_cells[c_char] = t_node.text.strip()
-                        
-                        if row_cells:
-                            # 💡 [핵심 버그 수정] 복사할 때 딸려 들어온 제목 행("식사일자")은 데이터 목록에 넣지 않고 패스합니다.
-                            if row_cells.get('A') == "식사일자":
-                                continue
-                            rows_list.append(row_cells)
-                    
-                    df_actual = pd.DataFrame(rows_list)
-                    df_actual.rename(columns={'A': '식사일자', 'B': '이름', 'C': '부서', 'D': '식사구분'}, inplace=True)
-                else:
-                    return jsonify({"error": "실적 데이터 파일 내부에 유효한 데이터 구조가 없습니다."}), 400
-        else:
-            print("📊 [표준 로드 라이브러리] 표준형 엑셀(XLSX) 포맷으로 실적 데이터를 변환합니다.")
-            in_memory_file.seek(0)
-            df_actual = pd.read_excel(in_memory_file, engine='openpyxl')
-            df_actual.columns = df_actual.columns.str.strip()
-            if '조직' in df_actual.columns: df_actual.rename(columns={'조직': '부서'}, inplace=True)
-
-        # 💡 "식사일자" 글자가 필터링되므로, 아래 pd.to_datetime 연산이 에러 없이 깨끗하게 통과합니다.
-        df_actual['부서'] = df_actual['부서'].apply(clean_dept)
-        df_actual['이름'] = df_actual['이름'].apply(clean_name)
-        df_actual['식사일자'] = pd.to_datetime(df_actual['식사일자']).dt.strftime('%Y-%m-%d')
-        
-        start_date, end_date = df_actual['식사일자'].min(), df_actual['식사일자'].max()
-
-        conn = sqlite3.connect(DATABASE)
-        df_db = pd.read_sql_query("SELECT m.date as 식사일자, e.name as 이름, e.dept as 부서, m.breakfast, m.lunch, m.dinner FROM meals m JOIN employees e ON m.user_id = e.id WHERE m.date BETWEEN ? AND ?", conn, params=(start_date, end_date))
-        conn.close()
-
-        df_db['부서'] = df_db['부서'].apply(clean_dept)
-        applied_rows = []
-        for _, row in df_db.iterrows():
-            c_name = clean_name(row['이름'])
-            if row['breakfast'] == 1: applied_rows.append({'식사일자': row['식사일자'], '이름': c_name, '부서': row['부서'], '식사구분': '조식'})
-            if row['lunch'] == 1: applied_rows.append({'식사일자': row['식사일자'], '이름': c_name, '부서': row['부서'], '식사구분': '중식'})
-            if row['dinner'] == 1: applied_rows.append({'식사일자': row['식사일자'], '이름': c_name, '부서': row['부서'], '식사구분': '석식'})
-        
-        df_applied = pd.DataFrame(applied_rows) if applied_rows else pd.DataFrame(columns=['식사일자', '이름', '부서', '식사구분'])
-        
-        if df_applied.empty:
-            no_show = pd.DataFrame(columns=['식사일자', '이름', '부서', '식사구분'])
-            unreg = df_actual.copy()
-        else:
-            no_show = pd.merge(df_applied, df_actual, on=['식사일자', '이름', '식사구분'], how='left', indicator=True)
-            no_show = no_show[no_show['_merge'] == 'left_only'].drop(columns=['_merge']).rename(columns={'부서_x':'부서'})
-            if not no_show.empty:
-                no_show = no_show[['식사일자', '이름', '부서', '식사구분']]
-
-            unreg = pd.merge(df_applied, df_actual, on=['식사일자', '이름', '식사구분'], how='right', indicator=True)
-            unreg = unreg[unreg['_merge'] == 'right_only'].drop(columns=['_merge']).rename(columns={'부서_y':'부서'})
-            unreg = unreg[~unreg['부서'].isin(partner_depts)]
-            if not unreg.empty:
-                unreg = unreg[['식사일자', '이름', '부서', '식사구분']]
-
-        partner_summary = df_actual[df_actual['부서'].isin(partner_depts)].groupby(['식사일자', '부서', '식사구분']).size().reset_index(name='인원수')
-
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            no_show.to_excel(writer, sheet_name='노쇼 명단', index=False)
-            unreg.to_excel(writer, sheet_name='미신청 식사', index=False)
-            partner_summary.to_excel(writer, sheet_name='협력사 식사 현황', index=False)
-
-        output.seek(0)
-        excel_base64 = base64.b64encode(output.getvalue()).decode('utf-8')
-        return jsonify({"success": True, "summary": {"no_show_count": len(no_show), "unreg_count": len(unreg), "partner_count": int(partner_summary['인원수'].sum()) if not partner_summary.empty else 0, "start_date": start_date, "end_date": end_date, "no_show_list": no_show.to_dict(orient='records'), "unreg_list": unreg.to_dict(orient='records'), "partner_list": partner_summary.to_dict(orient='records')}, "excel_file": excel_base64, "file_name": f"식수비교_{start_date}_{end_date}.xlsx"})
+        upload_path, artifact_id = save_upload_with_hash(file_actual)
+        summary = None if request.args.get("refresh") == "1" else find_fresh_compare_artifact(artifact_id)
+        if summary is not None:
+            os.remove(upload_path)
+            print(f"📦 [대조] 동일 실적 파일 결과 재사용 ({artifact_id[:12]})")
+            return jsonify({"success": True, "cached": True, **compare_artifact_overview(artifact_id, summary)}), 200
+        cleanup_compare_artifacts()
+        return job_accepted_response(submit_job("compare_auto", {"upload_path": upload_path, "artifact_id": artifact_id}))
     except Exception as e:
         print("❌ 위장 데이터 연산 및 대조 분석 실패:", e)
         return jsonify({"error": str(e)}), 500
 
+@app.route('/admin/stats/compare-auto/<artifact_id>', methods=['GET'])
+def get_compare_summary(artifact_id):
+    # list=no_show|unreg|partner 와 page/per_page로 목록을 나누어 조회합니다.
+    summary = load_compare_summary(artifact_id)
+    if summary is None:
+        return jsonify({"error": "대조 결과를 찾을 수 없습니다."}), 404
+    body = compare_artifact_overview(artifact_id, summary)
+    list_name = request.args.get("list")
+    if list_name:
+        if list_name not in COMPARE_LISTS:
+            return jsonify({"error": "list는 no_show, unreg, partner 중 하나여야 합니다."}), 400
+        page = max(request.args.get("page", 1, type=int), 1)
+        per_page = min(max(request.args.get("per_page", 100, type=int), 1), COMPARE_PAGE_MAX)
+        rows = summary[COMPARE_LISTS[list_name]]
+        body.update({
+            "list": list_name, "page": page, "per_page": per_page, "total": len(rows),
+            "items": rows[(page - 1) * per_page: page * per_page],
+        })
+    return jsonify(body), 200
+
+@app.route('/admin/stats/compare-auto/<artifact_id>/download', methods=['GET'])
+def download_compare_artifact(artifact_id):
+    summary = load_compare_summary(artifact_id)
+    xlsx_path = compare_artifact_paths(artifact_id)[0] if summary else None
+    if summary is None or not os.path.exists(xlsx_path):
+        return jsonify({"error": "대조 결과를 찾을 수 없습니다."}), 404
+    # send_file은 파일을 나누어 스트리밍하고 ETag/Range 요청도 처리합니다.
+    return send_file(xlsx_path, as_attachment=True, download_name=summary["file_name"],
+                     mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                     conditional=True)
+
 @app.route("/admin/stats/period/excel", methods=["GET"])
+@conditional_get()
 def download_stats_period_excel():
     start, end = request.args.get("start"), request.args.get("end")
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT date, SUM(breakfast) AS breakfast, SUM(lunch) AS lunch, SUM(dinner) AS dinner FROM (SELECT date, breakfast, lunch, dinner FROM meals UNION ALL SELECT date, breakfast, lunch, dinner FROM visitors) WHERE date BETWEEN ? AND ? GROUP BY date ORDER BY date", (start, end))
-    rows = cur.fetchall()
-    conn.close()
-
-    output = BytesIO()
-    df = pd.DataFrame([dict(r) for r in rows])
-    df.to_excel(output, index=False)
-    output.seek(0)
-    return send_file(output, as_attachment=True, download_name="period_stats.xlsx")
+    rows = iter_query_rows("SELECT period AS date, breakfast, lunch, dinner FROM meal_counts_daily WHERE period BETWEEN ? AND ? AND row_count > 0 ORDER BY period", (start, end))
+    return export_response([("Sheet1", ["date", "breakfast", "lunch", "dinner"], rows)], "period_stats.xlsx")
 
 @app.route("/admin/graph/week_trend")
+@conditional_get()
 def graph_week_trend():
     start, end = request.args.get("start"), request.args.get("end")
-    conn = get_db_connection()
-    cursor = conn.execute("SELECT strftime('%Y-%m-%d', date) as label, strftime('%w', date) as weekday, SUM(breakfast) as breakfast, SUM(lunch) as lunch, SUM(dinner) as dinner FROM (SELECT date, breakfast, lunch, dinner FROM meals UNION ALL SELECT date, breakfast, lunch, dinner FROM visitors) WHERE date BETWEEN ? AND ? GROUP BY date ORDER BY date", (start, end))
+    conn = get_db_connection(readonly=True)
+    cursor = conn.execute("SELECT strftime('%Y-%m-%d', period) as label, strftime('%w', period) as weekday, breakfast, lunch, dinner FROM meal_counts_daily WHERE period BETWEEN ? AND ? AND row_count > 0 ORDER BY period", (start, end))
     res = [dict(row) for row in cursor.fetchall()]
     conn.close()
     return jsonify(res)
 
-@app.route("/admin/stats/dept_summary")
-def get_dept_summary():
+@app.route("/admin/graph/trend")
+@conditional_get()
+def graph_trend():
+    # 장기 추이 차트용: unit=week(주 시작 월요일) 또는 month(YYYY-MM) 단위 사전 집계값
     start, end = request.args.get("start"), request.args.get("end")
-    conn = get_db_connection()
-    m_rows = conn.execute("SELECT e.dept, e.type, m.breakfast, m.lunch, m.dinner FROM meals m JOIN employees e ON m.user_id = e.id WHERE m.date BETWEEN ? AND ?", (start, end)).fetchall()
-    v_rows = conn.execute("SELECT e.dept, v.type, v.breakfast, v.lunch, v.dinner FROM visitors v JOIN employees e ON v.applicant_id = e.id WHERE v.date BETWEEN ? AND ?", (start, end)).fetchall()
+    unit = request.args.get("unit", "week")
+    table = {"week": "meal_counts_weekly", "month": "meal_counts_monthly"}.get(unit)
+    if not start or not end or not table:
+        return jsonify({"error": "start, end, unit(week|month)을 확인하세요."}), 400
+
+    if unit == "week":
+        try:
+            start_d = datetime.strptime(start, "%Y-%m-%d").date()
+        except ValueError:
+            return jsonify({"error": "날짜 형식이 올바르지 않습니다."}), 400
+        start_key, end_key = str(start_d - timedelta(days=start_d.weekday())), end
+    else:
+        start_key, end_key = start[:7], end[:7]
+
+    conn = get_db_connection(readonly=True)
+    cursor = conn.execute(f"SELECT period AS label, breakfast, lunch, dinner FROM {table} WHERE period BETWEEN ? AND ? AND row_count > 0 ORDER BY period", (start_key, end_key))
+    res = [dict(row) for row in cursor.fetchall()]
     conn.close()
+    return jsonify(res)
 
-    summary = defaultdict(lambda: {"breakfast": 0, "lunch": 0, "dinner": 0})
-    for row in m_rows + v_rows:
-        dept, t = row["dept"], row["type"]
-        if t == "방문자": dept = f"{dept[:2]}(방문자)"
-        summary[(dept, t)]["breakfast"] += row["breakfast"]
-        summary[(dept, t)]["lunch"] += row["lunch"]
-        summary[(dept, t)]["dinner"] += row["dinner"]
+# ===== 통계 공용 쿼리 =====
+# JSON 응답과 엑셀 다운로드가 같은 집계 결과를 쓰도록 쿼리를 한곳에 모읍니다.
+def query_dept_summary(conn, start, end):
+    rows = conn.execute("""
+        SELECT CASE WHEN type = '방문자' THEN substr(dept, 1, 2) || '(방문자)' ELSE dept END AS dept_label,
+               type,
+               IFNULL(SUM(breakfast), 0) AS breakfast,
+               IFNULL(SUM(lunch), 0)     AS lunch,
+               IFNULL(SUM(dinner), 0)    AS dinner
+        FROM (
+            -- 신청자별로 먼저 합산한 뒤 직원 정보와 조인해 조인 횟수를 인원 수 수준으로 줄입니다.
+            SELECT e.dept, e.type, m.breakfast, m.lunch, m.dinner
+            FROM (SELECT user_id, SUM(breakfast) AS breakfast, SUM(lunch) AS lunch, SUM(dinner) AS dinner
+                  FROM meals WHERE date BETWEEN ? AND ? GROUP BY user_id) m
+            JOIN employees e ON m.user_id = e.id
+            UNION ALL
+            SELECT e.dept, v.type, v.breakfast, v.lunch, v.dinner
+            FROM (SELECT applicant_id, type, SUM(breakfast) AS breakfast, SUM(lunch) AS lunch, SUM(dinner) AS dinner
+                  FROM visitors WHERE date BETWEEN ? AND ? GROUP BY applicant_id, type) v
+            JOIN employees e ON v.applicant_id = e.id
+        )
+        GROUP BY dept_label, type
+        ORDER BY dept_label, type
+    """, (start, end, start, end)).fetchall()
+    return [{"dept": r["dept_label"], "type": r["type"], "breakfast": r["breakfast"], "lunch": r["lunch"], "dinner": r["dinner"]} for r in rows]
 
-    return jsonify([{"dept":k[0],"type":k[1],"breakfast":v["breakfast"],"lunch":v["lunch"],"dinner":v["dinner"]} for k,v in summary.items()]), 200
+@app.route("/admin/stats/dept_summary")
+@conditional_get()
+def get_dept_summary():
+    start, end = request.args.get("start"), request.args.get("end")
+    conn = get_db_connection(readonly=True)
+    try:
+        summary = query_dept_summary(conn, start, end)
+    finally:
+        conn.close()
+    return jsonify(summary), 200
 
 @app.route("/admin/stats/dept_summary/excel")
+@conditional_get()
 def download_dept_summary_excel():
     start, end = request.args.get("start"), request.args.get("end")
-    conn = get_db_connection()
-    m_rows = conn.execute("SELECT e.dept, e.type, m.breakfast, m.lunch, m.dinner FROM meals m JOIN employees e ON m.user_id = e.id WHERE m.date BETWEEN ? AND ?", (start, end)).fetchall()
-    v_rows = conn.execute("SELECT e.dept, v.type, v.breakfast, v.lunch, v.dinner FROM visitors v JOIN employees e ON v.applicant_id = e.id WHERE v.date BETWEEN ? AND ?", (start, end)).fetchall()
-    conn.close()
+    conn = get_db_connection(readonly=True)
+    try:
+        summary = query_dept_summary(conn, start, end)
+    finally:
+        conn.close()
 
-    summary = defaultdict(lambda: {"breakfast": 0, "lunch": 0, "dinner": 0})
-    for row in m_rows + v_rows:
-        dept, t = row["dept"], row["type"]
-        if t == "방문자": dept = f"{dept[:2]}(방문자)"
-        summary[(dept, t)]["breakfast"] += row["breakfast"]
-        summary[(dept, t)]["lunch"] += row["lunch"]
-        summary[(dept, t)]["dinner"] += row["dinner"]
+    headers = ["dept", "type", "breakfast", "lunch", "dinner"]
+    rows = ([item[key] for key in headers] for item in summary)
+    return export_response([("Sheet1", headers, rows)], "dept_summary.xlsx")
 
-    df = pd.DataFrame([{"dept":k[0],"type":k[1],"breakfast":v["breakfast"],"lunch":v["lunch"],"dinner":v["dinner"]} for k,v in summary.items()])
-    output = BytesIO()
-    df.to_excel(output, index=False)
-    output.seek(0)
-    return send_file(output, as_attachment=True, download_name="dept_summary.xlsx")
+def get_weekly_dept_roster():
+    # 부서 구성은 직원 명부 캐시와 함께 직원 정보가 바뀔 때만 다시 계산됩니다.
+    return get_employee_directory().weekly_roster()
+
+MEALS_IN_RANGE_SQL = "SELECT date, user_id, breakfast, lunch, dinner FROM meals WHERE date BETWEEN ? AND ?"
 
 @app.route("/admin/stats/weekly_dept")
+@conditional_get()
 def weekly_dept_stats():
     start, end = request.args.get("start"), request.args.get("end")
-    conn = get_db_connection()
-    employees = conn.execute("SELECT id, name, dept, type, region FROM employees").fetchall()
-    dept_members = defaultdict(list)
-    for e in employees: dept_members[(e["dept"], e["type"], e["region"])].append(e["id"])
-
-    dept_map = {}
-    for (dept, type_, region), ids in dept_members.items():
-        if type_ == "직영" and region != "에코센터": continue
-        dept_map[dept] = {"type": type_, "dept": dept, "display_dept": dept, "total": len(ids), "days": {}}
-    
-    meal_rows = conn.execute("SELECT m.date, e.name, e.dept, e.type, e.region, m.breakfast, m.lunch, m.dinner FROM meals m JOIN employees e ON m.user_id = e.id WHERE m.date BETWEEN ? AND ?", (start, end)).fetchall()
-    for row in meal_rows:
-        date, name, dept, type_, region = row["date"], row["name"], row["dept"], row["type"], row["region"]
-        dept_key = f"{dept[:4]}(출장)" if type_ == "직영" and region != "에코센터" else dept
-        if dept_key not in dept_map:
-            dept_map[dept_key] = {"type": type_, "dept": dept_key, "display_dept": dept_key, "total": 1, "days": {}}
-        
-        for meal, key in zip(["breakfast", "lunch", "dinner"], ["b", "l", "d"]):
-            if row[meal] > 0:
-                dept_map[dept_key]["days"].setdefault(date, {"b":[], "l":[], "d":[]})[key].append(name)
+    try:
+        if (datetime.strptime(end, "%Y-%m-%d") - datetime.strptime(start, "%Y-%m-%d")).days > MAX_RANGE_DAYS:
+            return jsonify({"error": f"조회 기간은 최대 {MAX_RANGE_DAYS}일입니다."}), 400
+    except (TypeError, ValueError):
+        return jsonify({"error": "start, end 날짜 형식이 올바르지 않습니다."}), 400
+
+    depts, members = get_weekly_dept_roster()
+    dept_map = {dept: {"type": type_, "dept": dept, "display_dept": dept, "total": total, "days": {}}
+                for dept, (type_, total) in depts.items()}
+
+    # 직원 정보는 캐시에서 찾고, DB에서는 기간 내 신청 행만 조인 없이 읽습니다.
+    conn = get_db_connection(readonly=True)
+    try:
+        meal_rows = conn.execute(MEALS_IN_RANGE_SQL, (start, end)).fetchall()
+        visitor_rows = conn.execute("SELECT date, applicant_id, type, breakfast, lunch, dinner FROM visitors WHERE date BETWEEN ? AND ?", (start, end)).fetchall()
+    finally:
+        conn.close()
 
-    visitor_rows = conn.execute("SELECT v.date, v.breakfast, v.lunch, v.dinner, e.name, e.dept, v.type FROM visitors v JOIN employees e ON v.applicant_id = e.id WHERE v.date BETWEEN ? AND ?", (start, end)).fetchall()
-    for row in visitor_rows:
-        date, name, dept, vtype = row["date"], row["name"], row["dept"], row["type"]
+    for date, user_id, b, l, d in meal_rows:
+        member = members.get(user_id)
+        if member is None: continue
+        name, dept, type_, region = member
+        dept_key = f"{dept[:4]}(출장)" if type_ == "직영" and region != "에코센터" else dept
+        entry = dept_map.get(dept_key)
+        if entry is None:
+            entry = dept_map[dept_key] = {"type": type_, "dept": dept_key, "display_dept": dept_key, "total": 1, "days": {}}
+        if b > 0 or l > 0 or d > 0:
+            day = entry["days"].setdefault(date, {"b": [], "l": [], "d": []})
+            if b > 0: day["b"].append(name)
+            if l > 0: day["l"].append(name)
+            if d > 0: day["d"].append(name)
+
+    for date, applicant_id, vtype, b, l, d in visitor_rows:
+        member = members.get(applicant_id)
+        if member is None: continue
+        name, dept = member[0], member[1]
         dept_key = f"{dept[:2]}(방문자)" if vtype == "방문자" else dept
-        if dept_key not in dept_map:
-            dept_map[dept_key] = {"type": vtype, "dept": dept_key, "display_dept": dept_key, "total": 1, "days": {}}
-        
-        for meal, key in zip(["breakfast", "lunch", "dinner"], ["b", "l", "d"]):
-            if row[meal] > 0:
-                dept_map[dept_key]["days"].setdefault(date, {"b":[], "l":[], "d":[]})[key].append(f"{name}({row[meal]})")
+        entry = dept_map.get(dept_key)
+        if entry is None:
+            entry = dept_map[dept_key] = {"type": vtype, "dept": dept_key, "display_dept": dept_key, "total": 1, "days": {}}
+        if b > 0 or l > 0 or d > 0:
+            day = entry["days"].setdefault(date, {"b": [], "l": [], "d": []})
+            if b > 0: day["b"].append(f"{name}({b})")
+            if l > 0: day["l"].append(f"{name}({l})")
+            if d > 0: day["d"].append(f"{name}({d})")
 
-    conn.close()
     return jsonify(list(dept_map.values()))
 
 @app.route("/admin/stats/weekly_dept/excel")
+@conditional_get()
 def download_weekly_dept_excel():
     start, end = request.args.get("start"), request.args.get("end")
-    conn = get_db_connection()
-    rows = conn.execute("SELECT m.date, m.breakfast, m.lunch, m.dinner, e.name, e.dept, e.type FROM meals m JOIN employees e ON m.user_id = e.id WHERE m.date BETWEEN ? AND ?", (start, end)).fetchall()
-    conn.close()
-    
-    df = pd.DataFrame([dict(r) for r in rows])
-    output = BytesIO()
-    df.to_excel(output, index=False)
-    output.seek(0)
-    return send_file(output, as_attachment=True, download_name="weekly_dept.xlsx")
+    rows = iter_query_rows("SELECT m.date, m.breakfast, m.lunch, m.dinner, e.name, e.dept, e.type FROM meals m JOIN employees e ON m.user_id = e.id WHERE m.date BETWEEN ? AND ?", (start, end))
+    return export_response([("Sheet1", ["date", "breakfast", "lunch", "dinner", "name", "dept", "type"], rows)], "weekly_dept.xlsx")
+
+PIVOT_MEAL_HEADERS = ["식사일자", "이름", "부서", "식사 구분"]
+PIVOT_VISITOR_HEADERS = ["식사일자", "신청자", "부서", "구분", "조식", "중식", "석식"]
+
+def build_pivot_excel(job, params):
+    start, end = params["start"], params["end"]
+    conn = get_db_connection(readonly=True)
+    try:
+        df_meals = pd.read_sql_query("""
+            SELECT m.date AS 식사일자, e.name AS 이름, e.dept AS 부서, e.region, m.breakfast, m.lunch, m.dinner
+            FROM meals m JOIN employees e ON m.user_id = e.id
+            WHERE m.date BETWEEN ? AND ? AND e.type = '직영'
+            ORDER BY m.date, m.user_id
+        """, conn, params=(start, end))
+    finally:
+        conn.close()
+    job.progress(30, f"식수 {len(df_meals)}건 분류 중")
+
+    # 에코센터/출장 분리와 조·중·석 펼치기를 행 반복 없이 처리합니다.
+    is_eco = df_meals["region"] == "에코센터"
+    eco_center = expand_applied_meals(df_meals[is_eco])
+    tech_center = expand_applied_meals(df_meals[~is_eco])
+
+    # 방문자 신청은 식사별 인원 수를 그대로 별도 시트에 기록합니다.
+    visitor_rows = iter_query_rows("""
+        SELECT v.date, v.applicant_name, IFNULL(e.dept, ''), v.type, v.breakfast, v.lunch, v.dinner
+        FROM visitors v LEFT JOIN employees e ON v.applicant_id = e.id
+        WHERE v.date BETWEEN ? AND ? AND (v.breakfast > 0 OR v.lunch > 0 OR v.dinner > 0)
+        ORDER BY v.date, v.applicant_name
+    """, (start, end))
+
+    job.progress(70, "엑셀 작성 중")
+    counts = write_xlsx_export(job.result_path, [
+        ("직영_에코센터", PIVOT_MEAL_HEADERS, eco_center.itertuples(index=False, name=None)),
+        ("직영_출장", PIVOT_MEAL_HEADERS, tech_center.itertuples(index=False, name=None)),
+        ("방문자", PIVOT_VISITOR_HEADERS, visitor_rows),
+    ])
+    return {"name": "pivot_meals.xlsx", "meta": {"eco_rows": counts["직영_에코센터"], "tech_rows": counts["직영_출장"], "visitor_rows": counts["방문자"]}}
 
 @app.route("/admin/stats/pivot_excel")
 def download_pivot_excel():
-    start, end = request.args.get("start"), request.args.get("end")
-    conn = sqlite3.connect("db.sqlite")
-    df_meals = pd.read_sql_query("SELECT m.date, m.breakfast, m.lunch, m.dinner, e.name, e.dept, e.type, e.region FROM meals m JOIN employees e ON m.user_id = e.id WHERE m.date BETWEEN ? AND ?", conn, params=(start, end))
-    df_visitors = pd.read_sql_query("SELECT v.applicant_name, v.date, v.breakfast, v.lunch, v.dinner, v.type, e.dept, e.type as emp_type FROM visitors v LEFT JOIN employees e ON v.applicant_id = e.id WHERE v.date BETWEEN ? AND ?", conn, params=(start, end))
-    conn.close()
-
-    eco_center, tech_center = [], []
-    for _, row in df_meals.iterrows():
-        if row.get("type") != "직영": continue
-        base = [row["date"], row["name"], row["dept"]]
-        target = eco_center if row.get("region") == "에코센터" else tech_center
-        if int(row.get("breakfast", 0)) == 1: target.append(base + ["조식"])
-        if int(row.get("lunch", 0)) == 1: target.append(base + ["중식"])
-        if int(row.get("dinner", 0)) == 1: target.append(base + ["석식"])
-
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-        pd.DataFrame(eco_center, columns=["식사일자", "이름", "부서", "식사 구분"]).to_excel(writer, index=False, sheet_name="직영_에코센터")
-        pd.DataFrame(tech_center, columns=["식사일자", "이름", "부서", "식사 구분"]).to_excel(writer, index=False, sheet_name="직영_출장")
-    output.seek(0)
-    return send_file(output, as_attachment=True, download_name="pivot_meals.xlsx")
+    params = {"start": request.args.get("start"), "end": request.args.get("end")}
+    try:
+        return job_accepted_response(submit_job("pivot_excel", params))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
 # ============================================================================
 # 12. 방문자 전용 API 포트
@@ -1478,8 +3391,10 @@ def save_visitors():
         conn = get_db_connection()
         row = conn.execute("SELECT * FROM visitors WHERE applicant_id = ? AND date = ? AND type = ?", (applicant_id, date_str, vtype)).fetchone()
 
+        expired = {} if is_admin else is_meal_expired_bulk([(m, date_str) for m in ("breakfast", "lunch", "dinner")])
+
         def final_qty(old, new, meal):
-            if new is None or (not is_admin and is_expired(meal, date_str)): return old
+            if new is None or expired.get((meal, date_str)): return old
             return int(new)
 
         b_final = final_qty(row["breakfast"] if row else 0, breakfast, "breakfast")
@@ -1500,7 +3415,7 @@ def save_visitors():
 @app.route("/visitors", methods=["GET"])
 def get_visitors():
     applicant_id, start, end = request.args.get("id"), request.args.get("start"), request.args.get("end")
-    conn = get_db_connection()
+    conn = get_db_connection(readonly=True)
     rows = conn.execute("SELECT id, date, breakfast, lunch, dinner, reason, last_modified, type FROM visitors WHERE applicant_id = ? AND date BETWEEN ? AND ? ORDER BY date", (applicant_id, start, end)).fetchall()
     conn.close()
     return jsonify([dict(row) for row in rows]), 200
@@ -1522,18 +3437,29 @@ def delete_visitor_entry(vid):
     conn.close()
     return jsonify({"message": "삭제 완료"}), 200
 
+VISITORS_IN_RANGE_SQL = "SELECT * FROM visitors WHERE date BETWEEN ? AND ?"
+
 @app.route("/visitors/weekly")
+@conditional_get()
 def get_weekly_visitors():
     start, end = request.args.get("start"), request.args.get("end")
-    conn = get_db_connection()
-    rows = conn.execute("SELECT v.*, e.name AS applicant_name, e.dept, e.type FROM visitors v LEFT JOIN employees e ON v.applicant_id = e.id WHERE v.date BETWEEN ? AND ?", (start, end)).fetchall()
+    conn = get_db_connection(readonly=True)
+    rows = conn.execute(VISITORS_IN_RANGE_SQL, (start, end)).fetchall()
     conn.close()
-    return jsonify([dict(row) for row in rows])
+    # 신청자 부서는 직원 명부 캐시에서 붙입니다. 기존 LEFT JOIN 결과에서도 이름/유형은 visitors 값이 우선이었습니다.
+    directory = get_employee_directory()
+    result = []
+    for row in rows:
+        item = dict(row)
+        employee = directory.get(item["applicant_id"])
+        item["dept"] = employee["dept"] if employee else None
+        result.append(item)
+    return jsonify(result)
 
 @app.route("/visitors/check", methods=["GET"])
 def check_visitor_duplicate():
     applicant_id, date, vtype = request.args.get("id"), request.args.get("date"), request.args.get("type", "방문자")
-    conn = get_db_connection()
+    conn = get_db_connection(readonly=True)
     row = conn.execute("SELECT breakfast, lunch, dinner FROM visitors WHERE applicant_id = ? AND date = ? AND type = ?", (applicant_id, date, vtype)).fetchone()
     conn.close()
     if row: return jsonify({"exists": True, "record": dict(row)})
@@ -1566,6 +3492,31 @@ def update_visitor(visitor_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/admin/backups/runs")
+def get_backup_runs():
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 200)
+    conn = open_backup_log()
+    try:
+        rows = conn.execute("SELECT * FROM backup_runs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+    finally:
+        conn.close()
+    return jsonify([dict(row) for row in rows])
+
+@app.route("/admin/backups/chain")
+def get_backup_chains():
+    chains = []
+    for chain in list_backup_chains():
+        increments = chain.manifest["increments"]
+        chains.append({
+            "chain": chain.name,
+            "base_at": chain.manifest["base"]["at"],
+            "base_bytes": chain.manifest["base"]["bytes"],
+            "increments": len(increments),
+            "increment_bytes": chain.increment_bytes(),
+            "latest_point": increments[-1]["at"] if increments else chain.manifest["base"]["at"],
+        })
+    return jsonify({"interval_seconds": CONTINUOUS_BACKUP_SECONDS, "chains": chains})
+
 @app.route("/backup/test")
 def backup_test():
     backup_db_to_github()
@@ -1580,22 +3531,430 @@ def home():
     return "✅ Flask 백엔드 서버 정상 실행 중입니다."
 
 # ============================================================================
-# 13. 인프라 부트스트랩 지점 (스레드 세이프 최적화)
+# 13. 백그라운드 작업(Job) 서브시스템
 # ============================================================================
-backup_thread_started = False
+# 무거운 pandas/엑셀 작업은 프로세스 풀에서 실행하고, 진행 상황과 결과는 JOB_DB_PATH의 jobs 테이블에 남깁니다.
+# 요청 스레드는 작업 id만 돌려주므로 월말 대조 중에도 식수 신청 요청이 막히지 않습니다.
+JOBS_DDL = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        progress INTEGER NOT NULL DEFAULT 0,
+        message TEXT,
+        params TEXT,
+        result_path TEXT,
+        result_name TEXT,
+        result_meta TEXT,
+        error TEXT,
+        created_at TEXT,
+        started_at TEXT,
+        finished_at TEXT,
+        updated_at TEXT
+    )
+"""
+JOBS_INDEX_DDL = "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, updated_at)"
+
+_job_store_ready = set()
+_job_store_lock = threading.Lock()
+
+def open_job_store():
+    # 요청 워커와 작업 프로세스가 함께 쓰는 별도 파일입니다. 버전 카운터를 올리는 풀 커넥션은 쓰지 않습니다.
+    # WAL 전환과 테이블 생성은 프로세스마다 파일당 한 번만 합니다 (진행률 갱신/상태 조회마다 반복하지 않음).
+    if JOB_DB_PATH not in _job_store_ready:
+        os.makedirs(os.path.dirname(JOB_DB_PATH), exist_ok=True)
+    conn = sqlite3.connect(JOB_DB_PATH, timeout=DB_BUSY_TIMEOUT_MS / 1000)
+    conn.row_factory = sqlite3.Row
+    if JOB_DB_PATH not in _job_store_ready:
+        with _job_store_lock:
+            if JOB_DB_PATH not in _job_store_ready:
+                conn.execute("PRAGMA journal_mode = WAL")
+                conn.execute(JOBS_DDL)
+                conn.execute(JOBS_INDEX_DDL)
+                _job_store_ready.add(JOB_DB_PATH)
+    return conn
+
+class JobError(Exception):
+    """작업 실패 사유를 그대로 사용자에게 보여줄 때 사용합니다."""
+
+class JobContext:
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.result_path = os.path.join(JOB_RESULT_DIR, f"{job_id}.xlsx")
+
+    def progress(self, percent, message=""):
+        update_job(self.job_id, progress=int(percent), message=message)
+
+JOB_HANDLERS = {
+    "compare_auto": build_compare_report,
+    "pivot_excel": build_pivot_excel,
+    "meal_logs": build_meal_logs_excel,
+    "visitor_logs": build_visitor_logs_excel,
+}
+
+_job_pool = {"pid": None, "executor": None}
+_job_pool_lock = threading.Lock()
+
+def get_job_executor():
+    # fork된 gunicorn 워커마다 자기 풀을 만들고, 자식은 spawn으로 띄워 부모의 스레드/커넥션을 물려받지 않습니다.
+    with _job_pool_lock:
+        if _job_pool["pid"] != os.getpid() or _job_pool["executor"] is None:
+            _job_pool["executor"] = ProcessPoolExecutor(max_workers=JOB_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            _job_pool["pid"] = os.getpid()
+        return _job_pool["executor"]
+
+def reset_job_executor():
+    with _job_pool_lock:
+        _job_pool["executor"] = None
+
+def update_job(job_id, **fields):
+    fields["updated_at"] = now_kst_str()
+    assignments = ", ".join(f"{column} = ?" for column in fields)
+    conn = open_job_store()
+    try:
+        conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+def execute_job(job_id, kind, params, db_path, job_db_path):
+    # 작업 프로세스에서 실행됩니다.
+    global DATABASE, JOB_DB_PATH
+    DATABASE = db_path
+    JOB_DB_PATH = job_db_path
+    job = JobContext(job_id)
+    update_job(job_id, status="running", started_at=now_kst_str(), message="작업 시작")
+    try:
+        result = JOB_HANDLERS[kind](job, params)
+        update_job(job_id, status="done", progress=100, message="완료",
+                   result_path=result.get("path", job.result_path), result_name=result["name"],
+                   result_meta=json.dumps(result.get("meta", {}), ensure_ascii=False, default=str),
+                   finished_at=now_kst_str())
+    except Exception as e:
+        print(f"❌ [작업] {kind} 작업 실패 ({job_id}):", e)
+        if os.path.exists(job.result_path): os.remove(job.result_path)
+        update_job(job_id, status="failed", error=str(e), finished_at=now_kst_str())
+
+def _on_job_future_done(job_id, future):
+    # 작업 함수 안의 예외는 execute_job이 처리하므로, 여기에는 풀 자체의 장애만 남습니다.
+    error = future.exception()
+    if error is None:
+        return
+    if isinstance(error, BrokenProcessPool):
+        reset_job_executor()
+    update_job(job_id, status="failed", error=f"작업 프로세스 오류: {error}", finished_at=now_kst_str())
+
+def cleanup_expired_jobs():
+    cutoff = (datetime.now(KST) - timedelta(hours=JOB_RETENTION_HOURS)).strftime("%Y-%m-%d %H:%M:%S")
+    conn = open_job_store()
+    try:
+        rows = conn.execute("SELECT id, result_path FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?", (cutoff,)).fetchall()
+        for row in rows:
+            # 대조 결과처럼 작업 디렉터리 밖에 보관되는 산출물은 각자의 보관 정책을 따릅니다.
+            path = row["result_path"]
+            if path and os.path.dirname(path) == JOB_RESULT_DIR and os.path.exists(path):
+                os.remove(path)
+        conn.executemany("DELETE FROM jobs WHERE id = ?", [(row["id"],) for row in rows])
+        conn.commit()
+    finally:
+        conn.close()
+
+def submit_job(kind, params):
+    cleanup_expired_jobs()
+    job_id = uuid.uuid4().hex
+    now = now_kst_str()
+    conn = open_job_store()
+    try:
+        conn.execute("INSERT INTO jobs (id, kind, status, params, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?, ?)",
+                     (job_id, kind, json.dumps(params, ensure_ascii=False), now, now))
+        conn.commit()
+    finally:
+        conn.close()
+
+    try:
+        future = get_job_executor().submit(execute_job, job_id, kind, params, DATABASE, JOB_DB_PATH)
+    except (BrokenProcessPool, RuntimeError):
+        reset_job_executor()
+        future = get_job_executor().submit(execute_job, job_id, kind, params, DATABASE, JOB_DB_PATH)
+    future.add_done_callback(lambda f: _on_job_future_done(job_id, f))
+    print(f"🧾 [작업] {kind} 작업 등록 ({job_id})")
+    return job_id
+
+def job_accepted_response(job_id):
+    return jsonify({"job_id": job_id, "status": "queued", "status_url": f"/admin/jobs/{job_id}"}), 202
+
+def load_job(job_id):
+    conn = open_job_store()
+    try:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    job = dict(row)
+    if job["status"] in ("queued", "running"):
+        # 워커 재시작 등으로 갱신이 끊긴 작업은 실패로 정리합니다.
+        last_update = datetime.strptime(job["updated_at"], "%Y-%m-%d %H:%M:%S").replace(tzinfo=KST)
+        if datetime.now(KST) - last_update > timedelta(minutes=JOB_STALE_MINUTES):
+            job.update(status="failed", error="작업이 응답하지 않아 중단되었습니다.", finished_at=now_kst_str())
+            update_job(job_id, status="failed", error=job["error"], finished_at=job["finished_at"])
+    return job
+
+@app.route("/admin/jobs/<job_id>", methods=["GET"])
+def get_job_status(job_id):
+    job = load_job(job_id)
+    if job is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+    body = {key: job[key] for key in ("id", "kind", "status", "progress", "message", "error", "created_at", "started_at", "finished_at")}
+    if job["status"] == "done":
+        body["result"] = json.loads(job["result_meta"] or "{}")
+        body["file_name"] = job["result_name"]
+        body["download_url"] = f"/admin/jobs/{job_id}/download"
+    return jsonify(body), 200
+
+@app.route("/admin/jobs/<job_id>/download", methods=["GET"])
+def download_job_result(job_id):
+    job = load_job(job_id)
+    if job is None:
+        return jsonify({"error": "작업을 찾을 수 없습니다."}), 404
+    if job["status"] != "done":
+        return jsonify({"error": "작업이 아직 완료되지 않았습니다.", "status": job["status"]}), 409
+    if not job["result_path"] or not os.path.exists(job["result_path"]):
+        return jsonify({"error": "결과 파일이 만료되었습니다."}), 410
+    return send_file(job["result_path"], as_attachment=True, download_name=job["result_name"],
+                     mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+
+
+# ============================================================================
+# 14. 백업 스케줄러 (단일 리더)
+# ============================================================================
+# gunicorn 등 WSGI 서버로 배포할 때는 backup_worker.py를 별도 프로세스로 띄워 스케줄러를 돌립니다 (웹 워커는 스케줄러를 띄우지 않음).
+# app.py를 직접 실행하면 그 프로세스도 스케줄러를 띄우지만, scheduler.lock 파일 잠금을 잡은 프로세스 하나만 리더가 되어 작업을 실행합니다.
+# 리더 프로세스가 죽으면 OS가 잠금을 풀고, 대기 중인 프로세스가 SCHEDULER_POLL_SECONDS 안에 이어받습니다.
+# 실행 상태는 리더가 scheduler.json에 기록하므로 어느 워커에서든 /admin/backups/schedule로 볼 수 있습니다.
+def parse_kst(value):
+    return datetime.strptime(value, "%Y-%m-%d %H:%M:%S").replace(tzinfo=KST)
+
+class ScheduledJob:
+    def __init__(self, name, func, hours=None, interval=None):
+        self.name = name
+        self.func = func
+        self.hours = sorted(hours) if hours else None
+        self.interval = interval
+
+    def describe(self):
+        if self.interval:
+            return f"{self.interval}초마다"
+        if len(self.hours) == 24:
+            return "매시 정각"
+        return "매일 " + ", ".join(f"{h}시" for h in self.hours)
+
+    def next_run_after(self, moment):
+        if self.interval:
+            return moment + timedelta(seconds=self.interval)
+        for days in (0, 1):
+            day = moment + timedelta(days=days)
+            for hour in self.hours:
+                candidate = day.replace(hour=hour, minute=0, second=0, microsecond=0)
+                if candidate > moment:
+                    return candidate
+
+def create_daily_backup():
+    return create_db_snapshot("daily") or "failed"
+
+def run_backup_cleanup():
+    cleanup_expired_jobs()
+    cleanup_compare_artifacts()
+    return apply_backup_retention()
+
+# 같은 시각에 예정된 작업은 이 순서대로 실행됩니다.
+SCHEDULED_JOBS = [
+    ScheduledJob("daily_backup", create_daily_backup, hours=[0]),
+    ScheduledJob("snapshot_upload", backup_db_to_github, hours=BACKUP_SCHEDULE_HOURS),
+    ScheduledJob("cleanup", run_backup_cleanup, hours=range(24)),
+]
+if CONTINUOUS_BACKUP_SECONDS > 0:
+    SCHEDULED_JOBS.append(ScheduledJob("incremental", capture_incremental_backup, interval=CONTINUOUS_BACKUP_SECONDS))
+
+def load_scheduler_state():
+    try:
+        with open(SCHEDULER_STATE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+class BackupScheduler:
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.lock_file = None
+        self.lock_pid = None
+        self.state = None
+        self.next_runs = {}
+
+    @property
+    def is_leader(self):
+        return self.lock_file is not None and self.lock_pid == os.getpid()
+
+    def acquire_leadership(self):
+        if self.lock_file is not None:
+            if self.lock_pid == os.getpid():
+                return True
+            # fork로 물려받은 잠금 파일: flock은 열린 파일을 공유하므로 자식이 닫아도 부모의 잠금은 유지됩니다.
+            # 자식은 핸들을 버리고 처음부터 다시 잠금을 시도합니다 (부모가 살아 있으면 실패).
+            self.lock_file.close()
+            self.lock_file = self.lock_pid = None
+        os.makedirs(os.path.dirname(SCHEDULER_LOCK_PATH), exist_ok=True)
+        lock_file = open(SCHEDULER_LOCK_PATH, "a+")
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+        self.lock_file = lock_file
+        self.lock_pid = os.getpid()
+        self.take_over()
+        return True
+
+    def release_leadership(self):
+        # 잠금 파일을 닫으면 잠금이 풀리고, 대기 중인 다른 프로세스가 다음 폴링 때 리더가 됩니다.
+        if self.lock_file is not None and self.lock_pid == os.getpid():
+            self.lock_file.close()
+        self.lock_file = self.lock_pid = None
+
+    def take_over(self):
+        # 이전 리더가 남긴 마지막 실행 시각을 이어받아 다음 실행을 정합니다.
+        # 리더가 없던 사이 지나간 예약은 한 번만 즉시 따라잡습니다.
+        now = datetime.now(KST)
+        previous = load_scheduler_state().get("jobs", {})
+        self.state = {"leader": {"pid": os.getpid(), "since": now_kst_str(), "heartbeat_at": now_kst_str()}, "jobs": {}}
+        for job in self.jobs:
+            info = dict(previous.get(job.name, {}), schedule=job.describe(), running=False)
+            last = info.get("last_started_at")
+            if last:
+                self.next_runs[job.name] = job.next_run_after(parse_kst(last))
+            else:
+                self.next_runs[job.name] = now if job.interval else job.next_run_after(now)
+            info["next_run_at"] = self.next_runs[job.name].strftime("%Y-%m-%d %H:%M:%S")
+            self.state["jobs"][job.name] = info
+        self.save_state()
+        print(f"👑 [스케줄러] 리더 획득 (pid {os.getpid()}): " + ", ".join(f"{j.name}={self.state['jobs'][j.name]['next_run_at']}" for j in self.jobs))
+
+    def save_state(self):
+        tmp = f"{SCHEDULER_STATE_PATH}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, default=str)
+        os.replace(tmp, SCHEDULER_STATE_PATH)
+
+    def beat(self):
+        self.state["leader"]["heartbeat_at"] = now_kst_str()
+
+    def run_job(self, job):
+        # 작업이 SCHEDULER_POLL_SECONDS * 3보다 오래 걸려도 리더가 죽은 것으로 보이지 않도록 시작/종료 때 심장박동을 남깁니다.
+        info = self.state["jobs"][job.name]
+        info.update(last_started_at=now_kst_str(), running=True)
+        self.beat()
+        self.save_state()
+        started = time.perf_counter()
+        try:
+            result = job.func()
+            info.update(last_status="error" if result == "failed" else "ok", last_error=None, last_result=result)
+        except Exception as e:
+            info.update(last_status="error", last_error=str(e), last_result=None)
+            print(f"❌ [스케줄러] {job.name} 실행 중 오류:", e)
+        self.next_runs[job.name] = job.next_run_after(datetime.now(KST))
+        info.update(running=False, last_finished_at=now_kst_str(), runs=info.get("runs", 0) + 1,
+                    last_duration_ms=int((time.perf_counter() - started) * 1000),
+                    next_run_at=self.next_runs[job.name].strftime("%Y-%m-%d %H:%M:%S"))
+        self.beat()
+        self.save_state()
+
+    def run_due_jobs(self):
+        for job in self.jobs:
+            if self.next_runs[job.name] <= datetime.now(KST):
+                self.run_job(job)
+
+    def run_forever(self, stop_event=None):
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            if not self.acquire_leadership():
+                stop_event.wait(SCHEDULER_POLL_SECONDS)
+                continue
+            self.run_due_jobs()
+            self.beat()
+            self.save_state()
+            wait = min(self.next_runs.values()) - datetime.now(KST)
+            stop_event.wait(min(max(wait.total_seconds(), 1), SCHEDULER_POLL_SECONDS))
+
+backup_scheduler = BackupScheduler(SCHEDULED_JOBS)
+
+@app.route("/admin/backups/retention")
+def preview_backup_retention():
+    # 지금 보관 정책을 적용하면 남을/지워질 백업 목록 (실제로 지우지는 않음)
+    return jsonify(apply_backup_retention(dry_run=True))
+
+@app.route("/admin/backups/schedule")
+def get_backup_schedule():
+    state = load_scheduler_state()
+    leader = state.get("leader")
+    if leader:
+        silent = (datetime.now(KST) - parse_kst(leader["heartbeat_at"])).total_seconds()
+        leader = dict(leader, alive=silent < SCHEDULER_POLL_SECONDS * 3)
+    jobs = []
+    for job in SCHEDULED_JOBS:
+        jobs.append(dict(state.get("jobs", {}).get(job.name, {}), name=job.name, schedule=job.describe()))
+    return jsonify({"leader": leader, "this_process": {"pid": os.getpid(), "is_leader": backup_scheduler.is_leader}, "jobs": jobs})
+
+# ============================================================================
+# 15. 인프라 부트스트랩 지점 (스레드 세이프 최적화)
+# ============================================================================
+backup_thread_pid = None
 backup_thread_lock = threading.Lock()
 
 def start_backup_thread():
-    global backup_thread_started
+    # `python app.py`로 직접 실행할 때만 호출됩니다. WSGI 배포에서는 backup_worker.py가 스케줄러 프로세스입니다.
+    # 여러 번 호출되거나 backup_worker.py와 함께 떠 있어도 실제 작업은 리더 하나만 실행합니다.
+    # fork로 상속된 플래그에 속지 않도록 프로세스 ID로 시동 여부를 기억합니다.
+    global backup_thread_pid
     with backup_thread_lock:
-        if not backup_thread_started:
-            print("🚀 [백업] 안전망 분리: DB 백업 대기 워커 스레드 시동 완료")
-            t = threading.Thread(target=backup_worker_midnight, daemon=True)
-            t.start()
-            backup_thread_started = True
+        if backup_thread_pid != os.getpid():
+            print("🚀 [백업] 안전망 분리: 백업 스케줄러 스레드 시동 완료 (리더 선출 대기)")
+            threading.Thread(target=backup_scheduler.run_forever, daemon=True).start()
+            backup_thread_pid = os.getpid()
+
+@app.cli.command("rebuild-rollups")
+def rebuild_rollups_command():
+    # 사용법: flask --app app rebuild-rollups
+    conn = get_db_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        rebuild_meal_rollups(conn.cursor())
+        conn.commit()
+        print("✅ 식수 집계 테이블 재구성 완료")
+    finally:
+        conn.close()
+
+@app.cli.command("backup-incremental")
+def backup_incremental_command():
+    # 사용법: flask --app app backup-incremental
+    result = capture_incremental_backup(force=True)
+    print("✅ 증분 백업:", json.dumps(result, ensure_ascii=False))
+
+@app.cli.command("restore-db")
+@click.option("--at", "at", default=None, help="복원 시점 (KST 'YYYY-MM-DD HH:MM:SS'), 생략 시 최신")
+@click.option("--output", required=True, help="복원본을 쓸 경로 (운영 DB 경로는 사용 불가)")
+def restore_db_command(at, output):
+    # 사용법: flask --app app restore-db --at "2025-04-08 12:30:00" --output restored.sqlite
+    if os.path.abspath(output) == os.path.abspath(DATABASE):
+        raise click.UsageError("운영 중인 DB 위에 바로 복원할 수 없습니다. 서버를 내린 뒤 복원본으로 교체하세요.")
+    result = restore_backup_chain(output, at)
+    print(f"✅ {result['restored_at']} 시점으로 복원 완료: {output} "
+          f"({result['chain']}, 증분 {result['increments']}개, {result['duration_ms']}ms)")
+
+# gunicorn 등 WSGI 서버로 임포트될 때도 스키마 마이그레이션을 적용
+init_db()
 
 if __name__ == "__main__":
-    init_db()               
     start_backup_thread()   
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port, debug=False)
\ No newline at end of file
@@ -1,55 +1,13 @@
 # ✅ backup_worker.py
-from apscheduler.schedulers.blocking import BlockingScheduler
-from datetime import datetime, timedelta
-import shutil
-import os
-
-# ✅ 백업 실행 함수
-def backup_database():
-    now = datetime.now().strftime("%Y-%m-%d_%H-%M")
-    os.makedirs("backups", exist_ok=True)
-    shutil.copyfile("db.sqlite", f"backups/backup_{now}.db")
-    print(f"[✅ 백업 완료] backup_{now}.db")
-
-# ✅ 오래된 백업 삭제 함수
-def clean_old_backups(days=7):
-    cutoff = datetime.now().timestamp() - days * 86400
-    for file in os.listdir("backups"):
-        path = os.path.join("backups", file)
-        if file.endswith(".db") and os.path.getmtime(path) < cutoff:
-            os.remove(path)
-            print(f"[🧹 삭제됨] {file}")
-
-# ✅ 예약 작업 등록
-def job():
-    print("⏰ 자동 백업 시작")
-    backup_database()
-    clean_old_backups()
-
-# ✅ 스케줄러 실행 (매일 자정)
-sched = BlockingScheduler()
-sched.add_job(job, "cron", hour=0, minute=0)
-sched.start()
-
-# import os
-# import shutil
-# from datetime import datetime
-
-# def job():
-#     db_path = "db.sqlite"
-#     if not os.path.exists(db_path):
-#         print("❌ 백업 실패: db.sqlite 파일이 없습니다.")
-#         return
-
-#     today = datetime.now().strftime("%Y%m%d")
-#     backup_dir = "backups"
-#     os.makedirs(backup_dir, exist_ok=True)
-
-#     backup_file = os.path.join(backup_dir, f"backup_{today}.sqlite")
-#     shutil.copy2(db_path, backup_file)
-
-#     print(f"✅ DB 백업 완료: {backup_file}")
-
-# # 로컬에서 테스트 시 직접 실행
-# if __name__ == "__main__":
-#     job()
+# 백업·정리 예약 작업은 app.py의 단일 리더 스케줄러(SCHEDULED_JOBS)가 모두 맡습니다.
+#  - 매일 0시: 일일 백업(backups/backup_<시각>.db.gz)
+#  - 2, 5, 8 ... 23시: 스냅샷 + GitHub 업로드
+#  - 매시 정각: 보관 정책(단계별 보관 + 용량 한도) 적용
+#  - CONTINUOUS_BACKUP_SECONDS마다: 증분 백업
+# gunicorn 등 WSGI 서버로 배포할 때는 웹 워커가 스케줄러를 띄우지 않으므로, 이 스크립트를 별도 프로세스로 실행합니다.
+# `python app.py`로 띄운 서버가 이미 리더라면 대기하다가, 리더가 내려가면 이어받습니다 (중복 실행 없음).
+from app import backup_scheduler
+
+if __name__ == "__main__":
+    print("⏰ 백업 스케줄러 단독 실행")
+    backup_scheduler.run_forever()
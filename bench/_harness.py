@@ -0,0 +1,46 @@
+# 벤치마크 공용 준비: app.py를 임포트하기 전에 DB와 런타임 디렉터리를 임시 경로로 돌립니다.
+# 저장소 루트에서 `python bench/<스크립트>.py`로 실행하며, 운영 DB나 백업 폴더는 건드리지 않습니다.
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+BASE = tempfile.mkdtemp(prefix="mealdb-bench-")
+os.environ.setdefault("MEAL_DB_PATH", os.path.join(BASE, "db.sqlite"))
+os.environ.setdefault("JOB_RESULT_DIR", os.path.join(BASE, "job_results"))
+os.environ.setdefault("COMPARE_ARTIFACT_DIR", os.path.join(BASE, "artifacts", "compare"))
+os.environ.setdefault("SNAPSHOT_DIR", os.path.join(BASE, "db_backups"))
+os.environ.setdefault("DAILY_BACKUP_DIR", os.path.join(BASE, "backups"))
+os.environ.setdefault("MENU_UPLOAD_DIR", os.path.join(BASE, "menu"))
+os.environ.pop("GITHUB_TOKEN", None)
+
+import app as A  # noqa: E402
+
+client = A.app.test_client()
+
+
+def seed_employees(count, depts=7):
+    # 사번 E0000부터 count명. 다섯 명 중 한 명은 협력사, 세 명 중 한 명은 테크센터입니다.
+    conn = A.get_db_connection()
+    try:
+        conn.executemany("INSERT OR IGNORE INTO employees (id, name, dept, type, region, level) VALUES (?, ?, ?, ?, ?, ?)", [
+            (f"E{i:04d}", f"이름{i}", f"부서{i % depts}", "직영" if i % 5 else "협력사",
+             "에코센터" if i % 3 else "테크센터", 3 if i == 0 else 1)
+            for i in range(count)
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def median_seconds(fn, repeat=5):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times)
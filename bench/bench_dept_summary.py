@@ -0,0 +1,65 @@
+# 부서별 식수 요약(/admin/stats/dept_summary) 1년치 조회 시간과, 예전 파이썬 집계와의 결과 일치를 확인합니다.
+import random
+from collections import defaultdict
+from datetime import date, timedelta
+
+from _harness import A, client, median_seconds
+
+START, END = "2025-01-01", "2025-12-31"
+
+
+def seed():
+    random.seed(7)
+    employees = [(f"E{i:04d}", f"이름{i}", f"부서{i % 40}", random.choice(["직영", "직영", "직영", "협력사", "방문자"]), "에코센터")
+                 for i in range(600)]
+    days = [str(date(2025, 1, 1) + timedelta(days=k)) for k in range(365)]
+    conn = A.get_db_connection()
+    try:
+        conn.executemany("INSERT INTO employees (id, name, dept, type, region) VALUES (?, ?, ?, ?, ?)", employees)
+        conn.executemany("INSERT INTO meals (user_id, date, breakfast, lunch, dinner) VALUES (?, ?, ?, ?, ?)", [
+            (e[0], d, random.randint(0, 1), random.randint(0, 1), random.randint(0, 1))
+            for d in days for e in employees if random.random() < 0.7
+        ])
+        conn.executemany("INSERT INTO visitors (applicant_id, applicant_name, date, breakfast, lunch, dinner, reason, type) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [
+            (e[0], e[1], d, random.randint(0, 3), random.randint(0, 3), random.randint(0, 3), "회의", random.choice(["방문자", "협력사"]))
+            for d in days for e in employees[:60] if random.random() < 0.3
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def reference_summary(start, end):
+    # user-007 이전의 행 단위 파이썬 집계
+    conn = A.get_db_connection(readonly=True)
+    try:
+        m_rows = conn.execute("SELECT e.dept, e.type, m.breakfast, m.lunch, m.dinner FROM meals m JOIN employees e ON m.user_id = e.id WHERE m.date BETWEEN ? AND ?", (start, end)).fetchall()
+        v_rows = conn.execute("SELECT e.dept, v.type, v.breakfast, v.lunch, v.dinner FROM visitors v JOIN employees e ON v.applicant_id = e.id WHERE v.date BETWEEN ? AND ?", (start, end)).fetchall()
+    finally:
+        conn.close()
+    summary = defaultdict(lambda: {"breakfast": 0, "lunch": 0, "dinner": 0})
+    for row in m_rows + v_rows:
+        dept, type_ = row["dept"], row["type"]
+        if type_ == "방문자":
+            dept = f"{dept[:2]}(방문자)"
+        for meal in ("breakfast", "lunch", "dinner"):
+            summary[(dept, type_)][meal] += row[meal]
+    return sorted(({"dept": k[0], "type": k[1], **v} for k, v in summary.items()), key=lambda r: (r["dept"], r["type"]))
+
+
+def main():
+    seed()
+    url = f"/admin/stats/dept_summary?start={START}&end={END}"
+    new = sorted(client.get(url).get_json(), key=lambda r: (r["dept"], r["type"]))
+    assert new == reference_summary(START, END), "SQL 집계 결과가 예전 집계와 다릅니다"
+    print(f"결과 일치: {len(new)}개 (부서, 유형)")
+
+    print(f"예전 파이썬 집계 : {median_seconds(lambda: reference_summary(START, END)) * 1000:7.1f} ms")
+    # 같은 데이터 버전이면 ETag 304가 나오므로 If-None-Match 없이 매번 본문을 받습니다.
+    print(f"JSON 라우트      : {median_seconds(lambda: client.get(url)) * 1000:7.1f} ms")
+    excel = f"/admin/stats/dept_summary/excel?start={START}&end={END}"
+    print(f"엑셀 라우트      : {median_seconds(lambda: client.get(excel)) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# 식수 저장(/meals, /admin/edit_meals) 1/100/1000행 요청의 중앙값 응답 시간을 잽니다.
+from datetime import timedelta
+
+from _harness import A, client, median_seconds, seed_employees
+
+EMPLOYEES = 200
+
+
+def payload(rows, turn):
+    monday, _ = A.get_week_range_kst()
+    return {"meals": [
+        {"user_id": f"E{i % EMPLOYEES:04d}", "date": str(monday + timedelta(days=i // EMPLOYEES)),
+         "breakfast": turn % 2, "lunch": 1, "dinner": (i + turn) % 2}
+        for i in range(rows)
+    ]}
+
+
+def main():
+    seed_employees(EMPLOYEES)
+    for url in ("/meals", "/admin/edit_meals"):
+        for rows in (1, 100, 1000):
+            turn = iter(range(1000))
+
+            def save():
+                response = client.post(url, json=payload(rows, next(turn)))
+                assert response.status_code == 201, response.get_json()
+
+            print(f"{url:18s} {rows:5d}행: 중앙값 {median_seconds(save) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# 피벗 엑셀(build_pivot_excel) 5만 행 펼치기: 예전 iterrows 방식과 시간, 시트 내용을 비교합니다.
+import io
+import os
+import random
+from datetime import date, timedelta
+
+import pandas as pd
+
+from _harness import A, median_seconds, seed_employees
+
+EMPLOYEES, DAYS = 500, 100
+SHEETS = ("직영_에코센터", "직영_출장")
+
+
+class BenchJob:
+    # 진행률 기록 없이 결과 경로만 제공하는 작업 컨텍스트
+    result_path = os.path.join(A.JOB_RESULT_DIR, "bench_pivot.xlsx")
+
+    def progress(self, percent, message=""):
+        pass
+
+
+def seed():
+    random.seed(5)
+    seed_employees(EMPLOYEES)
+    days = [(date(2026, 1, 1) + timedelta(days=i)).isoformat() for i in range(DAYS)]
+    conn = A.get_db_connection()
+    try:
+        conn.executemany("INSERT INTO meals (user_id, date, breakfast, lunch, dinner) VALUES (?, ?, ?, ?, ?)", [
+            (f"E{i:04d}", d, random.randint(0, 1), random.randint(0, 1), random.randint(0, 1))
+            for i in range(EMPLOYEES) for d in days
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+    return days[0], days[-1]
+
+
+def reference_pivot(start, end):
+    # user-015 이전 방식: 행마다 iterrows로 돌며 조·중·석을 펼칩니다.
+    conn = A.get_db_connection(readonly=True)
+    try:
+        df = pd.read_sql_query("SELECT m.date, m.breakfast, m.lunch, m.dinner, e.name, e.dept, e.type, e.region FROM meals m JOIN employees e ON m.user_id = e.id WHERE m.date BETWEEN ? AND ?", conn, params=(start, end))
+    finally:
+        conn.close()
+    eco_center, tech_center = [], []
+    for _, row in df.iterrows():
+        if row.get("type") != "직영":
+            continue
+        base = [row["date"], row["name"], row["dept"]]
+        target = eco_center if row.get("region") == "에코센터" else tech_center
+        for column, label in (("breakfast", "조식"), ("lunch", "중식"), ("dinner", "석식")):
+            if int(row.get(column, 0)) == 1:
+                target.append(base + [label])
+    out = io.BytesIO()
+    with pd.ExcelWriter(out, engine="xlsxwriter") as writer:
+        for sheet, rows in zip(SHEETS, (eco_center, tech_center)):
+            pd.DataFrame(rows, columns=["식사일자", "이름", "부서", "식사 구분"]).to_excel(writer, index=False, sheet_name=sheet)
+    out.seek(0)
+    return out
+
+
+def sorted_sheet(source, sheet):
+    df = pd.read_excel(source, sheet_name=sheet)
+    df.columns = range(len(df.columns))
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def main():
+    start, end = seed()
+    reference = reference_pivot(start, end)
+    A.build_pivot_excel(BenchJob(), {"start": start, "end": end})
+    for sheet in SHEETS:
+        assert sorted_sheet(reference, sheet).equals(sorted_sheet(BenchJob.result_path, sheet)), sheet
+    print(f"시트 내용 일치 ({EMPLOYEES * DAYS:,}행 식수)")
+
+    old = median_seconds(lambda: reference_pivot(start, end), repeat=3)
+    new = median_seconds(lambda: A.build_pivot_excel(BenchJob(), {"start": start, "end": end}), repeat=3)
+    print(f"예전 iterrows     : {old:6.2f}s")
+    print(f"build_pivot_excel : {new:6.2f}s ({old / new:.1f}배)")
+
+
+if __name__ == "__main__":
+    main()
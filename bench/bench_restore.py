@@ -0,0 +1,59 @@
+# 증분 백업 체인 복원 시간: 큰 기준 스냅샷 위에 증분을 쌓고 기준/중간/최신 시점 복원에 걸리는 시간을 잽니다.
+# 복원 지점 시각이 초 단위이므로 증분 사이에 1초씩 쉽니다 (기본 10개, 약 15초).
+import os
+import sqlite3
+import sys
+import time
+
+from _harness import A, BASE
+
+BASE_ROWS = 300_000
+INCREMENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+
+def add_logs(count, pad="y" * 200):
+    conn = A.get_db_connection()
+    try:
+        conn.executemany("INSERT INTO meal_logs (emp_id, date, meal_type, before_status, after_status, changed_at) VALUES (?, '2026-01-02', 'lunch', 0, 1, ?)",
+                         [(f"E{i % 500:04d}", pad) for i in range(count)])
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def log_count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM meal_logs").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def main():
+    add_logs(BASE_ROWS)
+    print(f"DB 크기 {os.path.getsize(A.DATABASE) / 2 ** 20:.1f} MiB")
+    started = time.perf_counter()
+    A.capture_incremental_backup()
+    chain = A.list_backup_chains()[-1]
+    print(f"기준 스냅샷 {chain.manifest['base']['bytes']:,} bytes, {time.perf_counter() - started:.2f}s")
+
+    points = [(chain.manifest["base"]["at"], log_count(A.DATABASE))]
+    capture_ms = []
+    for _ in range(INCREMENTS):
+        time.sleep(1.01)
+        add_logs(200)
+        increment = A.capture_incremental_backup()["increment"]
+        capture_ms.append(increment["duration_ms"])
+        points.append((increment["at"], log_count(A.DATABASE)))
+    print(f"증분 {INCREMENTS}개, 증분당 평균 {sum(capture_ms) / len(capture_ms):.0f} ms")
+
+    out = os.path.join(BASE, "restored.sqlite")
+    for label, index in (("기준", 0), ("중간", len(points) // 2), ("최신", len(points) - 1)):
+        at, expected = points[index]
+        result = A.restore_backup_chain(out, at)
+        assert log_count(out) == expected and result["integrity"] == "ok"
+        print(f"{label} 시점 복원 (증분 {result['increments']:2d}개): {result['duration_ms']:6d} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# 실적 엑셀 10만 행 파싱: 예전 ElementTree 전체 로드 방식과 read_xlsx_columns의 시간/최대 메모리를 비교합니다.
+# 식당 단말기 양식(inlineStr)과 일반 엑셀 저장 양식(sharedStrings)을 모두 만들어 잽니다.
+import io
+import random
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+import zipfile
+
+import pandas as pd
+import xlsxwriter
+
+from _harness import A
+
+ROWS = 100_000
+COLUMNS = {"A": "식사일자", "B": "이름", "C": "부서", "D": "식사구분"}
+NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+
+
+def sample_rows():
+    random.seed(1)
+    return [("2026-01-%02d" % (1 + i % 28), f"홍길{i % 500}", f"부서{i % 30}(본사)", random.choice(["조식", "중식", "석식"]))
+            for i in range(ROWS)]
+
+
+def shared_strings_xlsx(rows):
+    buffer = io.BytesIO()
+    workbook = xlsxwriter.Workbook(buffer)
+    sheet = workbook.add_worksheet()
+    sheet.write_row(0, 0, list(COLUMNS.values()))
+    for i, row in enumerate(rows, 1):
+        sheet.write_row(i, 0, row)
+    workbook.close()
+    return buffer.getvalue()
+
+
+def inline_strings_xlsx(rows):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as z:
+        parts = [f'<?xml version="1.0"?><worksheet xmlns="{NS}"><sheetData>',
+                 '<row r="1"><c r="A1" t="inlineStr"><is><t>식사일자</t></is></c></row>']
+        for i, row in enumerate(rows, 2):
+            cells = "".join(f'<c r="{col}{i}" t="inlineStr"><is><t>{value}</t></is></c>' for col, value in zip("ABCD", row))
+            parts.append(f'<row r="{i}">{cells}</row>')
+        parts.append("</sheetData></worksheet>")
+        z.writestr("xl/worksheets/sheet1.xml", "".join(parts))
+    return buffer.getvalue()
+
+
+def reference_parse(data):
+    # user-010 이전 방식: 시트 XML 전체를 트리로 올리고, sharedStrings는 해석하지 않습니다.
+    with zipfile.ZipFile(io.BytesIO(data)) as z:
+        root = ET.fromstring(z.read("xl/worksheets/sheet1.xml"))
+    rows = []
+    for row_node in root.findall(f".//{{{NS}}}row"):
+        cells = {}
+        for cell in row_node.findall(f".//{{{NS}}}c"):
+            letter = "".join(ch for ch in cell.get("r") if ch.isalpha())
+            text = cell.find(f".//{{{NS}}}t")
+            if text is not None and text.text:
+                cells[letter] = text.text.strip()
+        if cells and cells.get("A") != "식사일자":
+            rows.append(cells)
+    return pd.DataFrame(rows).rename(columns=COLUMNS)
+
+
+def streaming_parse(data):
+    return A.read_xlsx_columns(io.BytesIO(data), COLUMNS, skip_header=("A", "식사일자"))
+
+
+def measure(fn, data):
+    # 시간은 추적 없이 재고, 최대 메모리는 tracemalloc으로 한 번 더 돌려 잽니다 (추적 중에는 몇 배 느려짐).
+    started = time.perf_counter()
+    df = fn(data)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    fn(data)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    names = int(df["이름"].notna().sum()) if "이름" in df else 0
+    return elapsed, peak, len(df), names
+
+
+def main():
+    rows = sample_rows()
+    for label, data in (("inlineStr", inline_strings_xlsx(rows)), ("sharedStrings", shared_strings_xlsx(rows))):
+        for fn in (reference_parse, streaming_parse):
+            elapsed, peak, count, names = measure(fn, data)
+            print(f"{label:13s} {fn.__name__:15s} {elapsed:6.2f}s  최대 {peak / 2 ** 20:7.1f} MiB  행 {count:,}  이름 {names:,}")
+        assert streaming_parse(data)["이름"].tolist() == [row[1] for row in rows]
+
+
+if __name__ == "__main__":
+    main()
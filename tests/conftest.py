@@ -0,0 +1,63 @@
+# 테스트용 공용 설정: app.py를 임포트하기 전에 DB와 모든 런타임 디렉터리를 임시 경로로 돌립니다.
+import os
+import sys
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_base = tempfile.mkdtemp(prefix="mealdb-test-")
+os.environ.setdefault("MEAL_DB_PATH", os.path.join(_base, "db.sqlite"))
+os.environ.setdefault("JOB_RESULT_DIR", os.path.join(_base, "job_results"))
+os.environ.setdefault("COMPARE_ARTIFACT_DIR", os.path.join(_base, "artifacts", "compare"))
+os.environ.setdefault("SNAPSHOT_DIR", os.path.join(_base, "db_backups"))
+os.environ.setdefault("DAILY_BACKUP_DIR", os.path.join(_base, "backups"))
+os.environ.setdefault("MENU_UPLOAD_DIR", os.path.join(_base, "menu"))
+os.environ.pop("GITHUB_TOKEN", None)
+
+import app as app_module  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    return app_module
+
+
+@pytest.fixture
+def fresh_db(tmp_path, monkeypatch):
+    # 테스트마다 빈 DB 파일에 마이그레이션을 처음부터 적용합니다.
+    monkeypatch.setattr(app_module, "DATABASE", str(tmp_path / "db.sqlite"))
+    monkeypatch.setattr(app_module, "JOB_DB_PATH", str(tmp_path / "jobs.sqlite"))
+    app_module.run_migrations()
+    return app_module.DATABASE
+
+
+@pytest.fixture
+def client(fresh_db):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def serve_stand_in():
+    # 외부 API 대역 서버를 빈 포트에 띄웁니다. 요청 기록 같은 테스트별 상태는 handler 클래스가 아니라
+    # 서버 인스턴스에 두고(handler에서는 self.server.xxx), 테스트가 끝나면 모두 내립니다.
+    servers = []
+
+    def serve(handler_cls, **state):
+        quiet = type(handler_cls.__name__, (handler_cls,), {"log_message": lambda self, *args: None})
+        server = ThreadingHTTPServer(("127.0.0.1", 0), quiet)
+        server.url = f"http://127.0.0.1:{server.server_port}"
+        for name, value in state.items():
+            setattr(server, name, value)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
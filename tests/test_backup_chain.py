@@ -0,0 +1,80 @@
+# 연속 증분 백업 체인으로 임의 시점 복원(PITR)이 그 시점의 데이터를 그대로 되살리는지 확인합니다.
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def chain_env(app, fresh_db, tmp_path, monkeypatch):
+    # 증분 시각이 초 단위라 테스트에서는 호출마다 1분씩 흐르는 시계를 씁니다.
+    clock = {"now": datetime.now(app.KST).replace(tzinfo=None)}
+
+    def fake_now():
+        clock["now"] += timedelta(minutes=1)
+        return clock["now"].strftime("%Y-%m-%d %H:%M:%S")
+
+    monkeypatch.setattr(app, "now_kst_str", fake_now)
+    monkeypatch.setattr(app, "BACKUP_CHAIN_DIR", str(tmp_path / "chain"))
+    monkeypatch.setitem(app._backup_chain_state, "stamp", None)
+    conn = sqlite3.connect(fresh_db)
+    conn.executemany("INSERT INTO employees (id, name, dept) VALUES (?, ?, '생산팀')", [(f"E{i:03d}", f"이름{i}") for i in range(50)])
+    # 증분 합계가 기준 스냅샷보다 커지면 새 체인이 시작되므로, 기준이 될 만큼의 과거 기록을 깔아 둡니다.
+    conn.executemany("INSERT INTO meal_logs (emp_id, date, meal_type, before_status, after_status) VALUES (?, '2025-12-01', 'lunch', 0, 1)",
+                     [(f"E{i % 50:03d}",) for i in range(20000)])
+    conn.commit()
+    conn.close()
+    return fresh_db
+
+
+def meals_snapshot(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT user_id, date, breakfast, lunch, dinner FROM meals ORDER BY user_id, date").fetchall()
+    finally:
+        conn.close()
+
+
+def write(app, sql, rows=None):
+    conn = app.get_db_connection()
+    try:
+        conn.executemany(sql, rows) if rows is not None else conn.execute(sql)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_restore_each_point_in_time(app, chain_env, tmp_path):
+    points = []
+    result = app.capture_incremental_backup(force=True)
+    assert result["increment"] is None
+    points.append((app.list_backup_chains()[-1].manifest["base"]["at"], meals_snapshot(chain_env)))
+
+    for day in range(1, 8):
+        write(app, "INSERT INTO meals (user_id, date, lunch) VALUES (?, ?, 1)", [(f"E{i:03d}", f"2026-02-{day:02d}") for i in range(50)])
+        if day == 4:
+            write(app, "UPDATE meals SET dinner = 1 WHERE user_id < 'E010'")
+            write(app, "DELETE FROM meals WHERE date = '2026-02-02'")
+            app.checkpoint_db()
+        increment = app.capture_incremental_backup(force=True)["increment"]
+        assert increment is not None and increment["pages"] > 0
+        points.append((increment["at"], meals_snapshot(chain_env)))
+
+    assert len(app.list_backup_chains()) == 1
+    out = str(tmp_path / "restored.sqlite")
+    for index, (at, expected) in enumerate(points):
+        restored = app.restore_backup_chain(out, at)
+        assert (restored["restored_at"], restored["increments"], restored["integrity"]) == (at, index, "ok")
+        assert meals_snapshot(out) == expected
+
+    app.restore_backup_chain(out)
+    assert meals_snapshot(out) == points[-1][1]
+    with pytest.raises(ValueError):
+        app.restore_backup_chain(out, "2000-01-01 00:00:00")
+
+
+def test_unchanged_database_adds_no_increment(app, chain_env):
+    app.capture_incremental_backup(force=True)
+    app.checkpoint_db()
+    assert app.capture_incremental_backup(force=True)["increment"] is None
+    assert app.list_backup_chains()[-1].manifest["increments"] == []
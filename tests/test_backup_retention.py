@@ -0,0 +1,166 @@
+# 백업 이름(KST), 보관 정책 목록 수집과 단계별 보관/용량 한도/하드링크 처리를 확인합니다.
+import os
+from datetime import datetime
+
+import pytest
+
+
+@pytest.fixture
+def backup_dirs(app, tmp_path, monkeypatch):
+    snapshot_dir, chain_dir = tmp_path / "snapshots", tmp_path / "chain"
+    snapshot_dir.mkdir()
+    chain_dir.mkdir()
+    retention = {key: dict(spec) for key, spec in app.BACKUP_RETENTION.items()}
+    retention["snapshot"]["dir"] = str(snapshot_dir)
+    retention["chain"]["dir"] = str(chain_dir)
+    retention["daily"]["dir"] = str(tmp_path / "daily")
+    monkeypatch.setattr(app, "BACKUP_RETENTION", retention)
+    monkeypatch.setitem(app.SNAPSHOT_TARGETS, "snapshot", (str(snapshot_dir), "db_{ts}.sqlite.gz"))
+    return snapshot_dir, chain_dir
+
+
+def test_snapshot_names_use_kst(app, fresh_db, backup_dirs):
+    before = datetime.now(app.KST).replace(tzinfo=None, microsecond=0)
+    path = app.create_db_snapshot()
+    after = datetime.now(app.KST).replace(tzinfo=None)
+    at = app.backup_timestamp(os.path.basename(path), 0)
+    assert before <= at <= after
+
+
+def test_list_skips_entries_removed_during_scan(app, backup_dirs, monkeypatch):
+    snapshot_dir, chain_dir = backup_dirs
+    for name in ("db_20260101_020000.sqlite.gz", "db_20260101_050000.sqlite.gz"):
+        (snapshot_dir / name).write_bytes(b"x")
+    chain = chain_dir / "chain_20260101_000000"
+    chain.mkdir()
+    for name in ("base.sqlite.gz", "0001.inc"):
+        (chain / name).write_bytes(b"y")
+
+    real_stat = os.stat
+
+    def racing_stat(path, *args, **kwargs):
+        path = str(path)
+        if path.endswith(("050000.sqlite.gz", "0001.inc")):
+            raise FileNotFoundError(path)
+        return real_stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(app.os, "stat", racing_stat)
+    assert [item["name"] for item in app.list_backup_items("snapshot")] == ["db_20260101_020000.sqlite.gz"]
+    (chain_item,) = app.list_backup_items("chain")
+    assert len(chain_item["inodes"]) == 1
+    assert app.list_backup_items("daily") == []
+
+
+MB = 1024 * 1024
+
+
+def make_backup(path, size=MB, data=None):
+    with open(path, "wb") as f:
+        if data is not None:
+            f.write(data)
+        else:
+            f.truncate(size)
+    return str(path)
+
+
+def make_chain(chain_dir, stamp, size=MB):
+    chain = chain_dir / f"chain_{stamp}"
+    chain.mkdir()
+    make_backup(chain / "base.sqlite.gz", size)
+    return chain
+
+
+def synthetic(stamps):
+    return [{"path": stamp, "at": datetime.strptime(stamp, "%Y-%m-%d %H:%M")} for stamp in stamps]
+
+
+def test_tiers_keep_newest_per_period(app):
+    items = synthetic([
+        "2026-03-10 12:30", "2026-03-10 12:00", "2026-03-10 11:30", "2026-03-10 10:00",   # 화, ISO 11주
+        "2026-03-09 23:00", "2026-03-09 08:00",
+        "2026-03-08 22:00",                                                               # 일, ISO 10주
+        "2026-03-01 10:00", "2026-02-22 10:00",
+    ])
+    keep = app.select_retained_backups(items, {"hourly": 2, "daily": 2, "weekly": 2})
+    assert keep == {"2026-03-10 12:30", "2026-03-10 11:30", "2026-03-09 23:00", "2026-03-08 22:00"}
+
+
+def test_count_tier_and_newest_always_kept(app):
+    items = synthetic(["2026-03-10 12:00", "2026-03-09 12:00", "2026-03-08 12:00"])
+    assert app.select_retained_backups(items, {"count": 2}) == {"2026-03-10 12:00", "2026-03-09 12:00"}
+    assert app.select_retained_backups(items, {"weekly": 0}) == {"2026-03-10 12:00"}
+    assert app.select_retained_backups([], {"daily": 7}) == set()
+
+
+@pytest.mark.parametrize("budget_mb, snapshots_kept, chains_kept", [
+    (3, ["db_20260310_030000.sqlite.gz", "db_20260310_020000.sqlite.gz"], ["chain_20260310_023000"]),
+    # 한도를 넘어도 위치별 최신본은 남깁니다.
+    (1, ["db_20260310_030000.sqlite.gz"], ["chain_20260310_023000"]),
+])
+def test_budget_trims_oldest_but_keeps_newest_per_location(app, backup_dirs, monkeypatch, budget_mb, snapshots_kept, chains_kept):
+    snapshot_dir, chain_dir = backup_dirs
+    for hour in ("01", "02", "03"):
+        make_backup(snapshot_dir / f"db_20260310_{hour}0000.sqlite.gz")
+    for stamp in ("20260310_003000", "20260310_023000"):
+        make_chain(chain_dir, stamp)
+    monkeypatch.setattr(app, "BACKUP_BUDGET_MB", budget_mb)
+
+    result = app.apply_backup_retention()
+    assert result["locations"]["snapshot"]["kept"] == snapshots_kept
+    assert result["locations"]["chain"]["kept"] == chains_kept
+    assert sorted(os.listdir(snapshot_dir), reverse=True) == snapshots_kept
+    assert os.listdir(chain_dir) == chains_kept
+    assert result["kept_bytes"] == (len(snapshots_kept) + len(chains_kept)) * MB
+
+
+def test_hard_links_are_counted_once(app, backup_dirs, monkeypatch):
+    snapshot_dir, _ = backup_dirs
+    older = make_backup(snapshot_dir / "db_20260301_020000.sqlite.gz", 2 * MB)
+    os.link(older, snapshot_dir / "db_20260310_020000.sqlite.gz")
+    make_backup(snapshot_dir / "db_20260310_030000.sqlite.gz", MB)
+
+    items = app.list_backup_items("snapshot")
+    assert app.inode_bytes(items) == 3 * MB
+    assert app.inode_bytes(items[:2]) == 3 * MB
+
+    # 지워지는 03-01 스냅샷은 남는 03-10 02시 스냅샷과 같은 inode라 확보되는 공간이 없습니다.
+    monkeypatch.setattr(app, "BACKUP_BUDGET_MB", 100)
+    monkeypatch.setitem(app.BACKUP_RETENTION["snapshot"], "tiers", {"hourly": 2})
+    result = app.apply_backup_retention(dry_run=True)
+    assert result["locations"]["snapshot"]["removed"] == ["db_20260301_020000.sqlite.gz"]
+    assert result["kept_bytes"] == 3 * MB and result["freed_bytes"] == 0
+
+
+def test_identical_snapshot_becomes_hard_link(app, backup_dirs):
+    snapshot_dir, _ = backup_dirs
+    first = make_backup(snapshot_dir / "db_20260310_020000.sqlite.gz", data=b"same bytes")
+    second = make_backup(snapshot_dir / "db_20260310_030000.sqlite.gz", data=b"same bytes")
+    assert app.link_identical_backup(second)
+    assert os.path.samefile(first, second)
+    assert not app.link_identical_backup(second)   # 이미 묶여 있으면 그대로
+
+    other = make_backup(snapshot_dir / "db_20260310_040000.sqlite.gz", data=b"diff bytes")
+    assert not app.link_identical_backup(other)
+    assert os.stat(other).st_nlink == 1
+    assert not os.path.exists(other + ".link")
+
+
+def test_retention_preview_route_does_not_delete(app, client, backup_dirs, monkeypatch):
+    snapshot_dir, chain_dir = backup_dirs
+    names = [f"db_202603{day:02d}_020000.sqlite.gz" for day in range(1, 11)]
+    for name in names:
+        make_backup(snapshot_dir / name, data=name.encode())
+    make_chain(chain_dir, "20260310_023000")
+    monkeypatch.setattr(app, "BACKUP_BUDGET_MB", 100)
+    monkeypatch.setitem(app.BACKUP_RETENTION["snapshot"], "tiers", {"daily": 7, "weekly": 4})
+
+    response = client.get("/admin/backups/retention")
+    assert response.status_code == 200
+    body = response.get_json()
+    snapshot = body["locations"]["snapshot"]
+    # 일 단위 7개 + 주 단위로 더 거슬러 올라간 03-01(ISO 9주)
+    assert snapshot["kept"] == names[:0:-1][:7] + [names[0]]
+    assert snapshot["removed"] == [names[2], names[1]]
+    assert body["locations"]["chain"] == {"kept": ["chain_20260310_023000"], "removed": []}
+    assert body["budget_bytes"] == 100 * MB
+    assert sorted(os.listdir(snapshot_dir)) == names
@@ -0,0 +1,123 @@
+# 백업 스케줄러: 잠금 파일로 리더 하나만 뽑히는지, 리더 교대와 밀린 예약 따라잡기, 다음 실행 시각 계산을 확인합니다.
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def scheduler_files(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "SCHEDULER_LOCK_PATH", str(tmp_path / "scheduler.lock"))
+    monkeypatch.setattr(app, "SCHEDULER_STATE_PATH", str(tmp_path / "scheduler.json"))
+    return tmp_path
+
+
+@pytest.fixture
+def make_scheduler(app, scheduler_files):
+    schedulers = []
+
+    def make(jobs=()):
+        scheduler = app.BackupScheduler(list(jobs))
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.release_leadership()
+
+
+def hourly_job(app, calls, name="hourly"):
+    return app.ScheduledJob(name, lambda: calls.append(name) or "ok", hours=range(24))
+
+
+def test_exactly_one_leader(make_scheduler):
+    first, second = make_scheduler(), make_scheduler()
+    assert [first.acquire_leadership(), second.acquire_leadership()] == [True, False]
+    assert first.is_leader and not second.is_leader
+    # 리더는 다시 물어도 그대로, 대기자는 계속 실패
+    assert first.acquire_leadership() and not second.acquire_leadership()
+
+
+def test_follower_takes_over_after_release(app, make_scheduler, scheduler_files):
+    first, second = make_scheduler(), make_scheduler()
+    assert first.acquire_leadership()
+    first.release_leadership()
+    assert not first.is_leader
+    assert second.acquire_leadership()
+    state = json.loads((scheduler_files / "scheduler.json").read_text(encoding="utf-8"))
+    assert state["leader"]["pid"] == os.getpid()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork 전용")
+def test_forked_child_is_not_leader(make_scheduler):
+    leader = make_scheduler()
+    assert leader.acquire_leadership()
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        result = f"{leader.is_leader},{leader.acquire_leadership()}"
+        os.write(write_end, result.encode())
+        os._exit(0)
+    os.close(write_end)
+    os.waitpid(pid, 0)
+    assert os.read(read_end, 100).decode() == "False,False"
+    os.close(read_end)
+    assert leader.is_leader and leader.acquire_leadership()
+
+
+def test_take_over_catches_up_a_missed_slot_once(app, make_scheduler, scheduler_files):
+    calls = []
+    three_hours_ago = (datetime.now(app.KST) - timedelta(hours=3)).strftime("%Y-%m-%d %H:%M:%S")
+    (scheduler_files / "scheduler.json").write_text(json.dumps({"jobs": {"hourly": {"last_started_at": three_hours_ago, "runs": 5}}}), encoding="utf-8")
+
+    scheduler = make_scheduler([hourly_job(app, calls)])
+    assert scheduler.acquire_leadership()
+    scheduler.run_due_jobs()
+    scheduler.run_due_jobs()
+    assert calls == ["hourly"]
+    info = scheduler.state["jobs"]["hourly"]
+    assert info["runs"] == 6 and info["last_status"] == "ok"
+    assert scheduler.next_runs["hourly"] > datetime.now(app.KST)
+
+
+def test_new_leader_without_history_waits_for_next_slot(app, make_scheduler):
+    calls = []
+    interval = app.ScheduledJob("incremental", lambda: calls.append("incremental"), interval=120)
+    scheduler = make_scheduler([hourly_job(app, calls), interval])
+    assert scheduler.acquire_leadership()
+    scheduler.run_due_jobs()
+    # 간격 작업은 바로 한 번, 시각 작업은 다음 정각까지 대기
+    assert calls == ["incremental"]
+
+
+def test_heartbeat_is_refreshed_when_a_job_starts(app, make_scheduler):
+    seen = []
+
+    def slow_job():
+        seen.append(app.load_scheduler_state()["leader"]["heartbeat_at"])
+        return "ok"
+
+    scheduler = make_scheduler([app.ScheduledJob("slow", slow_job, interval=60)])
+    assert scheduler.acquire_leadership()
+    scheduler.state["leader"]["heartbeat_at"] = "2000-01-01 00:00:00"
+    scheduler.run_job(scheduler.jobs[0])
+    assert seen and seen[0] != "2000-01-01 00:00:00"
+    assert scheduler.state["leader"]["heartbeat_at"] >= seen[0]
+
+
+@pytest.mark.parametrize("hours, moment, expected", [
+    ([0, 12], "2026-01-31 23:30:00", "2026-02-01 00:00:00"),
+    ([2, 5, 8], "2026-03-10 05:00:00", "2026-03-10 08:00:00"),
+    ([2, 5, 8], "2026-03-10 08:00:00", "2026-03-11 02:00:00"),
+    (range(24), "2026-12-31 23:59:59", "2027-01-01 00:00:00"),
+    ([23, 0], "2026-05-05 23:00:01", "2026-05-06 00:00:00"),
+])
+def test_next_run_after_rolls_over(app, hours, moment, expected):
+    job = app.ScheduledJob("job", lambda: None, hours=hours)
+    assert job.next_run_after(app.parse_kst(moment)) == app.parse_kst(expected)
+
+
+def test_next_run_after_interval(app):
+    job = app.ScheduledJob("job", lambda: None, interval=90)
+    assert job.next_run_after(app.parse_kst("2026-01-01 23:59:00")) == app.parse_kst("2026-01-02 00:00:30")
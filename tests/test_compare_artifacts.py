@@ -0,0 +1,60 @@
+# 대조 결과 재사용 키(fingerprint)와 보관 정리 동작을 확인합니다.
+import os
+import sqlite3
+
+START, END = "2026-03-02", "2026-03-06"
+
+
+def fingerprint(app):
+    conn = app.get_db_connection(readonly=True)
+    try:
+        return app.compare_data_fingerprint(conn, START, END)
+    finally:
+        conn.close()
+
+
+def write(path, sql, params=()):
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute(sql, params)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_fingerprint_tracks_row_content(app, fresh_db):
+    write(fresh_db, "INSERT INTO employees (id, name, dept) VALUES ('1001', '홍길동', '생산팀'), ('1002', '김철수', '생산팀')")
+    write(fresh_db, "INSERT INTO meals (user_id, date, breakfast, lunch, dinner) VALUES ('1001', ?, 1, 0, 0), ('1002', ?, 0, 1, 0)", (START, START))
+    base = fingerprint(app)
+    assert fingerprint(app) == base
+
+    # 건수와 식사 합계는 그대로 두고 누가 어떤 끼니를 신청했는지만 바꿉니다.
+    write(fresh_db, "UPDATE meals SET breakfast = 1 - breakfast, lunch = 1 - lunch WHERE date = ?", (START,))
+    swapped = fingerprint(app)
+    assert swapped != base
+
+    write(fresh_db, "UPDATE employees SET dept = '품질팀' WHERE id = '1002'")
+    assert fingerprint(app) != swapped
+
+    # 대조 기간 밖의 변경은 재사용을 막지 않습니다.
+    after_dept = fingerprint(app)
+    write(fresh_db, "INSERT INTO meals (user_id, date, lunch) VALUES ('1001', '2026-04-01', 1)")
+    assert fingerprint(app) == after_dept
+
+
+def test_cleanup_skips_files_removed_concurrently(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "COMPARE_ARTIFACT_DIR", str(tmp_path))
+    for name in ("gone.xlsx", "old.json"):
+        (tmp_path / name).write_text("x")
+    os.utime(tmp_path / "old.json", (0, 0))
+
+    real_getmtime = os.path.getmtime
+
+    def racing_getmtime(path):
+        if path.endswith("gone.xlsx"):
+            raise FileNotFoundError(path)
+        return real_getmtime(path)
+
+    monkeypatch.setattr(app.os.path, "getmtime", racing_getmtime)
+    app.cleanup_compare_artifacts()
+    assert sorted(os.listdir(tmp_path)) == ["gone.xlsx"]
@@ -0,0 +1,28 @@
+# 사번 조회는 요청 본문의 타입(숫자/문자열)이나 앞뒤 공백과 관계없이 같은 직원을 찾아야 합니다.
+import pytest
+
+ROWS = [
+    {"id": "1001", "name": "홍길동", "type": "직영", "dept": "관리팀", "rank": "", "region": "", "level": 3, "password": ""},
+    {"id": "A-7", "name": "김협력", "type": "협력사", "dept": "설비", "rank": "", "region": "", "level": 1, "password": ""},
+]
+
+
+@pytest.fixture
+def directory(app):
+    return app.EmployeeDirectory(ROWS)
+
+
+@pytest.mark.parametrize("emp_id", ["1001", 1001, " 1001 ", "1001\n"])
+def test_get_normalizes_id(directory, emp_id):
+    assert directory.get(emp_id)["name"] == "홍길동"
+
+
+def test_get_unknown_or_missing(directory):
+    assert directory.get(None) is None
+    assert directory.get("9999") is None
+
+
+def test_authenticate_normalizes_id(directory):
+    assert directory.authenticate(1001, "홍길동")["level"] == 3
+    assert directory.authenticate(" A-7", "김협력")["dept"] == "설비"
+    assert directory.authenticate(1001, "김협력") is None
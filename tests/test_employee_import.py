@@ -0,0 +1,41 @@
+# 직원 일괄 등록: 비교-반영 흐름과, 반영 후 쓰기 락이 남지 않는지 확인합니다.
+import sqlite3
+
+import pandas as pd
+
+
+def roster(rows):
+    return [pd.DataFrame(rows, columns=["사번", "이름", "부서", "직영/협력사/방문자", "에코센터/테크센터/기타"])]
+
+
+def can_write(db_path):
+    conn = sqlite3.connect(db_path, timeout=0)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.rollback()
+        return True
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        conn.close()
+
+
+def test_import_then_reimport(app, fresh_db):
+    rows = [["1001", "홍길동", "생산팀", "직영", "에코센터"], ["1002", "김협력", "설비", "협력사", "기타"]]
+
+    preview = app.import_employees(roster(rows), dry_run=True)
+    assert preview["inserted"]["count"] == 2
+    assert sqlite3.connect(fresh_db).execute("SELECT COUNT(*) FROM employees").fetchone()[0] == 0
+
+    first = app.import_employees(roster(rows))
+    assert first["inserted"]["count"] == 2
+    assert can_write(fresh_db)
+
+    rows[1][2] = "품질팀"
+    second = app.import_employees(roster(rows))
+    assert (second["updated"]["count"], second["unchanged"]["count"]) == (1, 1)
+
+    # 바뀐 내용이 없으면 쓰기 없이 끝나고 락도 풀려 있어야 합니다.
+    third = app.import_employees(roster(rows))
+    assert third["unchanged"]["count"] == 2
+    assert can_write(fresh_db)
@@ -0,0 +1,145 @@
+# GitHub 업로드: 본문(GithubContentBody) 스트리밍과, 로컬 대역 contents API(GITHUB_API)로
+# 중복 업로드 생략과 409(sha 불일치) 재시도를 확인합니다.
+import base64
+import hashlib
+import json
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+FIELDS = {"message": "Automated db backup", "branch": "main", "sha": "abc"}
+
+
+def expected_body(raw):
+    return json.dumps(FIELDS, ensure_ascii=False)[:-1].encode("utf-8") + b', "content": "' + base64.b64encode(raw) + b'"}'
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 3, 3 << 18, (3 << 18) + 1, 2_000_000])
+@pytest.mark.parametrize("size", [-1, 1000, 8192, 10 ** 9])
+def test_content_body_streams_exact_json(app, tmp_path, n, size):
+    path = tmp_path / "db.sqlite.gz"
+    raw = bytes(range(256)) * (n // 256) + bytes(n % 256)
+    path.write_bytes(raw)
+
+    body = app.GithubContentBody(str(path), FIELDS)
+    pieces = []
+    while True:
+        piece = body.read(size)
+        if not piece:
+            break
+        assert size < 0 or len(piece) <= size
+        pieces.append(piece)
+
+    data = b"".join(pieces)
+    assert data == expected_body(raw)
+    assert len(body) == len(data)
+    assert json.loads(data)["sha"] == "abc"
+
+
+class ContentsApiStandIn(BaseHTTPRequestHandler):
+    # 파일 하나만 보관하는 contents API. PUT의 sha가 현재 원격 sha와 다르면 409를 돌려줍니다.
+    # 원격 파일(remote)과 요청 기록(requests)은 서버 인스턴스에 있습니다.
+    protocol_version = "HTTP/1.1"
+
+    def reply(self, code, obj):
+        body = json.dumps(obj).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.requests.append("GET")
+        if self.server.remote["sha"]:
+            self.reply(200, {"sha": self.server.remote["sha"]})
+        else:
+            self.reply(404, {"message": "Not Found"})
+
+    def do_PUT(self):
+        self.server.requests.append("PUT")
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if body.get("sha") != self.server.remote["sha"]:
+            return self.reply(409, {"message": "sha does not match"})
+        self.server.remote.update(put_remote(base64.b64decode(body["content"])))
+        self.reply(201, {"content": {"sha": self.server.remote["sha"]}})
+
+
+def put_remote(data):
+    return {"content": data, "sha": hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()}
+
+
+@pytest.fixture
+def github(app, tmp_path, serve_stand_in, monkeypatch):
+    server = serve_stand_in(ContentsApiStandIn, remote={"content": None, "sha": None}, requests=[])
+    monkeypatch.setattr(app, "GITHUB_API", server.url)
+    monkeypatch.setattr(app, "GITHUB_TOKEN", "test-token")
+    monkeypatch.setattr(app, "GITHUB_UPLOAD_STATE", str(tmp_path / "github_upload.json"))
+    monkeypatch.setitem(app._github_session, "pid", None)
+    return server
+
+
+def snapshot_file(tmp_path, data, name="db.sqlite.gz"):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_upload_skips_content_already_on_remote(app, github, tmp_path):
+    path = snapshot_file(tmp_path, b"snapshot-1" * 1000)
+    assert app.upload_file_to_github(path) == "uploaded"
+    assert github.requests == ["GET", "PUT"]
+    assert github.remote["sha"] == app.git_blob_sha(path)
+
+    # 같은 내용은 요청 없이 생략
+    assert app.upload_file_to_github(path) == "unchanged"
+    assert github.requests == ["GET", "PUT"]
+
+    # 상태 파일이 없어도(재시작) 원격 sha 조회 한 번으로 생략
+    (tmp_path / "github_upload.json").unlink()
+    assert app.upload_file_to_github(path) == "unchanged"
+    assert github.requests == ["GET", "PUT", "GET"]
+
+    # 내용이 바뀌면 기억해 둔 sha로 조회 없이 바로 PUT
+    path = snapshot_file(tmp_path, b"snapshot-2" * 1000)
+    assert app.upload_file_to_github(path) == "uploaded"
+    assert github.requests[3:] == ["PUT"]
+    assert github.remote["content"] == b"snapshot-2" * 1000
+
+
+def test_conflict_refetches_sha_and_retries_once(app, github, tmp_path):
+    assert app.upload_file_to_github(snapshot_file(tmp_path, b"a" * 100)) == "uploaded"
+
+    # 다른 곳에서 원격 파일을 갱신해 기억한 sha가 낡은 경우
+    github.remote.update(put_remote(b"edited elsewhere"))
+    del github.requests[:]
+    path = snapshot_file(tmp_path, b"b" * 100)
+    assert app.upload_file_to_github(path) == "uploaded"
+    assert github.requests == ["PUT", "GET", "PUT"]
+    assert github.remote["content"] == b"b" * 100
+
+    # 원격이 이미 같은 내용으로 갱신돼 있으면 409 뒤 조회만 하고 끝냅니다.
+    github.remote.update(put_remote(b"c" * 100))
+    app.save_github_upload_state({**app.load_github_upload_state(), "sha": "stale"})
+    del github.requests[:]
+    assert app.upload_file_to_github(snapshot_file(tmp_path, b"c" * 100)) == "unchanged"
+    assert github.requests == ["PUT", "GET"]
+    assert app.load_github_upload_state()["sha"] == github.remote["sha"]
+
+
+def test_repeated_conflict_fails(app, github, tmp_path, monkeypatch):
+    assert app.upload_file_to_github(snapshot_file(tmp_path, b"a" * 100)) == "uploaded"
+    # 원격이 바뀌었고, 다시 조회한 sha로 올리기 전에 또 바뀌는 상황
+    github.remote.update(put_remote(b"edited elsewhere"))
+    monkeypatch.setattr(app, "fetch_github_sha", lambda session, url: "moving-target")
+    del github.requests[:]
+    assert app.upload_file_to_github(snapshot_file(tmp_path, b"b" * 100)) == "failed"
+    assert github.requests == ["PUT", "PUT"]
+
+
+def test_backup_skips_snapshot_when_data_unchanged(app, fresh_db, github, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.SNAPSHOT_TARGETS, "snapshot", (str(tmp_path / "snapshots"), "db_{ts}.sqlite.gz"))
+    assert app.backup_db_to_github() == "uploaded"
+    assert app.backup_db_to_github() == "unchanged"
+    assert github.requests == ["GET", "PUT"]
+    assert len(list((tmp_path / "snapshots").iterdir())) == 1
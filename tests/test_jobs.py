@@ -0,0 +1,57 @@
+# 작업 상태/진행률 갱신이 본 DB의 데이터 버전을 건드리지 않는지 확인합니다.
+import sqlite3
+
+
+def data_version(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT version FROM cache_versions WHERE name = 'data'").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def main_tables(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    finally:
+        conn.close()
+
+
+def test_job_updates_do_not_bump_data_version(app, fresh_db):
+    assert "jobs" not in main_tables(fresh_db)
+    before = data_version(fresh_db)
+
+    job_id = "job-progress"
+    store = app.open_job_store()
+    try:
+        store.execute("INSERT INTO jobs (id, kind, status, created_at, updated_at) VALUES (?, 'pivot_excel', 'queued', ?, ?)",
+                      (job_id, app.now_kst_str(), app.now_kst_str()))
+        store.commit()
+    finally:
+        store.close()
+
+    job = app.JobContext(job_id)
+    for percent in range(0, 101, 10):
+        job.progress(percent, "진행 중")
+    app.update_job(job_id, status="done", finished_at=app.now_kst_str())
+
+    assert data_version(fresh_db) == before
+    loaded = app.load_job(job_id)
+    assert loaded["status"] == "done" and loaded["progress"] == 100
+
+
+def test_job_store_setup_runs_once_per_file(app, fresh_db, monkeypatch):
+    statements = []
+    real_connect = app.sqlite3.connect
+
+    def traced_connect(*args, **kwargs):
+        conn = real_connect(*args, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(app.sqlite3, "connect", traced_connect)
+    for _ in range(3):
+        app.open_job_store().close()
+    assert sum("journal_mode" in sql for sql in statements) == 1
+    assert sum("CREATE TABLE" in sql for sql in statements) == 1
@@ -0,0 +1,54 @@
+# 같은 칸을 여러 요청이 동시에 저장해도 변경 로그의 before/after가 끊기지 않아야 합니다.
+import sqlite3
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def seeded(app, fresh_db):
+    conn = sqlite3.connect(fresh_db)
+    conn.execute("INSERT INTO employees (id, name, dept) VALUES ('1001', '홍길동', '생산팀')")
+    conn.commit()
+    conn.close()
+    monday, _ = app.get_week_range_kst()
+    return fresh_db, monday.strftime("%Y-%m-%d")
+
+
+def assert_log_chain(db_path, date):
+    conn = sqlite3.connect(db_path)
+    try:
+        logs = conn.execute("""
+            SELECT before_status, after_status FROM meal_logs
+            WHERE emp_id = '1001' AND date = ? AND meal_type = 'lunch' ORDER BY id
+        """, (date,)).fetchall()
+        lunch = conn.execute("SELECT lunch FROM meals WHERE user_id = '1001' AND date = ?", (date,)).fetchone()[0]
+    finally:
+        conn.close()
+    assert logs
+    for previous, current in zip(logs, logs[1:]):
+        assert current[0] == previous[1]
+    assert logs[-1][1] == lunch
+
+
+@pytest.mark.parametrize("url", ["/meals", "/admin/edit_meals"])
+def test_concurrent_saves_keep_log_chain(app, seeded, url):
+    db_path, date = seeded
+    errors = []
+
+    def worker(seed):
+        client = app.app.test_client()
+        for i in range(15):
+            lunch = (seed + i) % 2
+            response = client.post(url, json={"meals": [{"user_id": "1001", "date": date, "breakfast": 0, "lunch": lunch, "dinner": 0}]})
+            if response.status_code != 201:
+                errors.append(response.get_json())
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert_log_chain(db_path, date)
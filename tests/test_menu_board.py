@@ -0,0 +1,104 @@
+# 식단표 목록: 업로드/삭제 순서와 파일 정리, v6 JSON 이관, 버전 기반 목록 캐시를 확인합니다.
+import io
+import json
+import os
+import sqlite3
+
+import pytest
+
+
+@pytest.fixture
+def menu_dir(app, tmp_path, monkeypatch):
+    menu = tmp_path / "menu"
+    menu.mkdir()
+    monkeypatch.setattr(app, "MENU_UPLOAD_DIR", str(menu))
+    monkeypatch.setattr(app, "MENU_MANIFEST_PATH", str(menu / "menu_board.json"))
+    monkeypatch.setattr(app, "_menu_board_cache", {"version": None, "items": None})
+    return menu
+
+
+def upload(client, title, name="menu.png"):
+    data = {"title": title, "image": (io.BytesIO(b"\x89PNG fake"), name)}
+    response = client.post("/api/menu-board/upload", data=data, content_type="multipart/form-data")
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()["item"]
+
+
+def board_titles(client):
+    return [item["title"] for item in client.get("/api/menu-board").get_json()]
+
+
+def test_upload_puts_new_item_first(client, menu_dir):
+    for title in ["1주차", "2주차", "3주차"]:
+        upload(client, title)
+    assert board_titles(client) == ["3주차", "2주차", "1주차"]
+    manifest = json.loads((menu_dir / "menu_board.json").read_text(encoding="utf-8"))
+    assert [item["title"] for item in manifest] == ["3주차", "2주차", "1주차"]
+
+
+def test_delete_removes_rows_then_files(app, client, menu_dir, monkeypatch):
+    first, second, third = (upload(client, title) for title in ["가", "나", "다"])
+    seen_on_remove = []
+    real_remove = os.remove
+
+    def remove(path):
+        # 이미지 파일을 지울 때는 이미 목록에서 빠져 있어야 합니다.
+        seen_on_remove.append((os.path.basename(path), board_titles(client)))
+        real_remove(path)
+
+    monkeypatch.setattr(app.os, "remove", remove)
+    response = client.post("/api/menu-board/delete", json={"ids": [first["id"], third["id"]]})
+    assert response.status_code == 200
+    assert sorted(name for name, _ in seen_on_remove) == sorted([first["filename"], third["filename"]])
+    assert all(titles == ["나"] for _, titles in seen_on_remove)
+    assert sorted(os.listdir(menu_dir)) == sorted([second["filename"], "menu_board.json"])
+
+
+def test_failed_manifest_write_rolls_back_upload(app, client, menu_dir, monkeypatch):
+    existing = upload(client, "기존")
+    before = app.get_cache_version("menu_board")
+    monkeypatch.setattr(app, "save_menu_manifest", lambda items: False)
+    data = {"title": "새 항목", "image": (io.BytesIO(b"\x89PNG fake"), "new.png")}
+    response = client.post("/api/menu-board/upload", data=data, content_type="multipart/form-data")
+    assert response.status_code == 500
+    assert board_titles(client) == ["기존"]
+    assert app.get_cache_version("menu_board") == before
+    assert sorted(os.listdir(menu_dir)) == sorted([existing["filename"], "menu_board.json"])
+
+
+def test_migration_imports_existing_manifest_in_order(app, tmp_path, menu_dir, monkeypatch):
+    items = [
+        {"id": "c3", "title": "셋째", "filename": "menu_c3.png"},
+        {"id": "a1", "title": "첫째", "filename": "menu_a1.png"},
+        {"id": "b2", "title": "둘째", "filename": "menu_b2.png"},
+        {"id": "", "title": "깨진 항목", "filename": "menu_x.png"},
+    ]
+    (menu_dir / "menu_board.json").write_text(json.dumps(items, ensure_ascii=False), encoding="utf-8")
+    monkeypatch.setattr(app, "DATABASE", str(tmp_path / "db.sqlite"))
+    app.run_migrations()
+
+    conn = sqlite3.connect(app.DATABASE)
+    conn.row_factory = sqlite3.Row
+    try:
+        assert [item["id"] for item in app.fetch_menu_board(conn)] == ["c3", "a1", "b2"]
+    finally:
+        conn.close()
+
+
+def test_menu_board_items_cached_until_version_bump(app, fresh_db, menu_dir):
+    first = app.get_menu_board_items()
+    assert first == [] and app.get_menu_board_items() is first
+
+    # 버전을 올리지 않은 직접 쓰기는 캐시에 보이지 않습니다.
+    conn = sqlite3.connect(fresh_db)
+    conn.execute("INSERT INTO menu_board (id, title, filename, position) VALUES ('z9', '직접', 'menu_z9.png', 0)")
+    conn.commit()
+    assert app.get_menu_board_items() is first
+
+    app.bump_cache_version(conn, "menu_board")
+    conn.commit()
+    conn.close()
+    items = app.get_menu_board_items()
+    assert [item["id"] for item in items] == ["z9"]
+    assert items[0]["image_url"] == "/uploads/menu/menu_z9.png"
+    assert app.get_menu_board_items() is items
@@ -0,0 +1,142 @@
+# 공휴일 수집: 로컬 대역 서버(PUBLIC_HOLIDAY_API_URL)로 재시도/실패 처리를, 그리고
+# 백그라운드 갱신(PublicHolidayRefresher)의 동시 요청 처리를 확인합니다.
+import json
+import threading
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+class HolidayApiStandIn(BaseHTTPRequestHandler):
+    # 공공데이터포털 getRestDeInfo와 같은 JSON 모양으로 응답합니다.
+    # statuses[월]에 넣은 상태 코드를 차례로 먼저 돌려주고, 다 쓰면 200으로 응답합니다.
+    # 요청한 월 기록(calls)과 상태 코드 목록(statuses)은 서버 인스턴스에 있습니다.
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        year, month = query["solYear"][0], query["solMonth"][0]
+        self.server.calls.append(month)
+        pending = self.server.statuses.get(month)
+        if pending:
+            self.send_response(pending.pop(0))
+            self.end_headers()
+            return
+        if month == "05":
+            items = {"item": [{"locdate": int(f"{year}0505"), "dateName": "어린이날"},
+                              {"locdate": int(f"{year}0515"), "dateName": "부처님오신날"}]}
+        elif month == "01":
+            items = {"item": {"locdate": int(f"{year}0101"), "dateName": "신정"}}
+        else:
+            items = ""
+        body = json.dumps({"response": {"body": {"items": items}}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def holiday_api(app, serve_stand_in, monkeypatch):
+    server = serve_stand_in(HolidayApiStandIn, calls=[], statuses={})
+    monkeypatch.setattr(app, "PUBLIC_HOLIDAY_API_URL", f"{server.url}/getRestDeInfo")
+    return server
+
+
+def test_transient_errors_are_retried(app, holiday_api):
+    holiday_api.statuses = {"03": [503], "05": [429, 502]}
+    holidays, failed = app.fetch_public_holiday_year(2027)
+    assert failed == []
+    assert sorted(holidays) == [("2027-01-01", "신정"), ("2027-05-05", "어린이날"), ("2027-05-15", "부처님오신날")]
+    assert holiday_api.calls.count("03") == 2
+    assert holiday_api.calls.count("05") == 3
+    assert len(holiday_api.calls) == 15
+
+
+def test_client_errors_and_exhausted_retries_fail_the_month(app, holiday_api):
+    holiday_api.statuses = {"07": [400], "09": [503] * app.PUBLIC_HOLIDAY_RETRIES}
+    holidays, failed = app.fetch_public_holiday_year(2027)
+    assert failed == [7, 9]
+    assert holiday_api.calls.count("07") == 1
+    assert holiday_api.calls.count("09") == app.PUBLIC_HOLIDAY_RETRIES
+    assert len(holidays) == 3
+
+
+def test_route_fills_an_empty_year_then_replaces_on_force(app, fresh_db, holiday_api, monkeypatch):
+    monkeypatch.setattr(app, "public_holiday_refresher", app.PublicHolidayRefresher())
+    client = app.app.test_client()
+    assert [h["date"] for h in client.get("/api/public-holidays?year=2027").get_json()] == ["2027-01-01", "2027-05-05", "2027-05-15"]
+
+    calls = len(holiday_api.calls)
+    assert len(client.get("/api/public-holidays?year=2027").get_json()) == 3
+    assert len(holiday_api.calls) == calls  # 최근에 확인한 연도는 다시 부르지 않음
+
+    conn = app.get_db_connection()
+    conn.execute("INSERT INTO public_holidays (date, description, source) VALUES ('2027-07-07', '취소된 휴일', 'api')")
+    conn.commit()
+    conn.close()
+    forced = client.get("/api/public-holidays?year=2027&force=1").get_json()
+    assert "2027-07-07" not in [h["date"] for h in forced]
+
+
+def test_not_modified_still_schedules_stale_refresh(app, fresh_db, holiday_api, monkeypatch):
+    monkeypatch.setattr(app, "public_holiday_refresher", app.PublicHolidayRefresher())
+    client = app.app.test_client()
+    first = client.get("/api/public-holidays?year=2027")
+    assert first.status_code == 200 and first.headers["ETag"]
+
+    # 캐시된 ETag로 다시 물어도, 연도가 오래되면 갱신은 예약됩니다.
+    refresher = app.public_holiday_refresher
+    monkeypatch.setattr(refresher, "is_stale", lambda year: True)
+    scheduled = {}
+    real_refresh = refresher.refresh
+
+    def refresh(year, force=False):
+        scheduled[year] = real_refresh(year, force=force)
+        return scheduled[year]
+
+    monkeypatch.setattr(refresher, "refresh", refresh)
+    again = client.get("/api/public-holidays?year=2027", headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == first.headers["ETag"]
+    assert all(done.wait(5) for done in scheduled.values())
+    assert 2027 in scheduled
+
+
+def test_force_during_merge_refresh_reruns_with_replace(app, monkeypatch):
+    release = threading.Event()
+    started = threading.Event()
+    calls = []
+
+    def fake_fetch(year):
+        started.set()
+        release.wait(5)
+        return [(f"{year}-01-01", "신정")], []
+
+    monkeypatch.setattr(app, "fetch_public_holiday_year", fake_fetch)
+    monkeypatch.setattr(app, "store_public_holidays", lambda year, holidays, replace=False, complete=True: calls.append(replace))
+    refresher = app.PublicHolidayRefresher()
+
+    merge_done = refresher.refresh(2031)
+    assert started.wait(5)
+    force_done = refresher.refresh(2031, force=True)
+    # 강제 요청이 여러 번 와도 교체 갱신은 한 번만 추가됩니다.
+    assert refresher.refresh(2031, force=True) is force_done
+    assert force_done is merge_done
+    assert not force_done.is_set()
+
+    release.set()
+    assert force_done.wait(5)
+    assert calls == [False, True]
+    assert not refresher.is_running(2031)
+
+
+def test_force_refresh_runs_once_with_replace(app, monkeypatch):
+    calls = []
+    monkeypatch.setattr(app, "fetch_public_holiday_year", lambda year: ([], []))
+    monkeypatch.setattr(app, "store_public_holidays", lambda year, holidays, replace=False, complete=True: calls.append(replace))
+    refresher = app.PublicHolidayRefresher()
+
+    assert refresher.refresh(2032, force=True).wait(5)
+    assert refresher.refresh(2032).wait(5)
+    assert calls == [True, False]
@@ -0,0 +1,63 @@
+# 핫 쿼리가 마이그레이션 v3 인덱스를 타는지 EXPLAIN QUERY PLAN으로 확인합니다.
+# 쿼리 문장은 라우트와 같은 app.py 상수를 씁니다.
+import pytest
+
+D = ("2026-01-01", "2026-01-31")
+
+
+@pytest.fixture
+def hot_queries(app):
+    # (문장, 인자, 테이블 별칭, 기대 인덱스). 문장은 라우트가 쓰는 app.py 상수 그대로입니다.
+    return {
+        # /admin/stats/weekly_dept
+        "meals": (app.MEALS_IN_RANGE_SQL, D, "meals", "idx_meals_date"),
+        # /admin/logs, 로그 다운로드
+        "meal_logs": (app.MEAL_LOGS_SQL, D + ("%", "%"), "l", "idx_meal_logs_date"),
+        # /visitors/weekly
+        "visitors": (app.VISITORS_IN_RANGE_SQL, D, "visitors", "idx_visitors_date"),
+        # 방문자 로그 다운로드
+        "visitor_logs": (app.VISITOR_LOGS_IN_RANGE_SQL, D, "l", "idx_visitor_logs_date"),
+        # /admin/selfcheck
+        "selfcheck": (app.SELFCHECK_SUMMARY_SQL, D, "selfcheck", "idx_selfcheck_date"),
+    }
+
+
+def query_plan(app, sql, params):
+    conn = app.get_db_connection(readonly=True)
+    try:
+        return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+    finally:
+        conn.close()
+
+
+def uses_index(plan, table, index):
+    return any(step.startswith(f"SEARCH {table} ")
+               and (f"USING INDEX {index} " in step or f"USING COVERING INDEX {index} " in step)
+               for step in plan)
+
+
+@pytest.mark.parametrize("name", ["meals", "meal_logs", "selfcheck", "visitor_logs", "visitors"])
+def test_hot_between_query_uses_date_index(app, fresh_db, hot_queries, name):
+    sql, params, table, index = hot_queries[name]
+    plan = query_plan(app, sql, params)
+    assert uses_index(plan, table, index), plan
+    assert not any(step.startswith(f"SCAN {table}") for step in plan), plan
+
+
+@pytest.mark.parametrize("mode", ["all", "apply"])
+def test_admin_meals_ordering_uses_employee_index(app, fresh_db, mode):
+    plan = query_plan(app, app.ADMIN_MEALS_SQL[mode], D)
+    assert uses_index(plan, "e", "idx_employees_type_dept_name"), plan
+    assert any(step.startswith("SEARCH m ") and "INDEX" in step for step in plan), plan
+    # 부서·이름 순서는 인덱스가 보장하므로 전체 정렬용 임시 B-트리는 없어야 합니다.
+    assert "USE TEMP B-TREE FOR ORDER BY" not in plan, plan
+
+
+def test_migrations_are_recorded_and_idempotent(app, fresh_db):
+    app.run_migrations()
+    conn = app.get_db_connection(readonly=True)
+    try:
+        versions = [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+    finally:
+        conn.close()
+    assert versions == [version for version, _, _ in app.SCHEMA_MIGRATIONS]
@@ -0,0 +1,38 @@
+# 실적 엑셀 파서(read_xlsx_columns)가 sharedStrings/inlineStr 양식을 똑같이 읽는지 확인합니다.
+import io
+import zipfile
+
+import xlsxwriter
+
+COLUMNS = {"A": "식사일자", "B": "이름", "C": "부서", "D": "식사구분"}
+ROWS = [("2026-01-05", "홍길동", "생산팀(본사)", "중식"), ("2026-01-05", "김철수", "품질팀", "석식"),
+        ("2026-01-06", "홍길동", "생산팀(본사)", "조식")]
+NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+
+
+def shared_strings_xlsx():
+    buffer = io.BytesIO()
+    workbook = xlsxwriter.Workbook(buffer)
+    sheet = workbook.add_worksheet("실적")
+    sheet.write_row(0, 0, list(COLUMNS.values()))
+    for i, row in enumerate(ROWS, 1):
+        sheet.write_row(i, 0, row)
+    workbook.close()
+    buffer.seek(0)
+    return buffer
+
+
+def inline_strings_xlsx():
+    rows = [f'<row r="{i}">' + "".join(f'<c r="{col}{i}" t="inlineStr"><is><t>{value}</t></is></c>' for col, value in zip("ABCD", row)) + "</row>"
+            for i, row in enumerate([tuple(COLUMNS.values())] + ROWS, 1)]
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as z:
+        z.writestr("xl/worksheets/sheet1.xml", f'<?xml version="1.0"?><worksheet xmlns="{NS}"><sheetData>{"".join(rows)}</sheetData></worksheet>')
+    buffer.seek(0)
+    return buffer
+
+
+def test_shared_and_inline_strings_parse_the_same(app):
+    for make in (shared_strings_xlsx, inline_strings_xlsx):
+        df = app.read_xlsx_columns(make(), COLUMNS, skip_header=("A", "식사일자"))
+        assert [tuple(row) for row in df.itertuples(index=False)] == ROWS, make.__name__